@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Benchmarki COVAL na syntetycznych repozytoriach
+
+Przykłady:
+  python benchmarks.py complexity --sizes 1000 10000
+  python benchmarks.py complexity --sizes 1000 --workers 1 4
+  python benchmarks.py clones --sizes 1000 10000
+  python benchmarks.py repair --sizes 100 1000 10000 100000 --output bench-$(git rev-parse --short HEAD).json
+  python benchmarks.py compare bench-old.json bench-new.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from clones import scan_directory
+from complexity import analyze_files
+from repair import RepairSystem
+from triage_cache import TriageCache
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================
+# SYNTETYCZNE REPOZYTORIA
+# ============================================
+
+_FUNCTION_TEMPLATE = '''
+def {name}(items, limit={limit}):
+    """Przetwarza elementy ({name})"""
+    result = []
+    for item in items:
+        if item is None:
+            continue
+        elif isinstance(item, str) and len(item) > limit:
+            result.append(item[:limit])
+        else:
+            try:
+                result.append(int(item) * {factor})
+            except (TypeError, ValueError):
+                result.append(0)
+    return [x for x in result if x]
+'''
+
+_NESTED_TEMPLATE = '''
+def {name}(matrix):
+    total = 0
+    for row in matrix:
+        for value in row:
+            if value > 0:
+                if value % 2 == 0 and value < 100 or value == 999:
+                    total += value
+                while total > 1000:
+                    total -= 1000
+    return total
+'''
+
+
+def generate_python_module(rng: random.Random, functions: int = 4) -> str:
+    """Generuje moduł Pythona o losowej złożoności"""
+    parts = ['"""Moduł syntetyczny"""\nimport os\n'] if rng.random() < 0.7 else ['import os\n']
+    for i in range(functions):
+        template = _NESTED_TEMPLATE if rng.random() < 0.3 else _FUNCTION_TEMPLATE
+        parts.append(template.format(name=f"func_{i}_{rng.randint(0, 10**6)}",
+                                     limit=rng.randint(1, 100), factor=rng.randint(1, 9)))
+    return "\n".join(parts)
+
+
+def generate_synthetic_repo(root: Path, n_files: int, seed: int = 42) -> Path:
+    """Tworzy syntetyczne repozytorium z n_files plikami Pythona"""
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+
+    for i in range(n_files):
+        package = root / "src" / f"pkg_{i // 100:04d}"
+        package.mkdir(parents=True, exist_ok=True)
+        (package / f"module_{i:06d}.py").write_text(generate_python_module(rng, rng.randint(1, 6)))
+
+    return root
+
+
+_JS_TEMPLATE = '''function {name}(items) {{
+  // Filtruje elementy ({name})
+  return items.filter((item) => item && item.length > {limit});
+}}
+module.exports = {{ {name} }};
+'''
+
+_GO_TEMPLATE = '''package pkg
+
+func {name}(items []int) int {{
+\ttotal := 0
+\tfor _, item := range items {{
+\t\tif item > {limit} {{
+\t\t\ttotal += item
+\t\t}}
+\t}}
+\treturn total
+}}
+'''
+
+_JAVA_TEMPLATE = '''public class {name} {{
+    public static int run(int[] items) {{
+        int total = 0;
+        for (int item : items) {{
+            if (item > {limit}) {{
+                total += item;
+            }}
+        }}
+        return total;
+    }}
+}}
+'''
+
+_TEST_TEMPLATE = '''"""Testy syntetyczne"""
+from src.{package}.{module} import *
+
+
+def test_{name}():
+    assert {limit} > 0
+
+
+def test_{name}_empty():
+    assert [] == []
+'''
+
+
+def generate_mixed_repo(root: Path, n_files: int, seed: int = 42,
+                        duplicate_ratio: float = 0.1, test_ratio: float = 0.15) -> Path:
+    """
+    Tworzy syntetyczne repozytorium projektu do naprawy: moduły Pythona
+    (część jako zduplikowane kopie), JS, Go i Java, testy pytest,
+    requirements.txt oraz stacktrace wskazujący na pliki źródłowe
+    (``stacktrace.txt`` obok katalogu repozytorium).
+    """
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "requirements.txt").write_text("pytest\nrequests\n")
+
+    python_modules: List[Tuple[str, str]] = []
+    for i in range(n_files):
+        package = f"pkg_{i // 100:04d}"
+        roll = rng.random()
+        name = f"item_{i:06d}"
+
+        if roll < test_ratio and python_modules:
+            target_package, target_module = rng.choice(python_modules)
+            path = root / "tests" / package / f"test_{name}.py"
+            content = _TEST_TEMPLATE.format(package=target_package, module=target_module,
+                                            name=name, limit=rng.randint(1, 100))
+        elif roll < 0.75:
+            path = root / "src" / package / f"module_{i:06d}.py"
+            if python_modules and rng.random() < duplicate_ratio:
+                # Klon istniejącego modułu (do wykrywania duplikacji)
+                source_package, source_module = rng.choice(python_modules)
+                content = (root / "src" / source_package / f"{source_module}.py").read_text()
+            else:
+                content = generate_python_module(rng, rng.randint(1, 6))
+            python_modules.append((package, path.stem))
+        elif roll < 0.85:
+            path = root / "web" / package / f"{name}.js"
+            content = _JS_TEMPLATE.format(name=name, limit=rng.randint(1, 100))
+        elif roll < 0.93:
+            path = root / "go" / package / f"{name}.go"
+            content = _GO_TEMPLATE.format(name=f"Run{i}", limit=rng.randint(1, 100))
+        else:
+            path = root / "java" / package / f"Item{i:06d}.java"
+            content = _JAVA_TEMPLATE.format(name=f"Item{i:06d}", limit=rng.randint(1, 100))
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+    # Fałszywy stacktrace wskazujący na kilka modułów
+    frames = rng.sample(python_modules, min(3, len(python_modules)))
+    lines = ["Traceback (most recent call last):"]
+    for package, module in frames:
+        lines.append(f'  File "src/{package}/{module}.py", line {rng.randint(1, 40)}, in func_0')
+        lines.append("    result.append(int(item) * 3)")
+    lines.append("TypeError: unsupported operand type(s) for *: 'NoneType' and 'int'")
+    (root.parent / "stacktrace.txt").write_text("\n".join(lines) + "\n")
+
+    return root
+
+
+# ============================================
+# ATRAPA LLM
+# ============================================
+
+STUB_LLM_RESPONSE = json.dumps({
+    "analysis": "Brak obsługi None przed mnożeniem",
+    "solution": "Dodano warunek pomijający None",
+    "files": {"src/fix.py": "def safe_multiply(value, factor):\n    return 0 if value is None else value * factor\n"},
+    "explanation": "Propozycja z atrapy LLM (benchmark)",
+    "confidence": 0.9
+})
+
+
+class StubRepairSystem(RepairSystem):
+    """RepairSystem z atrapą LLM - bez Ollamy i wywołań sieciowych"""
+
+    def __init__(self, repair_dir: str, response: str = STUB_LLM_RESPONSE):
+        self.stub_response = response
+        self.llm_calls = 0
+        super().__init__(repair_dir=repair_dir, config_path=os.devnull)
+
+    def _load_config(self, config_path: str) -> Dict:
+        return self._get_default_config()
+
+    def _ensure_model_available(self) -> bool:
+        return True
+
+    def _call_llm(self, prompt: str, save_path: Optional[Path] = None) -> str:
+        self.llm_calls += 1
+        if save_path:
+            save_path.write_text(prompt)
+        return self.stub_response
+
+
+# ============================================
+# BENCHMARKI
+# ============================================
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def _timed_with_memory(func, *args, **kwargs):
+    """Czas i szczytowa alokacja pamięci (tracemalloc)"""
+    tracemalloc.start()
+    try:
+        result, elapsed = _timed(func, *args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def _naive_line_duplication(root: Path) -> float:
+    """Dawna metoda: lista wszystkich linii + zbiór unikalnych"""
+    all_lines = []
+    for py_file in root.rglob("*.py"):
+        all_lines.extend(py_file.read_text().splitlines())
+    return 1 - (len(set(all_lines)) / len(all_lines)) if all_lines else 0.0
+
+
+def environment_info() -> Dict[str, Any]:
+    """Metadane przebiegu - pozwalają porównywać wyniki między commitami"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=Path(__file__).parent, timeout=10).stdout.strip()
+    except Exception:
+        commit = ""
+    return {
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+
+
+def _stage(memory: bool, func, *args, **kwargs) -> Tuple[Any, Dict[str, Optional[float]]]:
+    """Uruchamia etap i zwraca (wynik, {s, peak_mb}); tracemalloc spowalnia ok. 2x"""
+    if not memory:
+        result, elapsed = _timed(func, *args, **kwargs)
+        return result, {"s": round(elapsed, 4), "peak_mb": None}
+    result, elapsed, peak = _timed_with_memory(func, *args, **kwargs)
+    return result, {"s": round(elapsed, 4), "peak_mb": round(peak / 2**20, 2)}
+
+
+def bench_complexity(sizes: List[int], workers: List[Optional[int]], seed: int = 42) -> Dict[str, Any]:
+    """Mierzy silnik złożoności: sekwencyjnie vs pula procesów, zimny vs ciepły cache"""
+    results: Dict[str, Any] = {"benchmark": "complexity", "runs": []}
+
+    for size in sizes:
+        workdir = Path(tempfile.mkdtemp(prefix=f"coval-bench-{size}-"))
+        try:
+            repo = generate_synthetic_repo(workdir / "repo", size, seed)
+            files = sorted(repo.rglob("*.py"))
+
+            for worker_count in workers:
+                _, engine_time = _timed(analyze_files, files, worker_count)
+
+                cache_dir = workdir / f"cache-{worker_count}"
+                _, cold_time = _timed(TriageCache(cache_dir, repo, workers=worker_count).scan)
+                _, warm_time = _timed(TriageCache(cache_dir, repo, workers=worker_count).scan)
+
+                run = {
+                    "files": size,
+                    "workers": worker_count or "auto",
+                    "engine_s": round(engine_time, 4),
+                    "triage_cold_s": round(cold_time, 4),
+                    "triage_warm_s": round(warm_time, 4),
+                    "files_per_s": round(size / engine_time, 1) if engine_time else None
+                }
+                results["runs"].append(run)
+                logger.info(f"📊 {run}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return results
+
+
+def bench_clones(sizes: List[int], seed: int = 42) -> Dict[str, Any]:
+    """Porównuje indeks klonów (winnowing) z dawną duplikacją linii"""
+    results: Dict[str, Any] = {"benchmark": "clones", "runs": []}
+
+    for size in sizes:
+        workdir = Path(tempfile.mkdtemp(prefix=f"coval-bench-{size}-"))
+        try:
+            repo = generate_synthetic_repo(workdir / "repo", size, seed)
+
+            naive_ratio, naive_time, naive_peak = _timed_with_memory(_naive_line_duplication, repo)
+            index, index_time, index_peak = _timed_with_memory(scan_directory, repo)
+
+            run = {
+                "files": size,
+                "naive_s": round(naive_time, 4),
+                "naive_peak_mb": round(naive_peak / 2**20, 2),
+                "naive_ratio": round(naive_ratio, 4),
+                "winnowing_s": round(index_time, 4),
+                "winnowing_peak_mb": round(index_peak / 2**20, 2),
+                "winnowing_ratio": round(index.duplication_ratio() or 0.0, 4),
+                "clone_pairs": len(index.clones)
+            }
+            results["runs"].append(run)
+            logger.info(f"📊 {run}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return results
+
+
+def bench_repair(sizes: List[int], seed: int = 42, workers: Optional[int] = None,
+                 memory: bool = True) -> Dict[str, Any]:
+    """
+    Mierzy etapy naprawy na syntetycznych repozytoriach: triage (zimny
+    i ciepły cache), create_mre, _prepare_context i generate_fix z atrapą LLM.
+    Szczyt pamięci (tracemalloc) dotyczy procesu głównego - bez puli procesów.
+    """
+    results: Dict[str, Any] = {"benchmark": "repair", "seed": seed, "workers": workers or "auto",
+                               "memory": memory, "runs": []}
+
+    for size in sizes:
+        workdir = Path(tempfile.mkdtemp(prefix=f"coval-bench-repair-{size}-"))
+        try:
+            _, generate_time = _timed(generate_mixed_repo, workdir / "repo", size, seed)
+            repo = workdir / "repo"
+            error_file = workdir / "stacktrace.txt"
+
+            system = StubRepairSystem(repair_dir=str(workdir / "repairs"))
+            system.triage_workers = workers
+
+            stages: Dict[str, Dict[str, Optional[float]]] = {}
+            _, stages["triage_cold"] = _stage(memory, system.triage, error_file, repo)
+            metrics, stages["triage_warm"] = _stage(memory, system.triage, error_file, repo)
+            repair_path, stages["create_mre"] = _stage(memory, system.create_mre, repo, error_file, "bench")
+            _, stages["prepare_context"] = _stage(memory, system._prepare_context, repair_path / "mre")
+            proposals, stages["generate_fix"] = _stage(memory, system.generate_fix, repair_path, metrics)
+
+            run = {
+                "files": size,
+                "generate_s": round(generate_time, 4),
+                "stages": stages,
+                "technical_debt": round(metrics.technical_debt, 4),
+                "proposals": len(proposals),
+                "llm_calls": system.llm_calls
+            }
+            results["runs"].append(run)
+            logger.info(f"📊 {size} plików: " + ", ".join(f"{name}={stage['s']}s" for name, stage in stages.items()))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return results
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Porównuje dwa wyniki benchmarku repair (stosunek czasu i pamięci per etap)"""
+    baseline_runs = {run["files"]: run for run in baseline.get("runs", [])}
+    rows = []
+    for run in current.get("runs", []):
+        previous = baseline_runs.get(run["files"])
+        if not previous or "stages" not in run:
+            continue
+        for name, stage in run["stages"].items():
+            old = previous.get("stages", {}).get(name)
+            if not old:
+                continue
+            rows.append({
+                "files": run["files"],
+                "stage": name,
+                "baseline_s": old["s"],
+                "current_s": stage["s"],
+                "time_ratio": round(stage["s"] / old["s"], 3) if old["s"] else None,
+                "baseline_peak_mb": old["peak_mb"],
+                "current_peak_mb": stage["peak_mb"]
+            })
+    return rows
+
+
+def main():
+    """Punkt wejścia CLI benchmarków"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="COVAL - benchmarki na syntetycznych repozytoriach")
+    parser.add_argument('benchmark', choices=['complexity', 'clones', 'repair', 'compare'],
+                        help='Benchmark do uruchomienia (compare: porównanie dwóch plików JSON)')
+    parser.add_argument('files', nargs='*', help='Pliki wyników dla compare: bazowy i bieżący')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000],
+                        help='Liczby plików syntetycznych repozytoriów')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 0],
+                        help='Liczby procesów puli (0 = liczba CPU)')
+    parser.add_argument('--seed', type=int, default=42, help='Ziarno generatora')
+    parser.add_argument('--output', type=str, help='Plik JSON z wynikami')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='repair: bez pomiaru pamięci (tracemalloc), same czasy')
+
+    args = parser.parse_args()
+    workers = [w or None for w in args.workers]
+
+    if args.benchmark == 'compare':
+        if len(args.files) != 2:
+            parser.error("compare wymaga dwóch plików JSON: bazowego i bieżącego")
+        baseline, current = (json.loads(Path(f).read_text()) for f in args.files)
+        for row in compare_results(baseline, current):
+            print(f"{row['files']:>7} {row['stage']:<16} {row['baseline_s']:>9.3f}s -> {row['current_s']:>9.3f}s"
+                  f"  x{row['time_ratio']}  {row['baseline_peak_mb']} MB -> {row['current_peak_mb']} MB")
+        return
+
+    if args.benchmark == 'clones':
+        results = bench_clones(args.sizes, args.seed)
+    elif args.benchmark == 'repair':
+        results = bench_repair(args.sizes, args.seed, workers[0], memory=not args.no_memory)
+    else:
+        results = bench_complexity(args.sizes, workers, args.seed)
+    results["environment"] = environment_info()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+        logger.info(f"📄 Wyniki zapisane do: {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
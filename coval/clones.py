@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Wykrywanie klonów kodu metodą winnowing (odciski palców z rolling hash).
+
+Każdy plik zamieniany jest na ciąg znormalizowanych linii, z którego liczone
+są hashe k-gramów (k kolejnych linii, rolling hash Rabina-Karpa). Winnowing
+wybiera minimum z każdego okna w hashy - zostaje ok. 2/(w+1) odcisków na
+linię, a każdy klon dłuższy niż k + w - 1 linii ma gwarantowanie wspólny
+odcisk. Odciski per-plik można utrwalić (cache triage) - utrwalana jest tylko
+próbka hashy podzielnych przez ``FINGERPRINT_SAMPLE`` (ta sama we wszystkich
+plikach, więc wspólne odciski klonu przechodzą razem), dzięki czemu cache nie
+rośnie liniowo z liczbą linii repozytorium. Indeks globalny budowany jest
+strumieniowo z ograniczeniem pamięci (adaptacyjne próbkowanie).
+"""
+
+import hashlib
+import re
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+from walker import walk_files
+
+# Długość k-gramu (liczba kolejnych znormalizowanych linii)
+DEFAULT_K = 4
+
+# Rozmiar okna winnowing
+DEFAULT_WINDOW = 4
+
+# Maksymalna liczba odcisków w indeksie globalnym
+DEFAULT_MAX_INDEX = 1_000_000
+
+# Utrwalane odciski: hashe podzielne przez tę wartość (potęga 2 - zgodna z
+# próbkowaniem CloneIndex). Klon z n odciskami wykrywany z p. 1 - (3/4)^n.
+FINGERPRINT_SAMPLE = 4
+
+_MODULUS = (1 << 61) - 1
+_BASE = 1_000_003
+_WHITESPACE = re.compile(r'\s+')
+# Prefiksy linii komentarzy per rozszerzenie; '*' tylko tam, gdzie oznacza
+# kontynuację komentarza blokowego (w Pythonie zaczyna np. ``*args, rest = ...``)
+_HASH_COMMENTS = ('#',)
+_C_COMMENTS = ('//', '/*', '*')
+COMMENT_PREFIXES = {
+    '.py': _HASH_COMMENTS, '.pyi': _HASH_COMMENTS, '.sh': _HASH_COMMENTS, '.rb': _HASH_COMMENTS,
+    '.yaml': _HASH_COMMENTS, '.yml': _HASH_COMMENTS, '.toml': _HASH_COMMENTS,
+    '.js': _C_COMMENTS, '.jsx': _C_COMMENTS, '.ts': _C_COMMENTS, '.tsx': _C_COMMENTS,
+    '.java': _C_COMMENTS, '.c': _C_COMMENTS, '.h': _C_COMMENTS, '.cpp': _C_COMMENTS,
+    '.hpp': _C_COMMENTS, '.cs': _C_COMMENTS, '.go': _C_COMMENTS, '.rs': _C_COMMENTS,
+    '.php': _C_COMMENTS + _HASH_COMMENTS,
+}
+
+
+def _line_hash(line: str) -> int:
+    """Stabilny (niezależny od procesu) hash linii"""
+    digest = hashlib.blake2b(line.encode('utf-8', errors='replace'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % _MODULUS
+
+
+def normalize_lines(content: str, suffix: str = '.py') -> List[Tuple[int, str]]:
+    """Znormalizowane linie (bez pustych i komentarzy języka pliku) z numerami linii"""
+    prefixes = COMMENT_PREFIXES.get(suffix.lower(), ())
+    result = []
+    for number, line in enumerate(content.splitlines(), 1):
+        stripped = line.strip()
+        if not stripped or (prefixes and stripped.startswith(prefixes)):
+            continue
+        result.append((number, _WHITESPACE.sub(' ', stripped)))
+    return result
+
+
+def kgram_hashes(lines: List[Tuple[int, str]], k: int = DEFAULT_K) -> List[Tuple[int, int]]:
+    """Rolling hash każdego k-gramu linii: lista (hash, numer pierwszej linii)"""
+    if len(lines) < k:
+        return []
+
+    hashes = [_line_hash(text) for _, text in lines]
+    high = pow(_BASE, k - 1, _MODULUS)
+
+    current = 0
+    for value in hashes[:k]:
+        current = (current * _BASE + value) % _MODULUS
+
+    result = [(current, lines[0][0])]
+    for i in range(k, len(hashes)):
+        current = ((current - hashes[i - k] * high) * _BASE + hashes[i]) % _MODULUS
+        result.append((current, lines[i - k + 1][0]))
+    return result
+
+
+def winnow(hashes: List[Tuple[int, int]], window: int = DEFAULT_WINDOW) -> List[Tuple[int, int]]:
+    """Winnowing: minimum (najbardziej na prawo) z każdego okna, bez powtórzeń"""
+    if not hashes:
+        return []
+    if len(hashes) <= window:
+        return [min(reversed(hashes), key=lambda item: item[0])]
+
+    fingerprints = []
+    last_position = -1
+    for start in range(len(hashes) - window + 1):
+        position = start
+        for offset in range(start + 1, start + window):
+            if hashes[offset][0] <= hashes[position][0]:
+                position = offset
+        if position != last_position:
+            fingerprints.append(hashes[position])
+            last_position = position
+    return fingerprints
+
+
+def fingerprint_source(content: str, k: int = DEFAULT_K, window: int = DEFAULT_WINDOW,
+                       suffix: str = '.py', sample: int = 1) -> List[List[int]]:
+    """Odciski palców pliku jako lista [hash, linia] (format JSON-owalny), opcjonalnie próbkowane"""
+    return [[value, line] for value, line in winnow(kgram_hashes(normalize_lines(content, suffix), k), window)
+            if value % sample == 0]
+
+
+class CloneIndex:
+    """
+    Strumieniowy indeks odcisków palców z ograniczoną pamięcią.
+
+    Gdy liczba odcisków przekracza max_entries, indeks przechodzi na
+    próbkowanie: zostają tylko hashe podzielne przez rosnący modulus.
+    Współczynnik duplikacji liczony jest na tej samej próbce, więc pozostaje
+    nieobciążonym przybliżeniem.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_INDEX, max_clones: int = 50):
+        self.max_entries = max_entries
+        self.max_clones = max_clones
+        self.sample_modulus = 1
+        self.first_seen: Dict[int, Tuple[str, int]] = {}
+        self.occurrences: Dict[int, int] = {}
+        self.clones: List[Dict[str, Any]] = []
+
+    def add(self, path: str, fingerprints: Iterable[Iterable[int]]):
+        """Dodaje odciski jednego pliku"""
+        for value, line in fingerprints:
+            if value % self.sample_modulus:
+                continue
+            count = self.occurrences.get(value, 0)
+            self.occurrences[value] = count + 1
+            if count == 0:
+                self.first_seen[value] = (path, line)
+            elif count == 1 and len(self.clones) < self.max_clones:
+                origin_path, origin_line = self.first_seen[value]
+                self.clones.append({
+                    'original': f"{origin_path}:{origin_line}",
+                    'duplicate': f"{path}:{line}"
+                })
+
+        if len(self.occurrences) > self.max_entries:
+            self._downsample()
+
+    def add_source(self, path: str, content: str):
+        """Dodaje plik bezpośrednio z treści (bez utrwalonych odcisków)"""
+        self.add(path, fingerprint_source(content, suffix=Path(path).suffix or '.py'))
+
+    def _downsample(self):
+        """Podwaja modulus próbkowania aż indeks zmieści się w limicie"""
+        while len(self.occurrences) > self.max_entries:
+            self.sample_modulus *= 2
+            self.occurrences = {h: c for h, c in self.occurrences.items() if h % self.sample_modulus == 0}
+        self.first_seen = {h: loc for h, loc in self.first_seen.items() if h in self.occurrences}
+
+    @property
+    def total(self) -> int:
+        return sum(self.occurrences.values())
+
+    def duplication_ratio(self) -> Optional[float]:
+        """Udział powtórzonych odcisków (wszystkie wystąpienia poza pierwszym)"""
+        total = self.total
+        if not total:
+            return None
+        return (total - len(self.occurrences)) / total
+
+
+def scan_directory(root: Path, pattern: str = "*.py", index: Optional[CloneIndex] = None) -> CloneIndex:
+    """Strumieniowo indeksuje pliki katalogu (po jednym pliku w pamięci)"""
+    index = index or CloneIndex()
+    for file_path in sorted(walk_files(Path(root), patterns=[pattern])):
+        index.add_source(file_path.relative_to(root).as_posix(),
+                         file_path.read_text(encoding='utf-8', errors='replace'))
+    return index
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Silnik złożoności oparty na ``ast`` - złożoność cyklomatyczna i kognitywna.
+
+Zastępuje liczenie słów kluczowych (``'if '``, ``'for '``...) w treści pliku,
+które łapało też napisy i komentarze. Pliki, których nie da się sparsować
+(typowe dla kodu do naprawy), są oceniane dawną heurystyką słów kluczowych;
+tak samo pliki zbyt głęboko zagnieżdżone dla rekurencyjnej analizy
+(np. kod generowany) - oznaczane jako ``unanalyzable``.
+Dla dużych drzew analiza jest rozkładana na pulę procesów.
+"""
+
+import ast
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, List, Any, Tuple, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Próg złożoności kognitywnej funkcji (jak w SonarQube) - nadwyżka to dług
+COGNITIVE_THRESHOLD = 15
+
+# Poniżej tej liczby plików pula procesów się nie opłaca
+PARALLEL_THRESHOLD = 64
+
+# Heurystyka dla plików z błędem składni
+FALLBACK_KEYWORDS = ['if ', 'for ', 'while ', 'try:', 'except:', 'elif ']
+
+_FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef)
+_LOOP_NODES = (ast.For, ast.AsyncFor, ast.While)
+
+
+def _decision_points(node: ast.AST) -> int:
+    """Liczba punktów decyzyjnych węzła (wkład do złożoności cyklomatycznej)"""
+    if isinstance(node, (ast.If, ast.IfExp, ast.ExceptHandler)):
+        return 1
+    if isinstance(node, _LOOP_NODES):
+        return 1 + (1 if node.orelse else 0)
+    if isinstance(node, ast.BoolOp):
+        return len(node.values) - 1
+    if isinstance(node, ast.comprehension):
+        return 1 + len(node.ifs)
+    if hasattr(ast, 'match_case') and isinstance(node, ast.match_case):
+        return 1
+    return 0
+
+
+def _block_decision_points(tree: ast.AST) -> List[int]:
+    """
+    Jedno przejście po drzewie: punkty decyzyjne per blok.
+    Indeks 0 to moduł, kolejne to funkcje (zagnieżdżone liczone osobno).
+    """
+    blocks = [0]
+    stack = [(child, 0) for child in ast.iter_child_nodes(tree)]
+    while stack:
+        node, block = stack.pop()
+        if isinstance(node, _FUNCTION_NODES):
+            block = len(blocks)
+            blocks.append(0)
+        else:
+            blocks[block] += _decision_points(node)
+        for child in ast.iter_child_nodes(node):
+            stack.append((child, block))
+    return blocks
+
+
+class _CognitiveVisitor(ast.NodeVisitor):
+    """Złożoność kognitywna jednej funkcji (inkrementy strukturalne + zagnieżdżenie)"""
+
+    def __init__(self, function_name: str):
+        self.function_name = function_name
+        self.score = 0
+        self.nesting = 0
+
+    def _structural(self, node: ast.AST, nested_children):
+        self.score += 1 + self.nesting
+        self.nesting += 1
+        for child in nested_children:
+            self.visit(child)
+        self.nesting -= 1
+
+    def visit_If(self, node: ast.If):
+        self.visit(node.test)
+        self._structural(node, node.body)
+        orelse = node.orelse
+        # elif/else: +1 bez kary za zagnieżdżenie
+        while orelse:
+            self.score += 1
+            if len(orelse) == 1 and isinstance(orelse[0], ast.If):
+                elif_node = orelse[0]
+                self.visit(elif_node.test)
+                self.nesting += 1
+                for child in elif_node.body:
+                    self.visit(child)
+                self.nesting -= 1
+                orelse = elif_node.orelse
+            else:
+                self.nesting += 1
+                for child in orelse:
+                    self.visit(child)
+                self.nesting -= 1
+                orelse = []
+
+    def visit_IfExp(self, node: ast.IfExp):
+        self._structural(node, [node.test, node.body, node.orelse])
+
+    def _visit_loop(self, node):
+        self.visit(node.iter if hasattr(node, 'iter') else node.test)
+        self._structural(node, node.body)
+        if node.orelse:
+            self.score += 1
+            self.nesting += 1
+            for child in node.orelse:
+                self.visit(child)
+            self.nesting -= 1
+
+    visit_For = _visit_loop
+    visit_AsyncFor = _visit_loop
+    visit_While = _visit_loop
+
+    def visit_Try(self, node: ast.Try):
+        for child in node.body:
+            self.visit(child)
+        for handler in node.handlers:
+            self._structural(handler, handler.body)
+        for child in node.orelse + node.finalbody:
+            self.visit(child)
+
+    visit_TryStar = visit_Try
+
+    def visit_Match(self, node):
+        self.visit(node.subject)
+        self._structural(node, node.cases)
+
+    def visit_BoolOp(self, node: ast.BoolOp):
+        # Każda sekwencja tego samego operatora to +1
+        self.score += 1
+        for value in node.values:
+            if isinstance(value, ast.BoolOp) and type(value.op) is type(node.op):
+                self.score -= 1
+            self.visit(value)
+
+    def visit_comprehension(self, node: ast.comprehension):
+        self.score += 1 + len(node.ifs)
+        self.generic_visit(node)
+
+    def _visit_nested_function(self, node):
+        # Funkcje zagnieżdżone zwiększają zagnieżdżenie, ale nie dostają inkrementu
+        self.nesting += 1
+        for child in (node.body if isinstance(node.body, list) else [node.body]):
+            self.visit(child)
+        self.nesting -= 1
+
+    visit_FunctionDef = _visit_nested_function
+    visit_AsyncFunctionDef = _visit_nested_function
+    visit_Lambda = _visit_nested_function
+
+    def visit_Call(self, node: ast.Call):
+        # Rekurencja: +1
+        if isinstance(node.func, ast.Name) and node.func.id == self.function_name:
+            self.score += 1
+        self.generic_visit(node)
+
+
+def _outermost_functions(tree: ast.AST) -> List[ast.AST]:
+    """Funkcje nie zagnieżdżone w innych funkcjach (metody klas też)"""
+    stack = list(ast.iter_child_nodes(tree))
+    result = []
+    while stack:
+        node = stack.pop()
+        if isinstance(node, _FUNCTION_NODES):
+            result.append(node)
+        else:
+            stack.extend(ast.iter_child_nodes(node))
+    return result
+
+
+def _cognitive_complexity(func: ast.AST) -> int:
+    """Złożoność kognitywna funkcji"""
+    visitor = _CognitiveVisitor(getattr(func, 'name', ''))
+    body = func.body if isinstance(func.body, list) else [func.body]
+    for child in body:
+        visitor.visit(child)
+    return visitor.score
+
+
+def analyze_python_source(content: str, filename: str = "<source>") -> Dict[str, Any]:
+    """
+    Analizuje kod Pythona i zwraca złożoność pliku:
+    - decision_points: suma punktów decyzyjnych (złożoność cyklomatyczna - 1 per blok)
+    - cyclomatic_max / cognitive_max: najgorsza funkcja
+    - cognitive_excess: suma nadwyżek kognitywnych ponad COGNITIVE_THRESHOLD
+    - parse_error / unanalyzable: ocena heurystyką (błąd składni / zbyt głębokie drzewo)
+    """
+    try:
+        tree = ast.parse(content, filename=filename)
+    except (SyntaxError, ValueError):
+        return _fallback_result(content, parse_error=True)
+    except RecursionError:
+        return _fallback_result(content, unanalyzable=True)
+
+    try:
+        return _analyze_tree(tree)
+    except RecursionError:
+        # Wizytator kognitywny jest rekurencyjny - bardzo głębokie zagnieżdżenie
+        logger.warning(f"⚠️ Zbyt głębokie zagnieżdżenie, heurystyka słów kluczowych: {filename}")
+        return _fallback_result(content, unanalyzable=True)
+
+
+def _fallback_result(content: str, parse_error: bool = False, unanalyzable: bool = False) -> Dict[str, Any]:
+    """Ocena heurystyką słów kluczowych, gdy analiza AST nie jest możliwa"""
+    return {
+        'parse_error': parse_error,
+        'unanalyzable': unanalyzable,
+        'decision_points': sum(content.count(keyword) for keyword in FALLBACK_KEYWORDS),
+        'functions': 0,
+        'cyclomatic_max': 0,
+        'cognitive_total': 0,
+        'cognitive_max': 0,
+        'cognitive_excess': 0
+    }
+
+
+def _analyze_tree(tree: ast.AST) -> Dict[str, Any]:
+    # Blok modułu + każda funkcja osobno (bez zagnieżdżonych definicji)
+    blocks = _block_decision_points(tree)
+    function_points = blocks[1:]
+    decision_points = sum(blocks)
+    cyclomatic_max = max(function_points) + 1 if function_points else 0
+    cognitive_total = 0
+    cognitive_max = 0
+    cognitive_excess = 0
+
+    # Złożoność kognitywna funkcji zagnieżdżonych wlicza się do funkcji zewnętrznej
+    for func in _outermost_functions(tree):
+        cognitive = _cognitive_complexity(func)
+        cognitive_total += cognitive
+        cognitive_max = max(cognitive_max, cognitive)
+        cognitive_excess += max(0, cognitive - COGNITIVE_THRESHOLD)
+
+    return {
+        'parse_error': False,
+        'unanalyzable': False,
+        'decision_points': decision_points,
+        'functions': len(function_points),
+        'cyclomatic_max': cyclomatic_max,
+        'cognitive_total': cognitive_total,
+        'cognitive_max': cognitive_max,
+        'cognitive_excess': cognitive_excess
+    }
+
+
+def analyze_file(file_path: Path) -> Dict[str, Any]:
+    """Analizuje pojedynczy plik Pythona (błąd odczytu nie przerywa skanu)"""
+    try:
+        content = Path(file_path).read_text(encoding='utf-8', errors='replace')
+    except OSError as e:
+        logger.warning(f"⚠️ Nie można odczytać {file_path}: {e}")
+        return _fallback_result("", unanalyzable=True)
+    return analyze_python_source(content, str(file_path))
+
+
+def debt_from_complexity(complexity: Dict[str, Any]) -> float:
+    """Wkład złożoności pliku do długu technicznego"""
+    # 0.5 za punkt decyzyjny (skala zgodna z dawną heurystyką)
+    # + 0.25 za każdy punkt kognitywny ponad próg w funkcji
+    return complexity['decision_points'] * 0.5 + complexity['cognitive_excess'] * 0.25
+
+
+def default_workers() -> int:
+    """Domyślna liczba procesów puli"""
+    return max(1, os.cpu_count() or 1)
+
+
+def parallel_map(func: Callable, items: List[Any], workers: Optional[int] = None) -> List[Any]:
+    """
+    Mapuje funkcję na elementy - w puli procesów dla dużych list,
+    sekwencyjnie dla małych lub gdy jest tylko jeden procesor.
+    Błędy pojedynczych elementów obsługuje ``func`` - tutaj łapane są tylko
+    awarie samej puli.
+    """
+    workers = workers or default_workers()
+    if workers <= 1 or len(items) < PARALLEL_THRESHOLD:
+        return [func(item) for item in items]
+
+    chunksize = max(1, len(items) // (workers * 8))
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(func, items, chunksize=chunksize))
+    except (OSError, BrokenProcessPool, NotImplementedError) as e:
+        # Np. brak /dev/shm w kontenerze - wracamy do trybu sekwencyjnego
+        logger.warning(f"⚠️ Pula procesów niedostępna ({e}), analiza sekwencyjna")
+        return [func(item) for item in items]
+
+
+def analyze_files(paths: List[Path], workers: Optional[int] = None) -> List[Tuple[str, Dict[str, Any]]]:
+    """Analizuje listę plików (równolegle dla dużych drzew)"""
+    results = parallel_map(analyze_file, list(paths), workers)
+    return [(str(path), result) for path, result in zip(paths, results)]
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Statyczny graf importów modułów Pythona.
+
+Importy czytane są z drzewa ``ast`` (bez wykonywania kodu) i rozwiązywane do
+plików w obrębie jednego katalogu. Moduł ``src/pkg/mod.py`` odpowiada
+nazwom ``src.pkg.mod``, ``pkg.mod`` i ``mod`` - dzięki temu działa zarówno
+dla układu ``src/``, jak i płaskiego MRE. Graf służy do wyboru testów
+dotkniętych zmianą (odwrotne domknięcie importów) oraz do wycinania MRE
+(domknięcie importów ramek stacktrace). Importy per-plik są utrwalane
+w cache triage, więc graf dużego ``source_dir`` nie jest parsowany ponownie.
+"""
+
+import ast
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from walker import walk_files
+
+# Wzorce nazw plików testowych
+TEST_PATTERNS = ["test_*.py", "*_test.py"]
+
+
+def module_names(rel_path: str) -> List[str]:
+    """Nazwy kropkowe, pod którymi plik może być importowany (od najdłuższej)"""
+    parts = list(Path(rel_path).with_suffix('').parts)
+    if parts and parts[-1] == '__init__':
+        parts = parts[:-1]
+    return ['.'.join(parts[i:]) for i in range(len(parts))]
+
+
+def imported_modules(content: str, rel_path: str = "") -> Set[str]:
+    """Nazwy modułów importowanych przez plik (względne importy rozwinięte)"""
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return set()
+
+    package = list(Path(rel_path).parent.parts) if rel_path else []
+    result: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            result.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base_parts = package[:len(package) - node.level + 1] if node.level <= len(package) + 1 else []
+                base = '.'.join(base_parts + ([node.module] if node.module else []))
+            else:
+                base = node.module or ''
+            if base:
+                result.add(base)
+            # "from pkg import mod" może importować moduł pkg.mod
+            for alias in node.names:
+                if alias.name != '*':
+                    result.add(f"{base}.{alias.name}" if base else alias.name)
+    return result
+
+
+def build_module_index(files: Iterable[str]) -> Dict[str, Set[str]]:
+    """Nazwa modułu -> pliki, które mogą jej odpowiadać"""
+    index: Dict[str, Set[str]] = {}
+    for rel_path in files:
+        for name in module_names(rel_path):
+            index.setdefault(name, set()).add(rel_path)
+    return index
+
+
+def resolve_imports(imports: Iterable[str], module_index: Dict[str, Set[str]]) -> Set[str]:
+    """Rozwiązuje nazwy importów do plików (także przez prefiksy pakietów)"""
+    resolved: Set[str] = set()
+    for name in imports:
+        parts = name.split('.')
+        for end in range(len(parts), 0, -1):
+            matches = module_index.get('.'.join(parts[:end]))
+            if matches:
+                resolved.update(matches)
+                break
+    return resolved
+
+
+def graph_from_imports(imports_by_file: Dict[str, Iterable[str]]) -> Dict[str, Set[str]]:
+    """Graf z nazw importów per-plik (np. utrwalonych w cache triage)"""
+    module_index = build_module_index(imports_by_file)
+    return {rel_path: resolve_imports(imports, module_index) - {rel_path}
+            for rel_path, imports in imports_by_file.items()}
+
+
+def build_import_graph(root: Path, files: Optional[Iterable[str]] = None) -> Dict[str, Set[str]]:
+    """Graf: plik -> pliki, które importuje (w obrębie root)"""
+    root = Path(root)
+    if files is None:
+        files = [p.relative_to(root).as_posix()
+                 for p in walk_files(root, suffixes={'.py'}, use_gitignore=False)]
+    return graph_from_imports({
+        rel_path: imported_modules((root / rel_path).read_text(encoding='utf-8', errors='replace'), rel_path)
+        for rel_path in files
+    })
+
+
+def import_closure(graph: Dict[str, Set[str]], roots: Iterable[str]) -> Set[str]:
+    """Pliki osiągalne z roots po krawędziach importów (razem z roots)"""
+    seen: Set[str] = set()
+    stack = [r for r in roots if r in graph]
+    while stack:
+        current = stack.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        stack.extend(graph.get(current, ()))
+    return seen
+
+
+def resolve_frame(frame: str, files: Iterable[str]) -> Optional[str]:
+    """Dopasowuje ścieżkę z ramki stacktrace (także absolutną) do pliku drzewa"""
+    frame = Path(frame).as_posix()
+    while frame.startswith(('./', '/')):
+        frame = frame[2:] if frame.startswith('./') else frame[1:]
+    best = None
+    for rel_path in files:
+        if frame == rel_path or frame.endswith('/' + rel_path):
+            if best is None or len(rel_path) > len(best):
+                best = rel_path
+    return best
+
+
+def reverse_closure(graph: Dict[str, Set[str]], changed: Iterable[str]) -> Set[str]:
+    """Pliki, które (pośrednio) importują którykolwiek ze zmienionych plików"""
+    importers: Dict[str, Set[str]] = {}
+    for rel_path, imports in graph.items():
+        for imported in imports:
+            importers.setdefault(imported, set()).add(rel_path)
+
+    seen: Set[str] = set()
+    stack = list(changed)
+    while stack:
+        current = stack.pop()
+        for importer in importers.get(current, ()):
+            if importer not in seen:
+                seen.add(importer)
+                stack.append(importer)
+    return seen
+
+
+def find_test_files(root: Path) -> List[str]:
+    """Pliki testowe w drzewie (ścieżki względne, posortowane)"""
+    root = Path(root)
+    return sorted(p.relative_to(root).as_posix()
+                  for p in walk_files(root, patterns=TEST_PATTERNS, use_gitignore=False))
+
+
+def impacted_tests(root: Path, changed: Iterable[str], graph: Optional[Dict[str, Set[str]]] = None) -> List[str]:
+    """Pliki testowe importujące (pośrednio) zmienione pliki lub same zmienione"""
+    root = Path(root)
+    graph = graph if graph is not None else build_import_graph(root)
+    changed = {c for c in changed if c in graph}
+    affected = reverse_closure(graph, changed) | changed
+    return [t for t in find_test_files(root) if t in affected]
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Nagrywanie i odtwarzanie wywołań LLM (deterministyczne benchmarki potoków).
+
+``LLMRecorder`` dopisuje pary prompt/odpowiedź z czasem wywołania do
+kasety (JSON Lines). ``LLMReplay`` zwraca odpowiedzi z kasety po hashu
+promptu, symulując opóźnienie: stałe opóźnienie pierwszego tokenu
+i tempo generowania (tokeny/s) albo - bez tych ustawień - czasy
+nagrane. Znaczniki czasu w promptach (np. z logów) są normalizowane przed
+hashowaniem, więc generate, repair i self-heal można powtarzać offline.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+LLM_MODES = ['live', 'record', 'replay']
+
+_TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Prompt bez znaczników czasu i końcowych białych znaków linii"""
+    prompt = _TIMESTAMP.sub("<ts>", prompt)
+    return "\n".join(line.rstrip() for line in prompt.splitlines())
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(normalize_prompt(prompt).encode()).hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    """Przybliżona liczba tokenów (~4 znaki na token)"""
+    return (len(text) + 3) // 4
+
+
+class ReplayMiss(LookupError):
+    """Brak nagrania dla promptu"""
+
+
+@dataclass
+class Recording:
+    """Jedno nagrane wywołanie modelu"""
+    hash: str
+    model: str
+    prompt: str
+    response: str
+    seconds: float
+    tokens: int
+    timestamp: str = ""
+
+
+class LLMRecorder:
+    """Dopisuje wywołania LLM do kasety JSON Lines (bezpieczne dla wątków)"""
+
+    def __init__(self, cassette: Path):
+        self.cassette = Path(cassette)
+        self._lock = threading.Lock()
+
+    def record(self, prompt: str, response: str, seconds: float, model: str = "") -> Recording:
+        recording = Recording(hash=prompt_hash(prompt), model=model, prompt=prompt, response=response,
+                              seconds=round(seconds, 4), tokens=estimate_tokens(response),
+                              timestamp=time.strftime("%Y-%m-%dT%H:%M:%S"))
+        with self._lock:
+            self.cassette.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.cassette, "a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(recording), ensure_ascii=False) + "\n")
+        return recording
+
+
+def load_cassette(cassette: Path) -> Dict[str, Recording]:
+    """Hash promptu -> nagranie (późniejsze nagranie tego samego promptu wygrywa)"""
+    recordings: Dict[str, Recording] = {}
+    with open(cassette, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                recording = Recording(**json.loads(line))
+                recordings[recording.hash] = recording
+    return recordings
+
+
+class LLMReplay:
+    """Odpowiedzi z kasety po hashu promptu, z symulowanym opóźnieniem"""
+
+    def __init__(self, cassette: Path, latency: Optional[float] = None,
+                 tokens_per_s: Optional[float] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.cassette = Path(cassette)
+        self.recordings = load_cassette(self.cassette)
+        self.latency = latency
+        self.tokens_per_s = tokens_per_s
+        self.sleep = sleep
+        self.stats = {'hits': 0, 'misses': 0}
+        self._lock = threading.Lock()
+
+    def delay(self, recording: Recording) -> float:
+        """Symulowany czas wywołania; bez ustawień - czas nagrany"""
+        if self.latency is None and not self.tokens_per_s:
+            return recording.seconds
+        delay = self.latency or 0.0
+        if self.tokens_per_s:
+            delay += recording.tokens / self.tokens_per_s
+        return delay
+
+    def complete(self, prompt: str) -> str:
+        key = prompt_hash(prompt)
+        recording = self.recordings.get(key)
+        with self._lock:
+            self.stats['hits' if recording else 'misses'] += 1
+        if recording is None:
+            raise ReplayMiss(f"Brak nagrania dla promptu {key[:12]} w {self.cassette}")
+        delay = self.delay(recording)
+        if delay > 0:
+            self.sleep(delay)
+        return recording.response
+
+
+def create_llm_stand_in(mode: str, cassette: Optional[Path], latency: Optional[float] = None,
+                        tokens_per_s: Optional[float] = None):
+    """(recorder, replay) dla trybu ``live``/``record``/``replay``; błędna konfiguracja - ValueError"""
+    if mode not in LLM_MODES:
+        raise ValueError(f"Nieznany tryb LLM: {mode} (dostępne: {', '.join(LLM_MODES)})")
+    if mode != 'live' and not cassette:
+        raise ValueError(f"Tryb {mode} wymaga ścieżki kasety")
+    if mode == 'replay' and not Path(cassette).is_file():
+        raise ValueError(f"Tryb replay: kaseta {cassette} nie istnieje")
+    if mode == 'record':
+        return LLMRecorder(Path(cassette)), None
+    if mode == 'replay':
+        return None, LLMReplay(Path(cassette), latency, tokens_per_s)
+    return None, None
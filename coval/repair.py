@@ -13,13 +13,29 @@ import time
 import argparse
 import logging
 import math
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
 
+from complexity import debt_from_complexity
+from import_graph import graph_from_imports, import_closure, resolve_frame, reverse_closure
+from llm_replay import LLM_MODES, ReplayMiss, create_llm_stand_in
+from triage_cache import TriageCache, build_clone_index
+from validation import (DEFAULT_ACCEPTANCE_LEVEL, DEFAULT_DEPENDENCY_BUILD_TIMEOUT, DEFAULT_LADDER_TIMEOUTS,
+                        DEFAULT_TIERS, DEFAULT_VENV_TIMEOUT, LADDER_LEVELS, ContainerPool, DependencyImageCache,
+                        VALIDATION_RUNTIMES, TierResult, ValidationCache, VenvCache,
+                        compile_changed, default_parallelism, dependency_hash, detect_stack, is_determinate,
+                        proposal_hash, remove_container, remove_image, tree_hash,
+                        resource_limit_args, run_sandboxed, run_sandboxed_tests, targeted_tests, build_test_ladder, unique_name,
+                        write_tier_report)
+from walker import walk_files
+from workspace import contained_path, link_or_copy, link_tree, write_private
+
 # Konfiguracja logowania
 logging.basicConfig(
     level=logging.INFO,
@@ -164,6 +180,19 @@ class RepairSystem:
         # Załaduj konfigurację
         self.config = self._load_config(config_path)
         self.model_config = self._get_model_config()
+
+        # Nagrywanie/odtwarzanie wywołań LLM z kasety (deterministyczne benchmarki offline)
+        llm_config = self.config.get('global', {}).get('llm', {}) or {}
+        llm_mode = llm_config.get('mode', 'live')
+        if llm_mode not in LLM_MODES:
+            logger.warning(f"⚠️ Nieznany tryb LLM: {llm_mode}, używam 'live'")
+            llm_mode = 'live'
+        try:
+            self.llm_recorder, self.llm_replay = create_llm_stand_in(
+                llm_mode, llm_config.get('cassette'), llm_config.get('latency'), llm_config.get('tokens_per_s'))
+        except ValueError as e:
+            logger.warning(f"⚠️ {e}, używam 'live'")
+            self.llm_recorder, self.llm_replay = None, None
         
         # Sprawdź i pobierz model jeśli potrzeba
         self._ensure_model_available()
@@ -172,6 +201,52 @@ class RepairSystem:
         self.history_file = self.repair_dir / "repair_history.json"
         self.history = self._load_history()
 
+        # Cache metryk per-plik dla kolejnych triage
+        self.triage_cache_dir = self.repair_dir / "triage_cache"
+        self.triage_workers = self.config.get('global', {}).get('triage_workers')
+        self.clone_index_limit = self.config.get('global', {}).get('clone_index_limit')
+        self.walker_threads = self.config.get('global', {}).get('walker_threads', 1)
+
+        # Katalogi walidacji jako hardlinki do MRE, tylko do odczytu (MRE to zawsze kopia źródła)
+        self.hardlink_workspaces = self.config.get('global', {}).get('hardlink_workspaces', True)
+
+        # Walidacja: obrazy bazowe z zależnościami per hash plików zależności
+        self.validation_config = self.config.get('global', {}).get('validation', {}) or {}
+        self.image_cache = None
+        if self.validation_config.get('dependency_image_cache', True):
+            self.image_cache = DependencyImageCache(
+                build_timeout=self.validation_config.get('dependency_build_timeout',
+                                                         DEFAULT_DEPENDENCY_BUILD_TIMEOUT))
+
+        # Tiery walidacji: kompilacja -> test w cache'owanym venv -> Docker
+        self.validation_tiers = self.validation_config.get('tiers', DEFAULT_TIERS)
+        # Runtime drabiny testów: 'local' uruchamia ją w venv zamiast w kontenerze (bez Dockera)
+        self.validation_runtime = self.validation_config.get('runtime', 'docker')
+        if self.validation_runtime not in VALIDATION_RUNTIMES:
+            logger.warning(f"⚠️ Nieznany runtime walidacji: {self.validation_runtime}, używam 'docker'")
+            self.validation_runtime = 'docker'
+        self.venv_cache = VenvCache(self.repair_dir / "venvs",
+                                    timeout=self.validation_config.get('venv_timeout', DEFAULT_VENV_TIMEOUT))
+
+        # Drabina testów w kontenerze: reproduce -> impacted -> full
+        self.acceptance_level = self.validation_config.get('acceptance', DEFAULT_ACCEPTANCE_LEVEL)
+        if self.acceptance_level not in LADDER_LEVELS:
+            logger.warning(f"⚠️ Nieznany poziom akceptacji: {self.acceptance_level}, używam '{DEFAULT_ACCEPTANCE_LEVEL}'")
+            self.acceptance_level = DEFAULT_ACCEPTANCE_LEVEL
+        self.ladder_timeouts = dict(DEFAULT_LADDER_TIMEOUTS, **self.validation_config.get('ladder_timeouts', {}))
+
+        # Cache wyników walidacji (hash MRE + hash propozycji + tiery + zależności)
+        self.validation_cache = None
+        if self.validation_config.get('result_cache', True):
+            self.validation_cache = ValidationCache(self.repair_dir / "validation_cache")
+
+        # Pule ciepłych kontenerów (aktywne w trakcie validate_proposals)
+        self._pools: Optional[Dict[Tuple[str, str], ContainerPool]] = None
+        self._pools_lock = threading.Lock()
+        self._pool_size = 1
+        # Hash MRE liczony raz na validate_proposals (wspólny dla propozycji)
+        self._mre_digest: Optional[str] = None
+
         # Konfiguracja
         self.max_iterations = self.config.get('global', {}).get('max_repair_iterations', 5)
         self.timeout_seconds = self.config.get('global', {}).get('timeout_seconds', 120)
@@ -192,17 +267,20 @@ class RepairSystem:
         # Historyczna skuteczność dla tej kategorii
         historical_success = self._get_historical_success_rate(problem_category)
 
+        # Metryki per-plik (z cache - przeliczane tylko zmienione pliki)
+        file_metrics = self._scan_source(source_dir)
+
         # Zbieranie metryk z dynamiczną zdolnością modelu
         metrics = RepairMetrics(
-            technical_debt=self._calculate_technical_debt(source_dir),
-            test_coverage=self._calculate_test_coverage(source_dir),
-            available_context=self._calculate_available_context(source_dir, error_content),
+            technical_debt=self._calculate_technical_debt(source_dir, file_metrics),
+            test_coverage=self._calculate_test_coverage(source_dir, file_metrics),
+            available_context=self._calculate_available_context(source_dir, error_content, file_metrics),
             model_capability=self._get_model_capability(problem_category),
             historical_success_rate=historical_success
         )
 
         # Liczenie LOC
-        loc = self._count_lines_of_code(source_dir)
+        loc = self._count_lines_of_code(source_dir, file_metrics)
 
         logger.info(f"📊 Metryki:")
         logger.info(f"  - Dług techniczny: {metrics.technical_debt:.2f}")
@@ -252,7 +330,7 @@ docker run mre-{ticket_id} python test_bug.py
 - tests/ - test files
 - Dockerfile - container definition
 """
-        (mre_path / "README.md").write_text(readme_content)
+        write_private(mre_path / "README.md", readme_content)
 
         logger.info(f"✅ MRE utworzone w: {mre_path}")
         return repair_path
@@ -299,10 +377,18 @@ docker run mre-{ticket_id} python test_bug.py
                 if "explanation" in proposal:
                     (fix_dir / "explanation.md").write_text(proposal["explanation"])
 
-                # Zapisz zaktualizowane pliki
+                # Zapisz zaktualizowane pliki (ścieżki spoza katalogu propozycji są odrzucane)
                 if "files" in proposal:
+                    files = {}
                     for filename, content in proposal["files"].items():
-                        (fix_dir / filename).write_text(content)
+                        file_path = contained_path(fix_dir, filename)
+                        if file_path is None:
+                            logger.warning(f"  ⚠️ Odrzucono plik spoza katalogu propozycji: {filename}")
+                            continue
+                        file_path.parent.mkdir(parents=True, exist_ok=True)
+                        file_path.write_text(content)
+                        files[filename] = content
+                    proposal["files"] = files
 
                 proposals.append(proposal)
                 logger.info(f"  ✅ Propozycja {i + 1} wygenerowana")
@@ -311,68 +397,276 @@ docker run mre-{ticket_id} python test_bug.py
 
     def validate_fix(self,
                      repair_path: Path,
-                     proposal: Dict) -> bool:
+                     proposal: Dict,
+                     index: int = 1) -> bool:
         """
-        Waliduje propozycję naprawy
+        Waliduje propozycję naprawy (własny katalog roboczy, obraz i kontener).
+        Docker uruchamiany jest tylko dla propozycji, które przeszły tańsze tiery.
         """
-        logger.info("🧪 Walidacja naprawy...")
+        logger.info(f"🧪 Walidacja naprawy (propozycja {index})...")
 
-        validation_path = repair_path / "validation"
-        validation_path.mkdir(exist_ok=True)
+        workspace = self._validation_workspace(repair_path, index)
+        if workspace.exists():
+            shutil.rmtree(workspace)
+        workspace.mkdir(parents=True)
 
-        # Kopiuj MRE do walidacji
+        # MRE do walidacji - farma hardlinków tylko do odczytu zamiast kopii
         mre_path = repair_path / "mre"
-        test_path = validation_path / "test"
+        test_path = workspace / "test"
+        link_tree(mre_path, test_path, self.hardlink_workspaces, read_only=True)
 
-        if test_path.exists():
-            shutil.rmtree(test_path)
-        shutil.copytree(mre_path, test_path)
-
-        # Zastosuj patch
+        # Zastosuj patch (copy-on-write - MRE pozostaje nietknięte)
         if "files" in proposal:
             for filename, content in proposal["files"].items():
-                file_path = test_path / filename
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-                file_path.write_text(content)
+                target = contained_path(test_path, filename)
+                if target is None:
+                    logger.warning(f"  ⚠️ Odrzucono plik spoza MRE: {filename}")
+                    continue
+                write_private(target, content)
+
+        # Znany wynik dla identycznego MRE, propozycji i konfiguracji tierów
+        cache_key = None
+        if self.validation_cache:
+            cache_key = ValidationCache.key(self._mre_digest or tree_hash(mre_path), proposal_hash(proposal),
+                                            [*self.validation_tiers, f"runtime:{self.validation_runtime}"],
+                                            self.acceptance_level,
+                                            dependency_hash(test_path))
+            entry = self.validation_cache.get(cache_key)
+            if entry is not None:
+                ValidationCache.restore(entry, workspace)
+                logger.info(f"  ♻️ Wynik walidacji z cache (propozycja {index}): "
+                            f"{'sukces' if entry['passed'] else 'porażka'}")
+                return entry['passed']
+
+        tiers: List[TierResult] = []
+        passed = False
+        try:
+            if 'compile' in self.validation_tiers:
+                tiers.append(compile_changed(test_path, proposal.get("files", {})))
+                if tiers[-1].failed:
+                    logger.error(f"  ❌ Błąd kompilacji (propozycja {index}): {tiers[-1].detail}")
+                    return False
+
+            if 'venv' in self.validation_tiers:
+                tiers.append(self._venv_tier(test_path))
+                if tiers[-1].failed:
+                    logger.error(f"  ❌ Test w venv nie przeszedł (propozycja {index})")
+                    return False
+
+            if 'docker' not in self.validation_tiers:
+                passed = any(t.status == "passed" for t in tiers)
+                return passed
+
+            ladder = build_test_ladder(test_path, list(proposal.get("files", {})), self.acceptance_level)
+            if self.validation_runtime == 'local':
+                tiers.extend(self._local_tier(workspace, test_path, index, ladder))
+            else:
+                tiers.extend(self._docker_tier(repair_path, workspace, test_path, index, ladder))
+            prefix = f"{self.validation_runtime}:"
+            passed = not any(t.failed for t in tiers) and any(t.tier.startswith(prefix) for t in tiers)
+            return passed
+        finally:
+            write_tier_report(workspace, tiers)
+            if cache_key and is_determinate(tiers):
+                self.validation_cache.put(cache_key, passed, tiers, workspace)
+
+    def _venv_tier(self, test_path: Path) -> TierResult:
+        """Tier 2: test wskazany przez stacktrace w lokalnym venv"""
+        start = time.perf_counter()
+        targets = targeted_tests(test_path)
+        if not targets:
+            return TierResult("venv", "skipped", time.perf_counter() - start, "brak testu ze stacktrace")
+
+        python = self.venv_cache.ensure(test_path)
+        if python is None:
+            return TierResult("venv", "skipped", time.perf_counter() - start, "venv niedostępny")
+
+        result = run_sandboxed_tests(python, test_path, targets, self.validation_config)
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def _docker_tier(self, repair_path: Path, workspace: Path, test_path: Path, index: int,
+                     ladder: List[Tuple[str, List[str]]]) -> List[TierResult]:
+        """Tier 3: walidacja w kontenerze - szczeble drabiny testów do pierwszej porażki"""
+        # Unikalny tag i nazwa kontenera - walidacje nie nadpisują się nawzajem
+        name = unique_name(repair_path.name, index)
+        built = False
+        results: List[TierResult] = []
+
+        if not ladder:
+            logger.error(f"  ❌ Brak testów do uruchomienia (propozycja {index})")
+            return [TierResult("docker", "failed", 0.0, "brak testów")]
 
         # Uruchom testy w kontenerze
         try:
-            # Build
-            result = subprocess.run(
-                ["docker", "build", "-t", "repair-test", "."],
-                cwd=test_path,
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-
-            if result.returncode != 0:
-                logger.error(f"  ❌ Build failed: {result.stderr}")
-                return False
+            start = time.perf_counter()
+            base_tag = self.image_cache.ensure(test_path) if self.image_cache else None
+            pool = self._container_pool(repair_path, base_tag) if base_tag else None
 
-            # Run tests
-            result = subprocess.run(
-                ["docker", "run", "--rm", "repair-test", "python", "-m", "pytest", "-v"],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+            if pool:
+                # Ciepły kontener: bez budowy obrazu, testy przez docker exec
+                def run_level(level: str, command: List[str]) -> subprocess.CompletedProcess:
+                    return pool.run(test_path, command, self.ladder_timeouts.get(level, 30))
 
-            if result.returncode == 0:
-                logger.info("  ✅ Testy przeszły pomyślnie")
-                (validation_path / "test_output.txt").write_text(result.stdout)
-                return True
+                def after_timeout(level: str):
+                    pass
             else:
-                logger.error(f"  ❌ Testy nie przeszły: {result.stdout}")
-                (validation_path / "test_errors.txt").write_text(result.stderr)
-                return False
+                # Build - na obrazie zależności tylko warstwa źródeł
+                build_command = ["docker", "build", "-t", name, "."]
+                if base_tag:
+                    dockerfile = self.image_cache.write_source_dockerfile(test_path, base_tag)
+                    build_command[-1:-1] = ["-f", dockerfile.name]
+
+                result = subprocess.run(
+                    build_command,
+                    cwd=test_path,
+                    capture_output=True,
+                    text=True,
+                    timeout=60
+                )
+
+                if result.returncode != 0:
+                    logger.error(f"  ❌ Build failed: {result.stderr}")
+                    return [TierResult("docker:build", "failed", time.perf_counter() - start,
+                                       result.stderr[-2000:])]
+                built = True
+                results.append(TierResult("docker:build", "passed", time.perf_counter() - start))
+
+                def run_level(level: str, command: List[str]) -> subprocess.CompletedProcess:
+                    return subprocess.run(
+                        ["docker", "run", "--rm", "--name", f"{name}-{level}",
+                         *resource_limit_args(self.validation_config), name, *command],
+                        capture_output=True,
+                        text=True,
+                        timeout=self.ladder_timeouts.get(level, 30)
+                    )
+
+                def after_timeout(level: str):
+                    remove_container(f"{name}-{level}")
+
+            results.extend(self._run_ladder(ladder, run_level, after_timeout, workspace, index))
+            return results
 
         except subprocess.TimeoutExpired:
-            logger.error("  ❌ Timeout podczas walidacji")
-            return False
+            logger.error(f"  ❌ Timeout podczas walidacji (propozycja {index})")
+            results.append(TierResult("docker:build", "failed", 0.0, "timeout"))
+            return results
         except Exception as e:
             logger.error(f"  ❌ Błąd walidacji: {e}")
-            return False
+            results.append(TierResult("docker", "failed", 0.0, str(e)))
+            return results
+        finally:
+            if built and self.validation_config.get('cleanup_images', True):
+                remove_image(name)
+
+    def _local_tier(self, workspace: Path, test_path: Path, index: int,
+                    ladder: List[Tuple[str, List[str]]]) -> List[TierResult]:
+        """Tier 3 bez Dockera: drabina testów w cache'owanym venv z limitami podprocesu"""
+        if not ladder:
+            logger.error(f"  ❌ Brak testów do uruchomienia (propozycja {index})")
+            return [TierResult("local", "failed", 0.0, "brak testów")]
+
+        python = self.venv_cache.ensure(test_path)
+        if python is None:
+            return [TierResult("local", "failed", 0.0, "venv niedostępny")]
+
+        def run_level(level, command):
+            return run_sandboxed(python, test_path, [*command[1:], "-p", "no:cacheprovider"],
+                                 self.ladder_timeouts.get(level, 30),
+                                 self.validation_config)
+
+        return self._run_ladder(ladder, run_level, lambda level: None, workspace, index, tier="local")
+
+    def _run_ladder(self, ladder: List[Tuple[str, List[str]]], run_level, after_timeout,
+                    workspace: Path, index: int, tier: str = "docker") -> List[TierResult]:
+        """Szczeble testów od odtwarzających błąd do pełnego zestawu (stop na porażce)"""
+        results: List[TierResult] = []
+        output = []
+        for level, targets in ladder:
+            start = time.perf_counter()
+            try:
+                result = run_level(level, ["python", "-m", "pytest", "-x", "-v", *targets])
+            except subprocess.TimeoutExpired:
+                logger.error(f"  ❌ Timeout testów '{level}' (propozycja {index})")
+                after_timeout(level)
+                results.append(TierResult(f"{tier}:{level}", "failed", time.perf_counter() - start, "timeout"))
+                return results
+
+            output.append(result.stdout)
+            if result.returncode != 0:
+                logger.error(f"  ❌ Testy '{level}' nie przeszły (propozycja {index}): {result.stdout}")
+                (workspace / "test_errors.txt").write_text(result.stdout + result.stderr)
+                results.append(TierResult(f"{tier}:{level}", "failed", time.perf_counter() - start,
+                                          f"{len(targets)} plików testowych"))
+                return results
+            results.append(TierResult(f"{tier}:{level}", "passed", time.perf_counter() - start,
+                                      f"{len(targets)} plików testowych"))
+
+        logger.info(f"  ✅ Testy przeszły pomyślnie (propozycja {index}, do poziomu: {ladder[-1][0]})")
+        (workspace / "test_output.txt").write_text("\n".join(output))
+        return results
+
+    def _container_pool(self, repair_path: Path, base_tag: str) -> Optional[ContainerPool]:
+        """Pula ciepłych kontenerów dla MRE i obrazu zależności (tylko w validate_proposals)"""
+        if self._pools is None or not self.validation_config.get('container_pool', True):
+            return None
+        key = (str(repair_path), base_tag)
+        with self._pools_lock:
+            if key not in self._pools:
+                size = self.validation_config.get('pool_size') or self._pool_size
+                self._pools[key] = ContainerPool(base_tag, repair_path / "validation", size,
+                                                 resource_limit_args(self.validation_config))
+            return self._pools[key]
+
+    def validate_proposals(self, repair_path: Path, proposals: List[Dict]) -> Optional[int]:
+        """
+        Waliduje propozycje (równolegle wg global.validation.parallel) i zwraca
+        indeks pierwszej w kolejności zaakceptowanej propozycji
+        """
+        parallel = self.validation_config.get('parallel') or default_parallelism()
+        parallel = max(1, min(int(parallel), len(proposals)))
+
+        self._pools = {}
+        self._pool_size = parallel
+        if self.validation_cache:
+            self._mre_digest = tree_hash(repair_path / "mre")
+        try:
+            return self._validate_all(repair_path, proposals, parallel)
+        finally:
+            self._mre_digest = None
+            pools, self._pools = self._pools, None
+            for pool in pools.values():
+                pool.close()
+
+    def _validate_all(self, repair_path: Path, proposals: List[Dict], parallel: int) -> Optional[int]:
+        if parallel == 1:
+            for i, proposal in enumerate(proposals):
+                logger.info(f"🔍 Testowanie propozycji {i + 1}/{len(proposals)}...")
+                if self.validate_fix(repair_path, proposal, i + 1):
+                    return i
+            return None
+
+        logger.info(f"🔍 Testowanie {len(proposals)} propozycji ({parallel} równolegle)...")
+        with ThreadPoolExecutor(max_workers=parallel) as executor:
+            # Identyczne propozycje walidowane są raz
+            by_hash: Dict[str, Any] = {}
+            futures = []
+            for i, proposal in enumerate(proposals):
+                digest = proposal_hash(proposal)
+                if digest not in by_hash:
+                    by_hash[digest] = executor.submit(self.validate_fix, repair_path, proposal, i + 1)
+                futures.append(by_hash[digest])
+            # Pierwszeństwo ma wcześniejsza propozycja - jak przy walidacji sekwencyjnej
+            for i, future in enumerate(futures):
+                if future.result():
+                    for pending in futures[i + 1:]:
+                        pending.cancel()
+                    return i
+        return None
+
+    def _validation_workspace(self, repair_path: Path, index: int) -> Path:
+        """Katalog roboczy walidacji jednej propozycji"""
+        return repair_path / "validation" / f"proposal-{index}"
 
     def repair(self,
                error_file: Path,
@@ -468,13 +762,10 @@ docker run mre-{ticket_id} python test_bug.py
 
         # 5. WALIDACJA
         best_proposal = None
-        for i, proposal in enumerate(proposals):
-            logger.info(f"🔍 Testowanie propozycji {i + 1}/{len(proposals)}...")
-
-            if self.validate_fix(repair_path, proposal):
-                best_proposal = proposal
-                logger.info(f"✅ Propozycja {i + 1} zaakceptowana!")
-                break
+        best_index = self.validate_proposals(repair_path, proposals)
+        if best_index is not None:
+            best_proposal = proposals[best_index]
+            logger.info(f"✅ Propozycja {best_index + 1} zaakceptowana!")
 
         # 6. INTEGRACJA
         if best_proposal:
@@ -517,7 +808,7 @@ docker run mre-{ticket_id} python test_bug.py
             return RepairResult(
                 success=True,
                 patch_path=final_patch_path,
-                test_path=repair_path / "validation/test",
+                test_path=self._validation_workspace(repair_path, best_index + 1) / "test",
                 validation_passed=True,
                 iterations_needed=len(proposals),
                 decision="repair",
@@ -562,41 +853,53 @@ Consider manual intervention or rebuilding the component.
     # FUNKCJE POMOCNICZE
     # ============================================
 
-    def _calculate_technical_debt(self, source_dir: Path) -> float:
+    def _scan_source(self, source_dir: Path) -> Dict[str, Dict[str, Any]]:
+        """Zwraca metryki per-plik z cache triage (przelicza tylko zmienione pliki)"""
+        cache = TriageCache(self.triage_cache_dir, source_dir,
+                            workers=self.triage_workers, walker_threads=self.walker_threads,
+                            workspace_root=self.repair_dir.parent)
+        file_metrics = cache.scan()
+        stats = cache.stats
+        logger.info(f"🗃️  Cache triage: {stats['hits'] + stats['rehashed']} z cache, "
+                    f"{stats['computed']} przeliczonych, {stats['removed']} usuniętych")
+        return file_metrics
+
+    def _calculate_technical_debt(self, source_dir: Path,
+                                  file_metrics: Optional[Dict[str, Dict[str, Any]]] = None) -> float:
         """Oblicza dług techniczny na podstawie różnych metryk"""
+        if file_metrics is None:
+            file_metrics = self._scan_source(source_dir)
+
+        py_metrics = [m for path, m in file_metrics.items() if path.endswith('.py')]
         debt = 0.0
 
-        # Złożoność cyklomatyczna (przybliżona)
-        for py_file in source_dir.rglob("*.py"):
-            content = py_file.read_text()
-            # Liczba if/for/while/try jako proxy dla złożoności
-            complexity_keywords = ['if ', 'for ', 'while ', 'try:', 'except:', 'elif ']
-            for keyword in complexity_keywords:
-                debt += content.count(keyword) * 0.5
-
-        # Duplikacja kodu (bardzo uproszczona)
-        all_lines = []
-        for py_file in source_dir.rglob("*.py"):
-            all_lines.extend(py_file.read_text().splitlines())
-
-        unique_lines = set(all_lines)
-        if all_lines:
-            duplication_ratio = 1 - (len(unique_lines) / len(all_lines))
+        # Złożoność cyklomatyczna i kognitywna (AST)
+        for metrics in py_metrics:
+            debt += debt_from_complexity(metrics['complexity'])
+
+        # Duplikacja kodu (klony wieloliniowe między plikami, winnowing)
+        clone_index = build_clone_index(file_metrics, self.clone_index_limit)
+        duplication_ratio = clone_index.duplication_ratio()
+        if duplication_ratio is not None:
             debt += duplication_ratio * 20
+            logger.debug(f"Duplikacja: {duplication_ratio:.2%}, przykładowe klony: {clone_index.clones[:5]}")
 
         # Brak dokumentacji
-        for py_file in source_dir.rglob("*.py"):
-            content = py_file.read_text()
-            if '"""' not in content and "'''" not in content:
+        for metrics in py_metrics:
+            if not metrics['has_docstring']:
                 debt += 2
 
         return min(debt, 100)  # Cap at 100
 
-    def _calculate_test_coverage(self, source_dir: Path) -> float:
+    def _calculate_test_coverage(self, source_dir: Path,
+                                 file_metrics: Optional[Dict[str, Dict[str, Any]]] = None) -> float:
         """Szacuje pokrycie testami"""
-        test_files = list(source_dir.rglob("test_*.py")) + list(source_dir.rglob("*_test.py"))
-        source_files = [f for f in source_dir.rglob("*.py")
-                        if not f.name.startswith("test_") and not f.name.endswith("_test.py")]
+        if file_metrics is None:
+            file_metrics = self._scan_source(source_dir)
+
+        py_metrics = [m for path, m in file_metrics.items() if path.endswith('.py')]
+        test_files = [m for m in py_metrics if m['is_test']]
+        source_files = [m for m in py_metrics if not m['is_test']]
 
         if not source_files:
             return 0.0
@@ -605,15 +908,18 @@ Consider manual intervention or rebuilding the component.
         coverage = min(len(test_files) / len(source_files), 1.0)
 
         # Bonus za pytest/unittest
-        for test_file in test_files:
-            content = test_file.read_text()
-            if "def test_" in content or "class Test" in content:
+        for metrics in test_files:
+            if metrics['has_test_defs']:
                 coverage = min(coverage + 0.1, 1.0)
 
         return coverage
 
-    def _calculate_available_context(self, source_dir: Path, error_content: str) -> float:
+    def _calculate_available_context(self, source_dir: Path, error_content: str,
+                                     file_metrics: Optional[Dict[str, Dict[str, Any]]] = None) -> float:
         """Oblicza dostępny kontekst"""
+        if file_metrics is None:
+            file_metrics = self._scan_source(source_dir)
+
         context_score = 0.0
 
         # Czy mamy stacktrace?
@@ -621,7 +927,7 @@ Consider manual intervention or rebuilding the component.
             context_score += 0.3
 
         # Czy mamy testy?
-        if list(source_dir.rglob("test_*.py")):
+        if any(Path(path).name.startswith("test_") and path.endswith(".py") for path in file_metrics):
             context_score += 0.2
 
         # Czy mamy requirements/dependencies?
@@ -675,16 +981,12 @@ Consider manual intervention or rebuilding the component.
         max_cap = calc_config.get('max_capability', 0.95)
         return min(final_capability, max_cap)
 
-    def _count_lines_of_code(self, source_dir: Path) -> int:
+    def _count_lines_of_code(self, source_dir: Path,
+                             file_metrics: Optional[Dict[str, Dict[str, Any]]] = None) -> int:
         """Liczy linie kodu"""
-        loc = 0
-        for file_path in source_dir.rglob("*"):
-            if file_path.is_file() and file_path.suffix in ['.py', '.js', '.java', '.cpp', '.c', '.go']:
-                try:
-                    loc += len(file_path.read_text().splitlines())
-                except:
-                    pass
-        return loc
+        if file_metrics is None:
+            file_metrics = self._scan_source(source_dir)
+        return sum(metrics['loc'] for metrics in file_metrics.values())
 
     def _load_config(self, config_path: str) -> Dict:
         """Ładuje konfigurację z pliku YAML"""
@@ -742,6 +1044,9 @@ Consider manual intervention or rebuilding the component.
     def _ensure_model_available(self) -> bool:
         """Sprawdza dostępność modelu i pobiera go jeśli potrzeba"""
         model_name = self.model.value
+        if self.llm_replay:
+            logger.info(f"📼 Odtwarzanie odpowiedzi LLM z kasety: {self.llm_replay.cassette}")
+            return True
         logger.info(f"🔍 Sprawdzam dostępność modelu: {model_name}")
         
         try:
@@ -881,71 +1186,77 @@ Consider manual intervention or rebuilding the component.
         logger.info(f"📊 Zapisano wynik naprawy: {category} - {'sukces' if result.success else 'porażka'}")
 
     def _copy_relevant_files(self, source_dir: Path, mre_path: Path, error_file: Path):
-        """Kopiuje tylko istotne pliki do MRE"""
+        """
+        Kopiuje tylko istotne pliki do MRE: domknięcie importów plików ze
+        stacktrace oraz testy, które do tego domknięcia sięgają (ścieżki
+        zachowane - bez kolizji nazw)
+        """
         # Parsuj błąd aby znaleźć powiązane pliki
         error_content = error_file.read_text() if error_file.exists() else ""
         mentioned_files = re.findall(r'File "([^"]+)"', error_content)
 
-        # Kopiuj wymienione pliki
+        # Graf importów z cache triage (importy per-plik przeliczane tylko dla zmienionych plików)
+        file_metrics = self._scan_source(source_dir)
+        graph = graph_from_imports({rel: m['imports'] for rel, m in file_metrics.items() if 'imports' in m})
+        tests = {rel for rel, m in file_metrics.items() if m.get('is_test')}
+
+        frames = set()
         for file_path in mentioned_files:
-            source_file = source_dir / file_path
-            if source_file.exists():
-                dest_file = mre_path / "src" / file_path
-                dest_file.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(source_file, dest_file)
+            rel_path = resolve_frame(file_path, graph)
+            if rel_path:
+                frames.add(rel_path)
+            elif not Path(file_path).is_absolute():
+                # Pliki spoza grafu (np. JS) - tylko z wnętrza source_dir (bez ścieżek typu ../..)
+                target = contained_path(source_dir, file_path)
+                if target is not None and target.is_file():
+                    self._copy_into_mre(source_dir, target.relative_to(source_dir.resolve()).as_posix(),
+                                        mre_path / "src")
+
+        closure = import_closure(graph, frames)
+        if frames:
+            selected_tests = (reverse_closure(graph, closure) | closure) & tests
+        else:
+            # Brak ramek w kodzie projektu - wszystkie testy
+            selected_tests = tests
+
+        for rel_path in sorted(closure - tests):
+            self._copy_into_mre(source_dir, rel_path, mre_path / "src")
 
-        # Kopiuj testy
         test_dir = mre_path / "tests"
         test_dir.mkdir(exist_ok=True)
+        for rel_path in sorted(selected_tests):
+            self._copy_into_mre(source_dir, rel_path, test_dir)
 
-        for test_file in source_dir.rglob("test_*.py"):
-            shutil.copy2(test_file, test_dir / test_file.name)
+        logger.info(f"  ✂️ MRE: {len(closure - tests)} plików źródłowych, {len(selected_tests)} testów "
+                    f"(z {len(graph)} plików Pythona)")
 
         # Kopiuj requirements
         for req_file in ["requirements.txt", "package.json", "go.mod", "Cargo.toml"]:
             if (source_dir / req_file).exists():
-                shutil.copy2(source_dir / req_file, mre_path / req_file)
+                link_or_copy(source_dir / req_file, mre_path / req_file, hardlink=False)
 
         # Kopiuj błąd
-        shutil.copy2(error_file, mre_path / "stacktrace.txt")
+        link_or_copy(error_file, mre_path / "stacktrace.txt", hardlink=False)
+
+    def _copy_into_mre(self, source_dir: Path, rel_path: str, dest_root: Path):
+        """
+        Kopiuje plik do MRE (ścieżka zachowana) razem z __init__.py pakietów nadrzędnych.
+        Zawsze kopia, nie hardlink - MRE nie może dzielić i-węzłów z repozytorium użytkownika.
+        """
+        for parent in reversed(list(Path(rel_path).parents)[:-1]):
+            init_file = source_dir / parent / "__init__.py"
+            target = dest_root / parent / "__init__.py"
+            if init_file.exists() and not target.exists():
+                link_or_copy(init_file, target, hardlink=False)
+
+        link_or_copy(source_dir / rel_path, dest_root / rel_path, hardlink=False)
 
     def _create_mre_dockerfile(self, mre_path: Path):
         """Tworzy Dockerfile dla MRE"""
         # Wykryj język/framework
-        if (mre_path / "requirements.txt").exists():
-            dockerfile = """FROM python:3.11-slim
-WORKDIR /app
-COPY requirements.txt .
-RUN pip install -r requirements.txt
-COPY . .
-CMD ["python", "-m", "pytest", "-v"]
-"""
-        elif (mre_path / "package.json").exists():
-            dockerfile = """FROM node:20-alpine
-WORKDIR /app
-COPY package*.json ./
-RUN npm install
-COPY . .
-CMD ["npm", "test"]
-"""
-        elif (mre_path / "go.mod").exists():
-            dockerfile = """FROM golang:1.21-alpine
-WORKDIR /app
-COPY go.mod go.sum ./
-RUN go mod download
-COPY . .
-CMD ["go", "test", "./..."]
-"""
-        else:
-            # Fallback Python
-            dockerfile = """FROM python:3.11-slim
-WORKDIR /app
-RUN pip install pytest
-COPY . .
-CMD ["python", "-m", "pytest", "-v"]
-"""
+        dockerfile = detect_stack(mre_path).dockerfile()
 
-        (mre_path / "Dockerfile").write_text(dockerfile)
+        write_private(mre_path / "Dockerfile", dockerfile)
 
     def _prepare_context(self, mre_path: Path) -> Dict:
         """Przygotowuje kontekst dla LLM"""
@@ -964,21 +1275,20 @@ CMD ["python", "-m", "pytest", "-v"]
         # Pliki źródłowe
         src_dir = mre_path / "src"
         if src_dir.exists():
-            for file_path in src_dir.rglob("*.py"):
+            for file_path in sorted(walk_files(src_dir, suffixes={'.py'})):
                 rel_path = file_path.relative_to(src_dir)
                 context["source_files"][str(rel_path)] = file_path.read_text()
 
         # Testy
         test_dir = mre_path / "tests"
         if test_dir.exists():
-            for file_path in test_dir.rglob("*.py"):
+            for file_path in sorted(walk_files(test_dir, suffixes={'.py'})):
                 rel_path = file_path.relative_to(test_dir)
                 context["test_files"][str(rel_path)] = file_path.read_text()
 
-        # Struktura
-        for item in mre_path.rglob("*"):
-            if item.is_file():
-                context["structure"].append(str(item.relative_to(mre_path)))
+        # Struktura (bez __pycache__, .venv itp.)
+        for item in sorted(walk_files(mre_path, max_file_size=None, skip_binary=False)):
+            context["structure"].append(str(item.relative_to(mre_path)))
 
         return context
 
@@ -1085,16 +1395,22 @@ Return ONLY valid JSON."""
             if save_path:
                 save_path.write_text(prompt)
 
-            # Wywołaj Ollama
-            result = subprocess.run(
-                ["ollama", "run", self.model.value],
-                input=prompt,
-                capture_output=True,
-                text=True,
-                timeout=self.timeout_seconds
-            )
-
-            response = result.stdout
+            if self.llm_replay:
+                response = self.llm_replay.complete(prompt)
+            else:
+                # Wywołaj Ollama
+                start = time.perf_counter()
+                result = subprocess.run(
+                    ["ollama", "run", self.model.value],
+                    input=prompt,
+                    capture_output=True,
+                    text=True,
+                    timeout=self.timeout_seconds
+                )
+
+                response = result.stdout
+                if self.llm_recorder and result.returncode == 0:
+                    self.llm_recorder.record(prompt, response, time.perf_counter() - start, self.model.value)
 
             # Zapisz odpowiedź
             if save_path:
@@ -1103,6 +1419,9 @@ Return ONLY valid JSON."""
 
             return response
 
+        except ReplayMiss:
+            # Odtwarzanie ma być deterministyczne - brak nagrania przerywa naprawę zamiast pustej propozycji
+            raise
         except subprocess.TimeoutExpired:
             logger.error("  ⌛ Timeout podczas wywołania LLM")
             return "{}"
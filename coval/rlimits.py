@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Limity zasobów podprocesu bez ``preexec_fn``.
+
+``preexec_fn`` wykonuje kod Pythona między fork a exec, co przy działających
+wątkach (równoległa walidacja, pula narzędzi analizy) może zakleszczyć
+dziecko. Zamiast tego polecenie uruchamiane jest przez krótki wrapper
+(``python -c``), który ustawia limity ``setrlimit`` i podmienia się na
+właściwy program przez ``os.execv`` - limity dziedziczy już sam program.
+"""
+
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+
+_WRAPPER = (
+    "import os, resource, sys\n"
+    "memory, cpu = int(sys.argv[1]), int(sys.argv[2])\n"
+    "if memory:\n"
+    "    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))\n"
+    "if cpu:\n"
+    "    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))\n"
+    "os.execv(sys.argv[3], sys.argv[3:])\n"
+)
+
+
+def limited_command(command: Sequence[Union[str, Path]], memory_mb: Optional[int] = None,
+                    cpu_seconds: Optional[int] = None) -> List[str]:
+    """Polecenie z limitem pamięci (RLIMIT_AS) i czasu CPU; bez limitów lub poza POSIX - bez zmian.
+
+    Pierwszy element ``command`` musi być ścieżką do programu (``os.execv`` nie przeszukuje PATH).
+    """
+    command = [str(part) for part in command]
+    if os.name != 'posix' or not (memory_mb or cpu_seconds):
+        return command
+    memory = int(memory_mb) * 1024 * 1024 if memory_mb else 0
+    return [sys.executable, "-c", _WRAPPER, str(memory), str(int(cpu_seconds or 0)), *command]
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Trwały, inkrementalny cache metryk triage.
+
+Metryki per-plik (złożoność, dokumentacja, testy, LOC) są zapisywane w
+``repairs/triage_cache/`` i kluczowane ścieżką, rozmiarem, mtime oraz hashem
+zawartości. Kolejne triage tego samego ``source_dir`` przeliczają tylko
+zmienione pliki (w puli procesów dla dużych drzew), a resztę agregują z cache.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from clones import FINGERPRINT_SAMPLE, CloneIndex, fingerprint_source
+from complexity import analyze_python_source, parallel_map
+from import_graph import imported_modules
+from walker import FileWalker
+
+logger = logging.getLogger(__name__)
+
+# Zmiana wersji unieważnia wszystkie wpisy (np. po zmianie algorytmu metryk)
+CACHE_VERSION = 5
+
+# Rozszerzenia liczone do LOC
+CODE_SUFFIXES = {'.py', '.js', '.java', '.cpp', '.c', '.go'}
+
+
+def compute_file_metrics(rel_path: str, data: bytes) -> Dict[str, Any]:
+    """Oblicza metryki pojedynczego pliku na podstawie jego zawartości"""
+    content = data.decode('utf-8', errors='replace')
+    lines = content.splitlines()
+    name = Path(rel_path).name
+
+    metrics: Dict[str, Any] = {'loc': len(lines)}
+
+    if rel_path.endswith('.py'):
+        metrics['complexity'] = analyze_python_source(content, rel_path)
+        metrics['has_docstring'] = '"""' in content or "'''" in content
+        metrics['is_test'] = name.startswith('test_') or name.endswith('_test.py')
+        metrics['has_test_defs'] = "def test_" in content or "class Test" in content
+        # Odciski palców (winnowing, próbka) do wykrywania klonów między plikami
+        metrics['fingerprints'] = fingerprint_source(content, sample=FINGERPRINT_SAMPLE)
+        # Importy do grafu (wycinanie MRE)
+        metrics['imports'] = sorted(imported_modules(content, rel_path))
+
+    return metrics
+
+
+def _compute_entry(item: Tuple[str, str, Optional[str]]) -> Optional[Dict[str, Any]]:
+    """Czyta plik i liczy metryki (None w metrics gdy hash się nie zmienił)"""
+    rel_path, file_path, known_sha1 = item
+    try:
+        path = Path(file_path)
+        stat = path.stat()
+        data = path.read_bytes()
+    except OSError as e:
+        logger.debug(f"Pominięto plik {rel_path}: {e}")
+        return None
+
+    digest = hashlib.sha1(data).hexdigest()
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha1': digest,
+        'metrics': None if digest == known_sha1 else compute_file_metrics(rel_path, data)
+    }
+
+
+class TriageCache:
+    """Cache metryk per-plik dla jednego katalogu źródłowego"""
+
+    def __init__(self, cache_dir: Path, source_dir: Path,
+                 workers: Optional[int] = None, walker_threads: int = 1,
+                 workspace_root: Optional[Path] = None):
+        self.source_dir = Path(source_dir)
+        self.cache_dir = Path(cache_dir)
+        self.workers = workers
+        self.walker_threads = walker_threads
+        # Katalog roboczy narzędzia (repairs/ itd.), jeśli leży w drzewie źródeł
+        self.workspace_root = workspace_root
+
+        # Osobny plik cache dla każdego katalogu źródłowego
+        key = hashlib.sha1(str(self.source_dir.resolve()).encode('utf-8')).hexdigest()[:16]
+        self.cache_file = self.cache_dir / f"{key}.json"
+
+        self.entries: Dict[str, Dict[str, Any]] = self._load()
+        self.stats = {'hits': 0, 'rehashed': 0, 'computed': 0, 'removed': 0}
+        self._dirty = False
+
+    def scan(self) -> Dict[str, Dict[str, Any]]:
+        """Zwraca metryki wszystkich plików kodu, przeliczając tylko zmienione"""
+        self.stats = {'hits': 0, 'rehashed': 0, 'computed': 0, 'removed': 0}
+        current: Dict[str, Dict[str, Any]] = {}
+        pending = []
+
+        walker = FileWalker(self.source_dir, suffixes=CODE_SUFFIXES, threads=self.walker_threads,
+                            workspace_root=self.workspace_root)
+        for file_path, stat in walker.entries():
+            rel_path = file_path.relative_to(self.source_dir).as_posix()
+            entry = self.entries.get(rel_path)
+
+            # Szybka ścieżka: rozmiar i mtime bez zmian - bez czytania pliku
+            if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                self.stats['hits'] += 1
+                current[rel_path] = entry
+                continue
+
+            pending.append((rel_path, str(file_path), entry['sha1'] if entry else None))
+
+        # Zmienione pliki - hash i metryki (równolegle dla dużej liczby plików)
+        for item, result in zip(pending, parallel_map(_compute_entry, pending, self.workers)):
+            if result is None:
+                continue
+            rel_path = item[0]
+            if result['metrics'] is None:
+                # Zmienił się tylko mtime (np. checkout) - zawartość ta sama
+                result['metrics'] = self.entries[rel_path]['metrics']
+                self.stats['rehashed'] += 1
+            else:
+                self.stats['computed'] += 1
+            current[rel_path] = result
+            self._dirty = True
+
+        removed = len(set(self.entries) - set(current))
+        if removed:
+            self.stats['removed'] = removed
+            self._dirty = True
+        self.entries = current
+
+        if self._dirty:
+            self.save()
+
+        logger.debug(f"Triage cache: {self.stats}")
+        return {rel_path: entry['metrics'] for rel_path, entry in current.items()}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Ładuje cache z dysku (pusty przy braku lub niezgodnej wersji)"""
+        if not self.cache_file.exists():
+            return {}
+
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Nie można wczytać cache triage: {e}")
+            return {}
+
+        if data.get('version') != CACHE_VERSION:
+            return {}
+        return data.get('files', {})
+
+    def save(self):
+        """Zapisuje cache atomowo (plik tymczasowy + rename)"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': CACHE_VERSION,
+                    'source_dir': str(self.source_dir.resolve()),
+                    'files': self.entries
+                }, f)
+            os.replace(tmp_file, self.cache_file)
+            self._dirty = False
+        except Exception as e:
+            logger.error(f"❌ Błąd zapisu cache triage: {e}")
+
+    def clear(self):
+        """Usuwa cache dla katalogu źródłowego"""
+        self.entries = {}
+        if self.cache_file.exists():
+            self.cache_file.unlink()
+
+
+def build_clone_index(file_metrics: Dict[str, Dict[str, Any]],
+                      max_entries: Optional[int] = None) -> CloneIndex:
+    """Buduje indeks klonów z utrwalonych odcisków plików Pythona"""
+    index = CloneIndex(max_entries) if max_entries else CloneIndex()
+    for rel_path in sorted(file_metrics):
+        fingerprints = file_metrics[rel_path].get('fingerprints')
+        if fingerprints:
+            index.add(rel_path, fingerprints)
+    return index
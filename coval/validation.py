@@ -0,0 +1,607 @@
+#!/usr/bin/env python3
+"""
+Walidacja propozycji naprawy w Dockerze.
+
+Zależności MRE (``requirements.txt``, ``package.json``, ``go.mod``...) są
+instalowane raz w obrazie bazowym kluczowanym hashem plików zależności.
+Obraz propozycji dokłada na nim tylko warstwę ze źródłami, więc kolejne
+propozycje (i kolejne naprawy z tymi samymi zależnościami) nie instalują
+pakietów ponownie.
+
+Każda walidacja ma własny katalog roboczy, tag obrazu i nazwę kontenera,
+dzięki czemu propozycje (i równoległe naprawy) można walidować współbieżnie
+z limitami zasobów; tymczasowe obrazy są usuwane po teście.
+
+Przed Dockerem działają tańsze tiery: kompilacja zmienionych plików oraz
+test wskazany przez stacktrace w lokalnym, cache'owanym virtualenv
+(podproces z limitami zasobów). Wyniki i czasy tierów trafiają do
+``tiers.json`` w katalogu walidacji.
+
+Testy w kontenerze uruchamiane są drabiną: najpierw testy odtwarzające
+stacktrace, potem testy importujące zmienione pliki (statyczny graf
+importów), na końcu reszta zestawu - z przerwaniem na pierwszej porażce.
+Przy dostępnym obrazie zależności testy wykonuje pula ciepłych kontenerów
+(``docker exec``) zamiast budowy obrazu i startu kontenera per propozycja.
+
+Wyniki walidacji są cache'owane po hashu MRE, hashu plików propozycji,
+konfiguracji tierów i hashu zależności - powtórzona naprawa albo identyczne
+propozycje dostają wynik (z logami) bez ponownego budowania i testowania.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from import_graph import build_import_graph, find_test_files, impacted_tests, resolve_frame
+from rlimits import limited_command
+from walker import walk_files
+from workspace import write_private
+
+logger = logging.getLogger(__name__)
+
+# Limit czasu budowy obrazu bazowego (instalacja zależności)
+DEFAULT_DEPENDENCY_BUILD_TIMEOUT = 600
+
+# Domyślne limity zasobów kontenera walidacji (nadpisywane w global.validation)
+DEFAULT_RESOURCE_LIMITS = {'cpus': 1.0, 'memory': '2g', 'pids_limit': 512}
+
+# Kolejność tierów walidacji (od najtańszego)
+DEFAULT_TIERS = ['compile', 'venv', 'docker']
+
+# Środowisko ostatniego tieru (drabiny testów): kontener lub lokalny venv
+VALIDATION_RUNTIMES = ['docker', 'local']
+
+# Limity czasu: tworzenie virtualenv (z instalacją zależności) i test w venv
+DEFAULT_VENV_TIMEOUT = 600
+DEFAULT_VENV_TEST_TIMEOUT = 30
+
+# Szczeble drabiny testów i ich domyślne limity czasu (s)
+LADDER_LEVELS = ['reproduce', 'impacted', 'full']
+DEFAULT_LADDER_TIMEOUTS = {'reproduce': 30, 'impacted': 60, 'full': 300}
+
+# Szczebel, do którego propozycja musi przejść, aby została zaakceptowana
+DEFAULT_ACCEPTANCE_LEVEL = 'full'
+
+# Limity podprocesu testu w venv: pamięć (MB) i czas CPU (s)
+DEFAULT_SANDBOX_MEMORY_MB = 2048
+DEFAULT_SANDBOX_CPU_SECONDS = 60
+
+
+@dataclass
+class DockerStack:
+    """Stos technologiczny MRE: obraz bazowy, pliki zależności i komenda testów"""
+    name: str
+    marker: Optional[str]
+    base_image: str
+    dependency_lines: List[str]
+    command: List[str]
+    dependency_files: List[str] = field(default_factory=list)
+
+    def _header(self, image: str) -> str:
+        return f"FROM {image}\nWORKDIR /app\n"
+
+    def _source_layer(self) -> str:
+        args = ", ".join(f'"{part}"' for part in self.command)
+        return f"COPY . .\nCMD [{args}]\n"
+
+    def dockerfile(self) -> str:
+        """Samodzielny Dockerfile MRE (zależności + źródła)"""
+        return self._header(self.base_image) + "".join(f"{line}\n" for line in self.dependency_lines) \
+            + self._source_layer()
+
+    def dependency_dockerfile(self) -> str:
+        """Dockerfile obrazu bazowego - tylko zależności"""
+        return self._header(self.base_image) + "".join(f"{line}\n" for line in self.dependency_lines)
+
+    def source_dockerfile(self, base_tag: str) -> str:
+        """Dockerfile propozycji - warstwa źródeł na obrazie bazowym"""
+        return self._header(base_tag) + self._source_layer()
+
+
+STACKS = [
+    DockerStack("python", "requirements.txt", "python:3.11-slim",
+                ["COPY requirements.txt .", "RUN pip install -r requirements.txt"],
+                ["python", "-m", "pytest", "-v"], ["requirements.txt"]),
+    DockerStack("node", "package.json", "node:20-alpine",
+                ["COPY package*.json ./", "RUN npm install"],
+                ["npm", "test"], ["package.json", "package-lock.json"]),
+    DockerStack("go", "go.mod", "golang:1.21-alpine",
+                ["COPY go.mod go.sum ./", "RUN go mod download"],
+                ["go", "test", "./..."], ["go.mod", "go.sum"]),
+]
+
+# Fallback gdy brak znanych plików zależności
+FALLBACK_STACK = DockerStack("python", None, "python:3.11-slim",
+                             ["RUN pip install pytest"], ["python", "-m", "pytest", "-v"])
+
+
+def detect_stack(path: Path) -> DockerStack:
+    """Rozpoznaje stos po plikach zależności w katalogu"""
+    for stack in STACKS:
+        if (path / stack.marker).exists():
+            return stack
+    return FALLBACK_STACK
+
+
+def dependency_hash(path: Path, stack: Optional[DockerStack] = None) -> str:
+    """Hash definicji obrazu bazowego i zawartości plików zależności"""
+    stack = stack or detect_stack(path)
+    digest = hashlib.sha1(stack.dependency_dockerfile().encode('utf-8'))
+    for name in stack.dependency_files:
+        file_path = path / name
+        digest.update(f"\0{name}\0".encode('utf-8'))
+        if file_path.exists():
+            digest.update(file_path.read_bytes())
+    return digest.hexdigest()
+
+
+class DependencyImageCache:
+    """Obrazy bazowe z zainstalowanymi zależnościami, budowane raz per hash"""
+
+    def __init__(self, prefix: str = "coval-deps",
+                 build_timeout: int = DEFAULT_DEPENDENCY_BUILD_TIMEOUT):
+        self.prefix = prefix
+        self.build_timeout = build_timeout
+        self._known: Set[str] = set()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'builds': 0, 'failures': 0}
+
+    def image_tag(self, path: Path, stack: Optional[DockerStack] = None) -> str:
+        stack = stack or detect_stack(path)
+        return f"{self.prefix}-{stack.name}:{dependency_hash(path, stack)[:16]}"
+
+    def _image_exists(self, tag: str) -> bool:
+        result = subprocess.run(["docker", "image", "inspect", tag],
+                                capture_output=True, text=True, timeout=30)
+        return result.returncode == 0
+
+    def ensure(self, path: Path) -> Optional[str]:
+        """Zwraca tag obrazu bazowego dla katalogu (buduje go przy braku)"""
+        # Równoległe walidacje nie budują tego samego obrazu dwa razy
+        with self._lock:
+            return self._ensure(path)
+
+    def _ensure(self, path: Path) -> Optional[str]:
+        stack = detect_stack(path)
+        tag = self.image_tag(path, stack)
+
+        try:
+            if tag in self._known or self._image_exists(tag):
+                self._known.add(tag)
+                self.stats['hits'] += 1
+                logger.info(f"  ♻️ Obraz zależności z cache: {tag}")
+                return tag
+
+            # Kontekst budowy zawiera wyłącznie pliki zależności
+            with tempfile.TemporaryDirectory(prefix="coval-deps-") as context:
+                context_path = Path(context)
+                for name in stack.dependency_files:
+                    if (path / name).exists():
+                        shutil.copy2(path / name, context_path / name)
+                (context_path / "Dockerfile").write_text(stack.dependency_dockerfile())
+
+                logger.info(f"  📦 Budowanie obrazu zależności: {tag}")
+                result = subprocess.run(["docker", "build", "-t", tag, "."], cwd=context_path,
+                                        capture_output=True, text=True, timeout=self.build_timeout)
+
+            if result.returncode != 0:
+                self.stats['failures'] += 1
+                logger.error(f"  ❌ Budowa obrazu zależności nie powiodła się: {result.stderr}")
+                return None
+
+            self._known.add(tag)
+            self.stats['builds'] += 1
+            return tag
+
+        except subprocess.TimeoutExpired:
+            self.stats['failures'] += 1
+            logger.error(f"  ⌛ Timeout budowy obrazu zależności: {tag}")
+            return None
+        except Exception as e:
+            self.stats['failures'] += 1
+            logger.error(f"  ❌ Błąd obrazu zależności: {e}")
+            return None
+
+    def write_source_dockerfile(self, path: Path, base_tag: str,
+                                filename: str = "Dockerfile.validate") -> Path:
+        """Zapisuje Dockerfile propozycji (warstwa źródeł) w katalogu roboczym"""
+        dockerfile = path / filename
+        write_private(dockerfile, detect_stack(path).source_dockerfile(base_tag))
+        return dockerfile
+
+
+# ============================================
+# IZOLACJA WALIDACJI
+# ============================================
+
+def default_parallelism() -> int:
+    """Domyślna liczba równoległych walidacji"""
+    return max(1, min(3, os.cpu_count() or 1))
+
+
+def unique_name(repair_name: str, index: int, prefix: str = "repair-test") -> str:
+    """Unikalna nazwa obrazu/kontenera walidacji (małe litery, bez znaków spoza [a-z0-9_.-])"""
+    slug = re.sub(r'[^a-z0-9_.-]+', '-', repair_name.lower()).strip('-.') or "mre"
+    return f"{prefix}-{slug}-{index}-{uuid.uuid4().hex[:8]}"
+
+
+def resource_limit_args(config: Optional[Dict[str, Any]] = None) -> List[str]:
+    """Argumenty ``docker run`` z limitami zasobów (None/false wyłącza limit)"""
+    limits = dict(DEFAULT_RESOURCE_LIMITS)
+    limits.update({k: v for k, v in (config or {}).items() if k in DEFAULT_RESOURCE_LIMITS})
+
+    args = []
+    if limits.get('cpus'):
+        args += ["--cpus", str(limits['cpus'])]
+    if limits.get('memory'):
+        args += ["--memory", str(limits['memory'])]
+    if limits.get('pids_limit'):
+        args += ["--pids-limit", str(limits['pids_limit'])]
+    return args
+
+
+def remove_container(name: str):
+    """Usuwa kontener (np. po timeoucie, gdy klient docker został przerwany)"""
+    subprocess.run(["docker", "rm", "-f", name], capture_output=True, text=True, timeout=30)
+
+
+def remove_image(tag: str):
+    """Usuwa tymczasowy obraz propozycji"""
+    subprocess.run(["docker", "rmi", "-f", tag], capture_output=True, text=True, timeout=60)
+
+
+# ============================================
+# TIERY WALIDACJI (przed Dockerem)
+# ============================================
+
+@dataclass
+class TierResult:
+    """Wynik jednego tieru walidacji"""
+    tier: str
+    status: str  # passed / failed / skipped
+    seconds: float
+    detail: str = ""
+
+    @property
+    def failed(self) -> bool:
+        return self.status == "failed"
+
+
+def compile_changed(test_path: Path, files: Dict[str, str]) -> TierResult:
+    """Tier 1: kompilacja zmienionych plików Pythona (w procesie, bez zapisu .pyc)"""
+    start = time.perf_counter()
+    checked = 0
+    for filename in files:
+        if not filename.endswith('.py'):
+            continue
+        file_path = test_path / filename
+        try:
+            compile(file_path.read_text(encoding='utf-8'), str(filename), 'exec')
+            checked += 1
+        except SyntaxError as e:
+            return TierResult("compile", "failed", time.perf_counter() - start,
+                              f"{filename}:{e.lineno}: {e.msg}")
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            return TierResult("compile", "failed", time.perf_counter() - start, f"{filename}: {e}")
+
+    status = "passed" if checked else "skipped"
+    return TierResult("compile", status, time.perf_counter() - start, f"{checked} plików")
+
+
+def targeted_tests(test_path: Path) -> List[str]:
+    """Testy MRE wskazane przez stacktrace (ramki w plikach test_*.py)"""
+    stacktrace = test_path / "stacktrace.txt"
+    if not stacktrace.exists():
+        return []
+
+    # Testy w MRE leżą pod tests/ z zachowaną ścieżką względną projektu
+    test_files = {t[len("tests/"):] if t.startswith("tests/") else t: t for t in find_test_files(test_path)}
+    targets = []
+    for frame in re.findall(r'File "([^"]+)"', stacktrace.read_text(errors='replace')):
+        match = resolve_frame(frame, test_files)
+        if match is None:
+            # Ścieżka w ramce inna niż w MRE - dopasowanie po nazwie pliku
+            names = [k for k in test_files if Path(k).name == Path(frame).name]
+            match = names[0] if len(names) == 1 else None
+        if match and test_files[match] not in targets:
+            targets.append(test_files[match])
+    return targets
+
+
+def build_test_ladder(test_path: Path, changed: List[str],
+                      acceptance: str = DEFAULT_ACCEPTANCE_LEVEL) -> List[Tuple[str, List[str]]]:
+    """
+    Szczeble testów do uruchomienia: (nazwa, pliki testowe) bez powtórzeń.
+    Pusty szczebel jest pomijany, a drabina sięga do poziomu akceptacji
+    (dalej, jeśli do tego poziomu nie było żadnego testu).
+    """
+    if acceptance not in LADDER_LEVELS:
+        raise ValueError(f"Nieznany poziom akceptacji: {acceptance}")
+
+    all_tests = find_test_files(test_path)
+    reproduce = targeted_tests(test_path)
+    graph = build_import_graph(test_path)
+    impacted = [t for t in impacted_tests(test_path, changed, graph) if t not in reproduce]
+    remaining = [t for t in all_tests if t not in reproduce and t not in impacted]
+
+    ladder = []
+    last = LADDER_LEVELS.index(acceptance)
+    for position, (level, tests) in enumerate(zip(LADDER_LEVELS, [reproduce, impacted, remaining])):
+        if position > last and any(targets for _, targets in ladder):
+            break
+        if tests:
+            ladder.append((level, tests))
+    return ladder
+
+
+class VenvCache:
+    """Virtualenv z zależnościami MRE, tworzony raz per hash plików zależności"""
+
+    def __init__(self, cache_dir: Path, timeout: int = DEFAULT_VENV_TIMEOUT):
+        self.cache_dir = Path(cache_dir)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _python(venv_path: Path) -> Path:
+        return venv_path / ("Scripts/python.exe" if os.name == 'nt' else "bin/python")
+
+    def ensure(self, path: Path) -> Optional[Path]:
+        """Zwraca interpreter venv dla MRE (None gdy stos nie jest Pythonowy lub instalacja zawiodła)"""
+        stack = detect_stack(path)
+        if stack.name != "python":
+            return None
+
+        venv_path = self.cache_dir / dependency_hash(path, stack)[:16]
+        python = self._python(venv_path)
+        ready = venv_path / ".ready"
+
+        with self._lock:
+            if ready.exists():
+                return python
+
+            logger.info(f"  📦 Tworzenie virtualenv walidacji: {venv_path}")
+            shutil.rmtree(venv_path, ignore_errors=True)
+            requirements = ["-r", str(path / "requirements.txt")] if (path / "requirements.txt").exists() else []
+            try:
+                for command in ([sys.executable, "-m", "venv", str(venv_path)],
+                                [str(python), "-m", "pip", "install", "-q", "pytest", *requirements]):
+                    result = subprocess.run(command, capture_output=True, text=True, timeout=self.timeout)
+                    if result.returncode != 0:
+                        logger.warning(f"  ⚠️ Nie udało się przygotować venv: {result.stderr[-500:]}")
+                        return None
+            except (subprocess.TimeoutExpired, OSError) as e:
+                logger.warning(f"  ⚠️ Nie udało się przygotować venv: {e}")
+                return None
+
+            ready.write_text(time.strftime("%Y-%m-%dT%H:%M:%S"))
+            return python
+
+
+def run_sandboxed(python: Path, test_path: Path, args: List[str], timeout: int,
+                  config: Optional[Dict[str, Any]] = None) -> subprocess.CompletedProcess:
+    """Uruchamia ``python <args>`` z venv w katalogu MRE, z limitami i czystym środowiskiem"""
+    config = config or {}
+    env = {
+        'PATH': f"{python.parent}{os.pathsep}{os.environ.get('PATH', '')}",
+        'HOME': str(test_path),
+        'PYTHONDONTWRITEBYTECODE': '1',
+        'PYTHONHASHSEED': '0',
+    }
+    # Limity ustawia wrapper przed exec - bez preexec_fn (wywołanie z wielu wątków)
+    command = limited_command([python, *args],
+                              config.get('sandbox_memory_mb', DEFAULT_SANDBOX_MEMORY_MB),
+                              config.get('sandbox_cpu_seconds', DEFAULT_SANDBOX_CPU_SECONDS))
+    return subprocess.run(command, cwd=test_path, env=env, capture_output=True, text=True, timeout=timeout)
+
+
+def run_sandboxed_tests(python: Path, test_path: Path, targets: List[str],
+                        config: Optional[Dict[str, Any]] = None, tier: str = "venv") -> TierResult:
+    """Uruchamia pytest w venv jako podproces z limitami i czystym środowiskiem"""
+    config = config or {}
+    start = time.perf_counter()
+    try:
+        result = run_sandboxed(python, test_path, ["-m", "pytest", "-x", "-q", "-p", "no:cacheprovider", *targets],
+                               config.get('venv_test_timeout', DEFAULT_VENV_TEST_TIMEOUT), config)
+    except subprocess.TimeoutExpired:
+        return TierResult(tier, "failed", time.perf_counter() - start, "timeout")
+
+    elapsed = time.perf_counter() - start
+    output = (result.stdout + result.stderr)[-2000:]
+    if result.returncode == 0:
+        return TierResult(tier, "passed", elapsed, output)
+    if result.returncode == 5:
+        # pytest: brak zebranych testów
+        return TierResult(tier, "skipped", elapsed, "brak testów")
+    return TierResult(tier, "failed", elapsed, output)
+
+
+def write_tier_report(workspace: Path, results: List[TierResult]):
+    """Zapisuje przebieg tierów walidacji (status i czas) do tiers.json"""
+    report = [dict(asdict(r), seconds=round(r.seconds, 4)) for r in results]
+    (workspace / "tiers.json").write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+# ============================================
+# PULA CIEPŁYCH KONTENERÓW
+# ============================================
+
+class ContainerPool:
+    """
+    Długo żyjące kontenery z obrazu zależności dla jednego MRE.
+
+    Katalog walidacji (``validation/``) jest montowany tylko do odczytu pod
+    ``/workspaces``; przed każdym uruchomieniem katalog propozycji kopiowany
+    jest do czystego katalogu roboczego w kontenerze, a po timeoucie kontener
+    jest restartowany (reset procesów).
+    """
+
+    MOUNT = "/workspaces"
+    WORKDIR = "/tmp/coval-run"
+
+    def __init__(self, base_tag: str, workspaces_root: Path, size: int = 1,
+                 run_args: Optional[List[str]] = None, prefix: str = "repair-pool"):
+        self.base_tag = base_tag
+        self.workspaces_root = Path(workspaces_root).resolve()
+        self.size = max(1, size)
+        self.run_args = run_args or []
+        self.prefix = prefix
+        self.containers: List[str] = []
+        self._idle: "queue.Queue[str]" = queue.Queue()
+        self._lock = threading.Lock()
+
+    def _start(self) -> str:
+        name = unique_name(self.workspaces_root.parent.name, len(self.containers) + 1, self.prefix)
+        result = subprocess.run(
+            ["docker", "run", "-d", "--name", name, *self.run_args,
+             "-v", f"{self.workspaces_root}:{self.MOUNT}:ro",
+             self.base_tag, "tail", "-f", "/dev/null"],
+            capture_output=True, text=True, timeout=60
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Nie można uruchomić kontenera puli: {result.stderr}")
+        self.containers.append(name)
+        logger.info(f"  🔥 Kontener puli walidacji: {name}")
+        return name
+
+    def _acquire(self) -> str:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self.containers) < self.size:
+                return self._start()
+        return self._idle.get()
+
+    def run(self, workspace: Path, command: List[str], timeout: int) -> subprocess.CompletedProcess:
+        """Uruchamia komendę w kopii katalogu propozycji (docker exec)"""
+        relative = Path(workspace).resolve().relative_to(self.workspaces_root).as_posix()
+        script = (f"rm -rf {self.WORKDIR} && cp -a {self.MOUNT}/{shlex.quote(relative)} {self.WORKDIR} "
+                  f"&& cd {self.WORKDIR} && exec {shlex.join(command)}")
+        container = self._acquire()
+        try:
+            return subprocess.run(
+                ["docker", "exec", "-e", "PYTHONDONTWRITEBYTECODE=1", container, "sh", "-c", script],
+                capture_output=True, text=True, timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            # Przerwany exec zostawia procesy w kontenerze - restart je zabija
+            subprocess.run(["docker", "restart", "-t", "0", container],
+                           capture_output=True, text=True, timeout=60)
+            raise
+        finally:
+            self._idle.put(container)
+
+    def close(self):
+        """Usuwa kontenery puli"""
+        for name in self.containers:
+            remove_container(name)
+        self.containers = []
+
+
+# ============================================
+# CACHE WYNIKÓW WALIDACJI
+# ============================================
+
+# Logi zapisywane razem z wynikiem walidacji
+CACHED_LOGS = ["test_output.txt", "test_errors.txt"]
+
+
+def tree_hash(path: Path) -> str:
+    """Hash zawartości drzewa katalogów (ścieżki względne + treść plików, bez __pycache__, .venv itp.)"""
+    path = Path(path)
+    digest = hashlib.sha1()
+    files = walk_files(path, use_gitignore=False, max_file_size=None, skip_binary=False)
+    for file_path in sorted(files):
+        digest.update(file_path.relative_to(path).as_posix().encode('utf-8') + b"\0")
+        digest.update(file_path.read_bytes())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def proposal_hash(proposal: Dict[str, Any]) -> str:
+    """Hash plików propozycji (niezależny od wyjaśnień i kolejności kluczy)"""
+    files = proposal.get("files", {})
+    return hashlib.sha1(json.dumps(files, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def is_determinate(results: List[TierResult]) -> bool:
+    """Czy wynik nadaje się do cache (bez timeoutów i błędów infrastruktury)"""
+    for result in results:
+        if not result.failed:
+            continue
+        if result.detail == "timeout" or result.tier in ("docker", "docker:build", "local"):
+            return False
+    return True
+
+
+class ValidationCache:
+    """Utrwalone wyniki walidacji (sukces/porażka z logami) per klucz"""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(mre_hash: str, proposal_digest: str, tiers: List[str], acceptance: str,
+            dependency_digest: str) -> str:
+        payload = json.dumps([mre_hash, proposal_digest, list(tiers), acceptance, dependency_digest])
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _file(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._file(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.stats['misses'] += 1
+            return None
+        with self._lock:
+            self.stats['hits'] += 1
+        return entry
+
+    def put(self, key: str, passed: bool, results: List[TierResult], workspace: Path):
+        """Zapisuje wynik i logi z katalogu walidacji (atomowo)"""
+        entry = {
+            'passed': passed,
+            'tiers': [dict(asdict(r), seconds=round(r.seconds, 4)) for r in results],
+            'logs': {name: (workspace / name).read_text(errors='replace')
+                     for name in CACHED_LOGS if (workspace / name).exists()},
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file = self._file(key).with_suffix(f".{uuid.uuid4().hex[:8]}.tmp")
+            tmp_file.write_text(json.dumps(entry, ensure_ascii=False))
+            os.replace(tmp_file, self._file(key))
+            with self._lock:
+                self.stats['stored'] += 1
+        except OSError as e:
+            logger.warning(f"⚠️ Nie można zapisać wyniku walidacji: {e}")
+
+    @staticmethod
+    def restore(entry: Dict[str, Any], workspace: Path):
+        """Odtwarza logi i raport tierów z cache w katalogu walidacji"""
+        for name, content in entry.get('logs', {}).items():
+            (workspace / name).write_text(content)
+        tiers = [dict(t, cached=True) for t in entry.get('tiers', [])]
+        (workspace / "tiers.json").write_text(json.dumps(tiers, indent=2, ensure_ascii=False))
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Wspólny walker plików z przycinaniem katalogów.
+
+Zastępuje ``Path.rglob``, które schodziło do ``node_modules``, ``.venv``,
+``.git``, ``iterations/`` i ``archive/``. Katalogi są odrzucane zanim walker
+do nich wejdzie (``os.scandir``), respektowane są pliki ``.gitignore``
+(zagnieżdżone oraz z katalogów nadrzędnych aż do korzenia repozytorium),
+a pliki binarne i zbyt duże są pomijane. Katalogi wyjściowe narzędzi
+(``iterations/``, ``archive/``, ``repairs/``) są pomijane tylko bezpośrednio
+w katalogu roboczym narzędzia (``workspace_root``) - pakiety projektu o tych
+nazwach zostają. Dla dużych drzew skanowanie kolejnych poziomów można
+rozłożyć na wątki.
+"""
+
+import fnmatch
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+
+# Katalogi pomijane zawsze (nazwy lub wzorce fnmatch)
+DEFAULT_EXCLUDES = frozenset({
+    '.git', '.hg', '.svn', 'node_modules', '.venv', 'venv', '__pycache__',
+    '.mypy_cache', '.pytest_cache', '.ruff_cache', '.tox', '.nox', '*.egg-info'
+})
+
+# Katalogi wyjściowe narzędzi - pomijane tylko w katalogu roboczym narzędzia
+WORKSPACE_EXCLUDES = frozenset({'iterations', 'archive', 'repairs'})
+
+# Pliki większe niż ten limit są pomijane (bajty)
+DEFAULT_MAX_FILE_SIZE = 2 * 1024 * 1024
+
+# Rozszerzenia traktowane jako tekst bez zaglądania do treści
+TEXT_SUFFIXES = frozenset({
+    '.py', '.pyi', '.js', '.jsx', '.ts', '.tsx', '.java', '.c', '.h', '.cpp', '.hpp', '.go',
+    '.rs', '.rb', '.php', '.cs', '.txt', '.md', '.rst', '.json', '.yaml', '.yml', '.toml',
+    '.cfg', '.ini', '.xml', '.html', '.css', '.sh', '.mod', '.sum', '.lock'
+})
+
+_BINARY_SNIFF_BYTES = 8192
+
+
+# ============================================
+# .gitignore
+# ============================================
+
+def _glob_to_regex(pattern: str) -> str:
+    """Tłumaczy wzorzec gitignore na wyrażenie regularne (bez kotwic)"""
+    result = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith('**/', i):
+            result.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('/**', i) and i + 3 == len(pattern):
+            result.append('/.*')
+            i += 3
+            continue
+        if char == '*':
+            if pattern.startswith('**', i):
+                result.append('.*')
+                i += 2
+                continue
+            result.append('[^/]*')
+        elif char == '?':
+            result.append('[^/]')
+        elif char == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                result.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end].replace('\\', '\\\\')
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                result.append(f'[{body}]')
+                i = end
+        else:
+            result.append(re.escape(char))
+        i += 1
+    return ''.join(result)
+
+
+class GitIgnore:
+    """Reguły jednego pliku .gitignore (względem jego katalogu)"""
+
+    def __init__(self, lines: Iterable[str]):
+        self.rules: List[Tuple[re.Pattern, bool, bool]] = []
+        for raw in lines:
+            line = raw.rstrip('\n').rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            if line.startswith('\\'):
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            # Wzorzec ze "/" w środku lub na początku jest zakotwiczony
+            anchored = '/' in line
+            line = line.lstrip('/')
+            regex = _glob_to_regex(line)
+            if not anchored:
+                regex = '(?:.*/)?' + regex
+            self.rules.append((re.compile(f'^{regex}$'), negate, dir_only))
+
+    @classmethod
+    def from_file(cls, path: Path) -> 'GitIgnore':
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                return cls(f.readlines())
+        except OSError:
+            return cls([])
+
+    @classmethod
+    def parents_of(cls, root: Path) -> Tuple[Tuple[str, 'GitIgnore'], ...]:
+        """
+        Reguły .gitignore z katalogów nad root aż do korzenia repozytorium
+        (katalog z ``.git``), od najwyższego: (ścieżka root względem katalogu, reguły)
+        """
+        root = Path(root).resolve()
+        if (root / '.git').exists():
+            return ()
+        ancestors = []
+        for parent in root.parents:
+            ancestors.append(parent)
+            if (parent / '.git').exists():
+                break
+        else:
+            # Poza repozytorium - brak reguł nadrzędnych
+            return ()
+        return tuple((root.relative_to(parent).as_posix(), cls.from_file(parent / '.gitignore'))
+                     for parent in reversed(ancestors) if (parent / '.gitignore').is_file())
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """True = ignorowany, False = przywrócony (!), None = brak dopasowania"""
+        result = None
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                result = not negate
+        return result
+
+
+# ============================================
+# WALKER
+# ============================================
+
+# (katalog, ścieżka względna, aktywne reguły gitignore: (bazowa ścieżka względna, reguły))
+_Pending = Tuple[str, str, Tuple[Tuple[str, GitIgnore], ...]]
+
+
+class FileWalker:
+    """Walker z przycinaniem katalogów, .gitignore i filtrami plików"""
+
+    def __init__(self,
+                 root: Path,
+                 suffixes: Optional[Iterable[str]] = None,
+                 patterns: Optional[Iterable[str]] = None,
+                 excludes: Optional[Iterable[str]] = None,
+                 workspace_root: Optional[Path] = None,
+                 use_gitignore: bool = True,
+                 max_file_size: Optional[int] = DEFAULT_MAX_FILE_SIZE,
+                 skip_binary: bool = True,
+                 threads: int = 1):
+
+        self.root = Path(root)
+        self.suffixes = set(suffixes) if suffixes is not None else None
+        self.patterns = list(patterns) if patterns else None
+        excludes = DEFAULT_EXCLUDES if excludes is None else excludes
+        self.exclude_names: Set[str] = {e for e in excludes if not any(c in e for c in '*?[')}
+        self.exclude_globs = [e for e in excludes if e not in self.exclude_names]
+        self.workspace_rel = self._relative_to_root(workspace_root)
+        self.use_gitignore = use_gitignore
+        self.parent_rules = GitIgnore.parents_of(self.root) if use_gitignore else ()
+        self.max_file_size = max_file_size
+        self.skip_binary = skip_binary
+        self.threads = max(1, threads or 1)
+
+    def _relative_to_root(self, path: Optional[Path]) -> Optional[str]:
+        """Ścieżka względem root ('' = root) lub None, gdy leży poza drzewem"""
+        if path is None:
+            return None
+        try:
+            rel = Path(path).resolve().relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return None
+        return '' if rel == '.' else rel
+
+    # ---------- filtry ----------
+
+    def _excluded_name(self, name: str) -> bool:
+        return name in self.exclude_names or any(fnmatch.fnmatch(name, g) for g in self.exclude_globs)
+
+    def _ignored(self, rel_path: str, is_dir: bool, rules) -> bool:
+        ignored = False
+        # Reguły z katalogów nad root, potem z drzewa (głębsze nadpisują płytsze)
+        for prefix, gitignore in self.parent_rules:
+            verdict = gitignore.match(f"{prefix}/{rel_path}", is_dir)
+            if verdict is not None:
+                ignored = verdict
+        for base, gitignore in rules:
+            sub_path = rel_path[len(base) + 1:] if base else rel_path
+            verdict = gitignore.match(sub_path, is_dir)
+            if verdict is not None:
+                ignored = verdict
+        return ignored
+
+    def _wanted_file(self, name: str) -> bool:
+        if self.suffixes is not None and os.path.splitext(name)[1] not in self.suffixes:
+            return False
+        if self.patterns is not None and not any(fnmatch.fnmatch(name, p) for p in self.patterns):
+            return False
+        return True
+
+    @staticmethod
+    def is_binary(path: str) -> bool:
+        """Plik binarny = bajt NUL w początkowym fragmencie"""
+        try:
+            with open(path, 'rb') as f:
+                return b'\0' in f.read(_BINARY_SNIFF_BYTES)
+        except OSError:
+            return True
+
+    # ---------- skanowanie ----------
+
+    def _scan_dir(self, item: _Pending):
+        """Skanuje jeden katalog: (pliki z stat, podkatalogi do odwiedzenia)"""
+        dir_path, rel_dir, rules = item
+        files = []
+        subdirs = []
+
+        try:
+            with os.scandir(dir_path) as iterator:
+                entries = sorted(iterator, key=lambda e: e.name)
+        except OSError:
+            return files, subdirs
+
+        if self.use_gitignore and any(e.name == '.gitignore' for e in entries):
+            rules = rules + ((rel_dir, GitIgnore.from_file(Path(dir_path) / '.gitignore')),)
+
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+
+            if self._excluded_name(entry.name):
+                continue
+            if is_dir and rel_dir == self.workspace_rel and entry.name in WORKSPACE_EXCLUDES:
+                continue
+            if (rules or self.parent_rules) and self._ignored(rel_path, is_dir, rules):
+                continue
+
+            if is_dir:
+                subdirs.append((entry.path, rel_path, rules))
+                continue
+
+            if not self._wanted_file(entry.name):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue
+            if self.max_file_size is not None and stat.st_size > self.max_file_size:
+                continue
+            if (self.skip_binary and os.path.splitext(entry.name)[1] not in TEXT_SUFFIXES
+                    and self.is_binary(entry.path)):
+                continue
+            files.append((Path(entry.path), stat))
+
+        return files, subdirs
+
+    def _levels(self) -> Iterator[Tuple[list, list]]:
+        """Przechodzi drzewo poziomami (BFS), opcjonalnie równolegle"""
+        pending: List[_Pending] = [(str(self.root), '', ())]
+        executor = ThreadPoolExecutor(max_workers=self.threads) if self.threads > 1 else None
+        try:
+            while pending:
+                if executor and len(pending) > 1:
+                    results = list(executor.map(self._scan_dir, pending))
+                else:
+                    results = [self._scan_dir(item) for item in pending]
+                pending = []
+                for files, subdirs in results:
+                    yield files, subdirs
+                    pending.extend(subdirs)
+        finally:
+            if executor:
+                executor.shutdown()
+
+    def entries(self) -> Iterator[Tuple[Path, os.stat_result]]:
+        """Pliki spełniające filtry razem z ich stat (bez ponownego stat)"""
+        for files, _ in self._levels():
+            yield from files
+
+    def files(self) -> Iterator[Path]:
+        """Pliki spełniające filtry"""
+        for path, _ in self.entries():
+            yield path
+
+
+def walk_files(root: Path, **options) -> Iterator[Path]:
+    """Skrót: pliki z drzewa root (opcje jak w FileWalker)"""
+    return FileWalker(root, **options).files()
+
+
+def find_dirs(root: Path, names: Iterable[str], excludes: Optional[Iterable[str]] = None,
+              use_gitignore: bool = False) -> Iterator[Path]:
+    """
+    Znajduje katalogi o podanych nazwach bez schodzenia do ich wnętrza
+    (np. node_modules do usunięcia - bez przechodzenia tysięcy plików)
+    """
+    names = set(names)
+    excludes = set(excludes) if excludes is not None else {'.git', '.hg', '.svn', '.venv', 'venv'}
+    walker = FileWalker(root, suffixes=(), excludes=excludes - names, use_gitignore=use_gitignore)
+    pending: List[_Pending] = [(str(walker.root), '', ())]
+    while pending:
+        next_pending = []
+        for item in pending:
+            _, subdirs = walker._scan_dir(item)
+            for subdir in subdirs:
+                if Path(subdir[0]).name in names:
+                    yield Path(subdir[0])
+                else:
+                    next_pending.append(subdir)
+        pending = next_pending
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Katalogi robocze walidacji jako farmy hardlinków.
+
+Zamiast ``shutil.copytree`` pliki są linkowane (``os.link``) - bez kopiowania
+danych. Zapis do pliku w katalogu roboczym musi przejść przez
+``write_private``, które najpierw odłącza link (copy-on-write), dzięki czemu
+oryginał pozostaje nietknięty. Linkowane są tylko prywatne migawki (MRE jest
+kopią źródła użytkownika), a ``read_only`` odbiera linkom prawo zapisu - zapis
+w miejscu (np. przez testy) kończy się błędem zamiast zmienić migawkę. Gdy
+linkowanie jest niemożliwe (inny system plików, brak uprawnień), plik jest
+kopiowany.
+"""
+
+import os
+import shutil
+import stat
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+
+_WRITE_BITS = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+
+
+def link_or_copy(source: Path, dest: Path, hardlink: bool = True, read_only: bool = False) -> bool:
+    """Hardlink pliku (True) lub kopia przy braku możliwości linkowania (False)
+
+    ``read_only`` zdejmuje prawo zapisu ze wspólnego i-węzła - dotyczy też ``source``.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    if dest.exists() or dest.is_symlink():
+        dest.unlink()
+    if hardlink:
+        try:
+            os.link(source, dest)
+        except OSError:
+            pass
+        else:
+            if read_only:
+                mode = dest.stat().st_mode
+                if mode & _WRITE_BITS:
+                    dest.chmod(stat.S_IMODE(mode) & ~_WRITE_BITS)
+            return True
+    shutil.copy2(source, dest)
+    return False
+
+
+def link_tree(source: Path, dest: Path, hardlink: bool = True, read_only: bool = False) -> Dict[str, int]:
+    """Odtwarza drzewo katalogów z plikami jako hardlinkami (odpowiednik copytree)"""
+    source = Path(source)
+    dest = Path(dest)
+    stats = {'linked': 0, 'copied': 0}
+
+    for dir_path, dir_names, file_names in os.walk(source):
+        rel_dir = Path(dir_path).relative_to(source)
+        (dest / rel_dir).mkdir(parents=True, exist_ok=True)
+        dir_names.sort()
+        for name in sorted(file_names):
+            if link_or_copy(Path(dir_path) / name, dest / rel_dir / name, hardlink, read_only):
+                stats['linked'] += 1
+            else:
+                stats['copied'] += 1
+    return stats
+
+
+def contained_path(base: Path, relative: str) -> Optional[Path]:
+    """Ścieżka ``base / relative`` lub None, gdy wychodzi poza ``base`` (``..``, ścieżka absolutna)"""
+    base = Path(base).resolve()
+    target = (base / relative).resolve()
+    return target if target != base and target.is_relative_to(base) else None
+
+
+def write_private(path: Path, content: Union[str, bytes]):
+    """Zapis copy-on-write: odłącza ewentualny hardlink przed zapisem"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists() or path.is_symlink():
+        path.unlink()
+    if isinstance(content, bytes):
+        path.write_bytes(content)
+    else:
+        path.write_text(content)
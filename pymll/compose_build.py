@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Przyrostowa przebudowa usług Docker Compose.
+
+Dla każdej usługi liczony jest hash treści katalogu ``build`` (ścieżki
+względne + zawartość plików) oraz jej konfiguracji w compose (bez samej
+ścieżki ``build``, która zmienia się z każdą iteracją). Hashe ostatniej
+udanej przebudowy trzymane są w pliku stanu; przebudowywane i restartowane
+są tylko usługi, których hash się zmienił - pozostałe działają dalej.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from walker import walk_files
+
+DEFAULT_STATE_FILE = ".ymll_build_state.json"
+
+
+def directory_hash(path: Path) -> str:
+    """Hash treści katalogu kontekstu builda (niezależny od jego położenia)"""
+    path = Path(path)
+    digest = hashlib.sha256()
+    files = sorted(walk_files(path, use_gitignore=False, max_file_size=None, skip_binary=False),
+                   key=lambda p: p.relative_to(path).as_posix())
+    for file_path in files:
+        digest.update(file_path.relative_to(path).as_posix().encode())
+        digest.update(b"\0")
+        digest.update(file_path.read_bytes())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def service_hash(service: Dict) -> str:
+    """Hash usługi: treść kontekstu builda + konfiguracja bez ścieżki"""
+    config = {key: value for key, value in service.items() if key != "build"}
+    digest = hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode())
+    build = service.get("build")
+    if isinstance(build, dict):
+        build = build.get("context")
+    if build and Path(build).is_dir():
+        digest.update(directory_hash(Path(build)).encode())
+    return digest.hexdigest()
+
+
+def service_hashes(compose: Dict) -> Dict[str, str]:
+    """Hashe wszystkich usług z docker-compose"""
+    return {name: service_hash(service) for name, service in compose.get("services", {}).items()}
+
+
+def state_file_for(project: Optional[str] = None) -> Path:
+    """Plik stanu builda - osobny dla każdego projektu compose"""
+    if not project:
+        return Path(DEFAULT_STATE_FILE)
+    return Path(f".ymll_build_state.{project}.json")
+
+
+def load_build_state(path: Path) -> Dict[str, str]:
+    """Hashe usług z ostatniej udanej przebudowy"""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    try:
+        state = json.loads(path.read_text())
+    except json.JSONDecodeError:
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def save_build_state(path: Path, hashes: Dict[str, str]):
+    Path(path).write_text(json.dumps(hashes, indent=2, sort_keys=True))
+
+
+@dataclass
+class RebuildPlan:
+    """Które usługi przebudować, a które zostawić uruchomione"""
+    rebuild: List[str] = field(default_factory=list)
+    keep: List[str] = field(default_factory=list)
+    full: bool = False
+
+
+def plan_rebuild(hashes: Dict[str, str], state: Dict[str, str], running: Iterable[str]) -> RebuildPlan:
+    """Usługi zmienione od ostatniego builda lub niedziałające idą do przebudowy"""
+    running = set(running)
+    if not state or not running:
+        return RebuildPlan(rebuild=sorted(hashes), full=True)
+
+    plan = RebuildPlan()
+    for name in sorted(hashes):
+        if state.get(name) == hashes[name] and name in running:
+            plan.keep.append(name)
+        else:
+            plan.rebuild.append(name)
+    return plan
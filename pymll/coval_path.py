@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+Udostępnienie wspólnych modułów z katalogu ``coval/`` (walker, workspace,
+validation, llm_replay) skryptom pymll.
+
+Importowany raz przez punkty wejścia (``ymll.py``, ``run_comprehensive_tests.py``)
+przed modułami, które z coval korzystają - same moduły biblioteczne
+(``runtime.py``, ``compose_build.py``) nie modyfikują ``sys.path``.
+"""
+
+import sys
+from pathlib import Path
+
+COVAL_DIR = Path(__file__).resolve().parent.parent / "coval"
+
+if str(COVAL_DIR) not in sys.path:
+    sys.path.insert(0, str(COVAL_DIR))
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Benchmark etapów ``generate_iteration`` na odtwarzanym LLM.
+
+Macierz opisów × zestawów frameworków przechodzi przez ``generate_iteration``
+w osobnych katalogach roboczych, a ``StageTimer`` mierzy etapy: prompt, llm,
+parse, files, dockerfile, validate, compose (czas ścienny, CPU, szczyt RSS).
+Odpowiedzi LLM pochodzą z kasety (``--cassette``) albo z kasety syntetycznej
+zbudowanej z odpowiedzi fallback - bez opóźnienia, więc etap llm mierzy sam
+narzut odtwarzania. Przypadek z promptem spoza kasety (``llm_misses``) jest
+przerywany i oznaczany jako nieważny - nie trafia do porównania, a skrypt
+kończy się kodem 1. Raport JSON można porównać z zapisanym raportem bazowym;
+etapy wolniejsze lub cięższe ponad próg są oznaczane jako regresje.
+
+Użycie:
+    ./generate_bench.py --output report.json
+    ./generate_bench.py --matrix matrix.yaml --repeats 5 --baseline baseline.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import yaml
+
+from stage_timer import StageTimer
+
+logger = logging.getLogger(__name__)
+
+STAGES = ["prompt", "llm", "parse", "files", "dockerfile", "validate", "compose"]
+
+DEFAULT_DESCRIPTIONS = [
+    "Simple product catalog API",
+    "Task manager with user accounts and background notifications",
+]
+
+DEFAULT_FRAMEWORK_SETS = [
+    "frontend:express,backend:fastapi",
+    "frontend:nextjs,backend:fastapi,api:gin,workers:python",
+]
+
+DEFAULT_THRESHOLD = 0.25
+# Progi bezwzględne - szum pomiaru krótkich etapów nie jest regresją
+MIN_DELTA_S = 0.005
+MIN_DELTA_MB = 2.0
+
+
+def parse_frameworks(spec: str) -> Dict[str, str]:
+    """``frontend:express,backend:fastapi`` -> {warstwa: framework}"""
+    frameworks = {}
+    for pair in filter(None, (p.strip() for p in spec.split(','))):
+        layer, fw = pair.split(':')
+        frameworks[layer.strip()] = fw.strip()
+    return frameworks
+
+
+def load_matrix(path: Path) -> Tuple[List[str], List[str], int]:
+    """Macierz z YAML/JSON: ``descriptions``, ``frameworks`` (lista specyfikacji), ``repeats``"""
+    data = yaml.safe_load(Path(path).read_text()) or {}
+    return (list(data.get("descriptions") or DEFAULT_DESCRIPTIONS),
+            list(data.get("frameworks") or DEFAULT_FRAMEWORK_SETS),
+            int(data.get("repeats", 1)))
+
+
+def build_cases(descriptions: List[str], framework_sets: List[str]) -> List[Dict[str, Any]]:
+    """Iloczyn opisów i zestawów frameworków"""
+    return [{"case": f"{i}x{j}", "description": description, "frameworks": spec}
+            for i, description in enumerate(descriptions, 1)
+            for j, spec in enumerate(framework_sets, 1)]
+
+
+def synthetic_response(system, frameworks: Dict[str, str]) -> str:
+    """Odpowiedź fallback z frameworkami przypadku (deterministyczna, bez modelu)"""
+    data = system._get_fallback_data()
+    for component in data.get("components", []):
+        component["framework"] = frameworks.get(component.get("layer", ""), component.get("framework", ""))
+    return json.dumps(data, indent=2)
+
+
+def write_synthetic_cassette(system_factory: Callable[[], Any], cases: List[Dict[str, Any]], cassette: Path):
+    """Kaseta z odpowiedziami fallback dla promptów wszystkich przypadków"""
+    from llm_replay import LLMRecorder
+
+    cassette.unlink(missing_ok=True)
+    recorder = LLMRecorder(cassette)
+    with tempfile.TemporaryDirectory(prefix="ymll-bench-cassette-") as workdir:
+        system = _in_workdir(Path(workdir), system_factory)
+        for case in cases:
+            frameworks = parse_frameworks(case["frameworks"])
+            prompt = system._generate_smart_prompt(case["description"], frameworks)
+            recorder.record(prompt, synthetic_response(system, frameworks), 0.0, system.model.value)
+
+
+def _in_workdir(workdir: Path, func: Callable[[], Any]) -> Any:
+    """Wywołanie w katalogu roboczym (YMLLSystem używa ścieżek względnych)"""
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        return func()
+    finally:
+        os.chdir(cwd)
+
+
+def _aggregate(samples: List[Dict[str, Dict[str, float]]]) -> Dict[str, Dict[str, float]]:
+    """Mediana czasów i maksimum szczytu RSS z powtórzeń"""
+    stages = {}
+    for name in [s for s in STAGES if any(s in sample for sample in samples)]:
+        values = [sample[name] for sample in samples if name in sample]
+        stages[name] = {
+            "s": round(statistics.median(v["s"] for v in values), 4),
+            "cpu_s": round(statistics.median(v["cpu_s"] for v in values), 4),
+            "peak_rss_mb": max(v["peak_rss_mb"] for v in values),
+            "calls": values[0]["calls"],
+        }
+    return stages
+
+
+def bench_generate(system_factory: Callable[[], Any], cases: List[Dict[str, Any]],
+                   cassette: Optional[Path] = None, repeats: int = 1,
+                   latency: Optional[float] = None, tokens_per_s: Optional[float] = None,
+                   measure_rss: bool = True) -> Dict[str, Any]:
+    """Mierzy etapy generate_iteration dla każdego przypadku macierzy (brak nagrania przerywa przypadek)"""
+    from llm_replay import LLMReplay, ReplayMiss
+
+    results: Dict[str, Any] = {"benchmark": "generate", "repeats": repeats, "runs": []}
+    with tempfile.TemporaryDirectory(prefix="ymll-bench-") as tmp:
+        if cassette is None:
+            cassette = Path(tmp) / "synthetic.jsonl"
+            write_synthetic_cassette(system_factory, cases, cassette)
+            results["cassette"] = "synthetic"
+        else:
+            results["cassette"] = str(cassette)
+        replay = LLMReplay(Path(cassette).resolve(), latency, tokens_per_s)
+
+        for case in cases:
+            frameworks = parse_frameworks(case["frameworks"])
+            samples, totals, rss_reset = [], [], True
+            misses = replay.stats["misses"]
+            for repeat in range(repeats):
+                workdir = Path(tmp) / f"{case['case']}-{repeat}"
+                workdir.mkdir()
+
+                def run():
+                    system = system_factory()
+                    system.llm_replay = replay
+                    system.stage_timer = StageTimer(measure_rss)
+                    start = time.perf_counter()
+                    system.generate_iteration(case["description"], frameworks)
+                    return system.stage_timer, time.perf_counter() - start
+
+                try:
+                    timer, total = _in_workdir(workdir, run)
+                except ReplayMiss as e:
+                    # Pomiar ścieżki innej niż nagrana byłby mylący - przypadek nieważny
+                    logger.error(f"❌ {case['case']}: {e}")
+                    break
+                finally:
+                    shutil.rmtree(workdir, ignore_errors=True)
+                samples.append(timer.to_dict())
+                totals.append(total)
+                rss_reset = rss_reset and bool(timer.rss_reset)
+
+            results["runs"].append({
+                **case,
+                "total_s": round(statistics.median(totals), 4) if totals else None,
+                "stages": _aggregate(samples),
+                "llm_misses": replay.stats["misses"] - misses,
+                "rss_per_stage": rss_reset,
+            })
+            if not results["runs"][-1]["llm_misses"]:
+                logger.info(f"⏱️ {case['case']}: {results['runs'][-1]['total_s']:.3f}s")
+
+    return results
+
+
+def compare_runs(baseline: Dict[str, Any], current: Dict[str, Any],
+                 threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """Etapy przypadków obecnych w obu raportach; ``regression`` gdy czas lub RSS wzrósł ponad próg
+
+    Przypadki z brakami w kasecie (``llm_misses``) nie są porównywane.
+    """
+    baseline_runs = {(run["description"], run["frameworks"]): run for run in baseline.get("runs", [])
+                     if not run.get("llm_misses")}
+    rows = []
+    for run in current.get("runs", []):
+        previous = baseline_runs.get((run["description"], run["frameworks"]))
+        if not previous or run.get("llm_misses"):
+            continue
+        for name, stage in run["stages"].items():
+            old = previous.get("stages", {}).get(name)
+            if not old:
+                continue
+            slower = (stage["s"] - old["s"] > MIN_DELTA_S
+                      and stage["s"] > old["s"] * (1 + threshold))
+            heavier = (stage["peak_rss_mb"] - old["peak_rss_mb"] > MIN_DELTA_MB
+                       and stage["peak_rss_mb"] > old["peak_rss_mb"] * (1 + threshold))
+            rows.append({
+                "case": run["case"],
+                "stage": name,
+                "baseline_s": old["s"],
+                "current_s": stage["s"],
+                "time_ratio": round(stage["s"] / old["s"], 3) if old["s"] else None,
+                "baseline_peak_rss_mb": old["peak_rss_mb"],
+                "current_peak_rss_mb": stage["peak_rss_mb"],
+                "regression": slower or heavier,
+            })
+    return rows
+
+
+def main():
+    """Punkt wejścia CLI benchmarku"""
+    parser = argparse.ArgumentParser(description="YMLL - benchmark etapów generate_iteration")
+    parser.add_argument('--matrix', type=str,
+                        help='Matrix file (YAML/JSON): descriptions, frameworks, repeats')
+    parser.add_argument('--description', action='append', dest='descriptions',
+                        help='Description to benchmark (repeatable; overrides matrix)')
+    parser.add_argument('--frameworks', action='append', dest='framework_sets',
+                        help='Framework set, e.g. frontend:express,backend:fastapi (repeatable)')
+    parser.add_argument('--repeats', type=int, help='Runs per case (median is reported)')
+    parser.add_argument('--cassette', type=str,
+                        help='Cassette to replay (default: synthetic cassette from fallback responses)')
+    parser.add_argument('--replay-latency', type=float, help='Simulated first-token latency in seconds')
+    parser.add_argument('--replay-tokens-per-s', type=float, help='Simulated generation rate')
+    parser.add_argument('--no-rss', action='store_true', help='Skip peak RSS measurement')
+    parser.add_argument('--output', type=str, help='JSON report file (default: stdout)')
+    parser.add_argument('--baseline', type=str, help='Baseline report to compare against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Relative slowdown/growth flagged as regression (default: 0.25)')
+    args = parser.parse_args()
+
+    from ymll import LLMModel, YMLLSystem
+    from benchmarks import environment_info
+
+    descriptions, framework_sets, repeats = (load_matrix(Path(args.matrix)) if args.matrix
+                                             else (DEFAULT_DESCRIPTIONS, DEFAULT_FRAMEWORK_SETS, 1))
+    cases = build_cases(args.descriptions or descriptions, args.framework_sets or framework_sets)
+    cassette = Path(args.cassette).resolve() if args.cassette else None
+
+    results = bench_generate(lambda: YMLLSystem(model=LLMModel.QWEN_CODER), cases, cassette,
+                             args.repeats or repeats, args.replay_latency, args.replay_tokens_per_s,
+                             measure_rss=not args.no_rss)
+    results["environment"] = environment_info()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+        logger.info(f"📄 Raport zapisany do: {args.output}")
+    else:
+        print(output)
+
+    missed = [run["case"] for run in results["runs"] if run["llm_misses"]]
+    if missed:
+        logger.error(f"❌ Prompty spoza kasety w przypadkach: {', '.join(missed)} - pomiary nieważne")
+
+    if args.baseline:
+        rows = compare_runs(json.loads(Path(args.baseline).read_text()), results, args.threshold)
+        # Bez --output raport idzie na stdout - porównanie na stderr
+        stream = sys.stdout if args.output else sys.stderr
+        for row in rows:
+            flag = "  ⚠️ REGRESJA" if row["regression"] else ""
+            print(f"{row['case']:>6} {row['stage']:<11} {row['baseline_s']:>8.4f}s -> {row['current_s']:>8.4f}s"
+                  f"  x{row['time_ratio']}  {row['baseline_peak_rss_mb']} MB -> {row['current_peak_rss_mb']} MB"
+                  f"{flag}", file=stream)
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+    if missed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
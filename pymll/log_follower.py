@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Śledzenie logów ``docker-compose logs -f`` w tle podczas startu stosu.
+
+Linie trafiają do ograniczonego bufora pierścieniowego per usługa i są
+dopasowywane do skompilowanych sygnatur znanych awarii (brak modułu, zajęty
+port, błąd składni). Pierwsze dopasowanie usługi zapisuje awarię razem z
+wycinkiem logów, dzięki czemu oczekiwanie na gotowość może przerwać próbę
+od razu, zamiast czekać na timeout.
+"""
+
+import os
+import re
+import signal
+import subprocess
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Pattern, Tuple
+
+DEFAULT_BUFFER_LINES = 200
+EXCERPT_LINES = 20
+
+# Sygnatury awarii: (nazwa, wzorzec)
+FAILURE_SIGNATURES: List[Tuple[str, Pattern]] = [
+    ("import_error", re.compile(
+        r"ModuleNotFoundError|ImportError|Cannot find module|ERR_MODULE_NOT_FOUND|cannot find package")),
+    ("port_in_use", re.compile(r"EADDRINUSE|[Aa]ddress already in use|bind: address already in use")),
+    ("syntax_error", re.compile(r"SyntaxError|IndentationError|syntax error")),
+]
+
+# "backend_1  | tekst" (compose v1) lub "backend-1  | tekst" (compose v2)
+_LINE_PATTERN = re.compile(r"^(?P<service>[\w.-]+?)(?:[-_]\d+)?\s+\|\s?(?P<text>.*)$")
+
+
+@dataclass
+class LogFailure:
+    """Rozpoznana awaria usługi z wycinkiem logów"""
+    service: str
+    signature: str
+    line: str
+    excerpt: str
+
+
+class LogFollower:
+    """Strumień ``compose logs -f`` w wątku, z buforem i sygnaturami awarii"""
+
+    def __init__(self, compose_cmd: Optional[List[str]] = None,
+                 services: Optional[List[str]] = None,
+                 buffer_lines: int = DEFAULT_BUFFER_LINES,
+                 signatures: Optional[List[Tuple[str, Pattern]]] = None,
+                 command: Optional[List[str]] = None):
+        self.compose_cmd = compose_cmd or ["docker-compose"]
+        self.services = list(services or [])
+        # Własne polecenie strumieniujące (np. z runtime) zamiast compose logs -f
+        self.command = command or self.compose_cmd + ["logs", "-f", "--no-color"] + self.services
+        self.signatures = FAILURE_SIGNATURES if signatures is None else signatures
+        self.buffer_lines = buffer_lines
+        self.buffers: Dict[str, Deque[str]] = {}
+        self.failures: Dict[str, LogFailure] = {}
+        self._lock = threading.Lock()
+        self._process: Optional[subprocess.Popen] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'LogFollower':
+        try:
+            self._process = subprocess.Popen(
+                self.command,
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace",
+                start_new_session=True)
+        except OSError:
+            return self
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._thread.start()
+        return self
+
+    def _read(self):
+        for line in self._process.stdout:
+            self.feed(line)
+
+    def feed(self, line: str):
+        """Przetwarza jedną linię wyjścia ``compose logs``"""
+        match = _LINE_PATTERN.match(line.rstrip("\n"))
+        if not match:
+            return
+        service, text = self._service_name(match.group("service")), match.group("text")
+        with self._lock:
+            buffer = self.buffers.setdefault(service, deque(maxlen=self.buffer_lines))
+            buffer.append(text)
+            if service in self.failures:
+                return
+            for name, pattern in self.signatures:
+                if pattern.search(text):
+                    self.failures[service] = LogFailure(
+                        service=service, signature=name, line=text,
+                        excerpt="\n".join(list(buffer)[-EXCERPT_LINES:]))
+                    break
+
+    def _service_name(self, name: str) -> str:
+        """Nazwa usługi z nazwy kontenera (compose v1 dodaje prefiks projektu)"""
+        for service in self.services:
+            if name == service or name.endswith(("_" + service, "-" + service)):
+                return service
+        return name
+
+    def failed_services(self) -> Dict[str, str]:
+        """Usługa -> nazwa sygnatury (do przerwania oczekiwania na gotowość)"""
+        with self._lock:
+            return {service: failure.signature for service, failure in self.failures.items()}
+
+    def tail(self, service: str, lines: int = DEFAULT_BUFFER_LINES) -> str:
+        with self._lock:
+            return "\n".join(list(self.buffers.get(service, ()))[-lines:])
+
+    def stop(self):
+        if self._process and self._process.poll() is None:
+            # Cała grupa procesów - potomkowie trzymający potok też muszą zniknąć
+            try:
+                os.killpg(self._process.pid, signal.SIGTERM)
+                self._process.wait(timeout=5)
+            except ProcessLookupError:
+                pass
+            except subprocess.TimeoutExpired:
+                os.killpg(self._process.pid, signal.SIGKILL)
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> 'LogFollower':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
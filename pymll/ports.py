@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Przydział portów hosta i nazwy projektów compose per iteracja.
+
+Porty w kontenerach są stałe dla warstwy (``CONTAINER_PORTS``) - każdy
+kontener ma własną przestrzeń sieciową. Zmienia się tylko port hosta:
+alokator wybiera wolny port z zakresu warstwy (``layers.<warstwa>.port_range``
+w ``ymll.config.yaml``), pomijając porty zarezerwowane przez inne projekty
+i zajęte na hoście. Rezerwacje trzymane są w pliku stanu pod blokadą, więc
+kilka iteracji (lub wariantów A/B) może działać i być testowanych naraz.
+"""
+
+import json
+import re
+import socket
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_PORTS_FILE = ".ymll_ports.json"
+DEFAULT_PROJECT_PREFIX = "ymll"
+
+# Porty nasłuchu wewnątrz kontenera (EXPOSE/CMD w Dockerfile, healthcheck)
+CONTAINER_PORTS = {"frontend": 3003, "backend": 3100, "api": 3200}
+
+DEFAULT_PORT_RANGES: Dict[str, Tuple[int, int]] = {
+    "frontend": (3003, 3099),
+    "backend": (3100, 3199),
+    "api": (3200, 3299),
+    "workers": (3300, 3399),
+}
+
+
+def project_name(iteration: str, prefix: str = DEFAULT_PROJECT_PREFIX) -> str:
+    """Nazwa projektu compose dla iteracji (małe litery, cyfry, - i _)"""
+    return f"{prefix}-" + (re.sub(r"[^a-z0-9_-]", "", iteration.lower()) or "default")
+
+
+def iteration_project(iter_path: Path, prefix: str = DEFAULT_PROJECT_PREFIX) -> str:
+    """Projekt compose iteracji - patche (``patch.json``) dziedziczą projekt iteracji bazowej"""
+    iter_path = Path(iter_path)
+    seen = set()
+    while (iter_path / "patch.json").exists() and iter_path.name not in seen:
+        seen.add(iter_path.name)
+        try:
+            parent = json.loads((iter_path / "patch.json").read_text()).get("parent")
+        except (json.JSONDecodeError, AttributeError):
+            break
+        if not parent:
+            break
+        iter_path = iter_path.parent / parent
+    return project_name(iter_path.name, prefix)
+
+
+def compose_projects(iterations_dir: Path, prefix: str = DEFAULT_PROJECT_PREFIX) -> Dict[str, Path]:
+    """Projekt compose -> docker-compose.yml jego najnowszej iteracji"""
+    iterations_dir = Path(iterations_dir)
+    projects: Dict[str, Path] = {}
+    if not iterations_dir.exists():
+        return projects
+    for iter_path in sorted(d for d in iterations_dir.iterdir() if d.is_dir()):
+        if (iter_path / "docker-compose.yml").exists():
+            projects[iteration_project(iter_path, prefix)] = iter_path / "docker-compose.yml"
+    return projects
+
+
+def port_free(port: int, host: str = "0.0.0.0") -> bool:
+    """Czy port hosta da się zbindować"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        try:
+            sock.bind((host, port))
+            return True
+        except OSError:
+            return False
+
+
+def port_ranges_from_config(config: Dict) -> Dict[str, Tuple[int, int]]:
+    """Zakresy portów warstw z ``ymll.config.yaml`` (brakujące - domyślne)"""
+    ranges = dict(DEFAULT_PORT_RANGES)
+    for layer, settings in (config.get("layers") or {}).items():
+        port_range = (settings or {}).get("port_range")
+        if isinstance(port_range, (list, tuple)) and len(port_range) == 2:
+            ranges[layer] = (int(port_range[0]), int(port_range[1]))
+    return ranges
+
+
+def split_port_ranges(ranges: Dict[str, Tuple[int, int]], slot: int, slots: int) -> Dict[str, Tuple[int, int]]:
+    """Rozłączny wycinek zakresów portów (np. dla równoległych uruchomień testów)"""
+    split = {}
+    for layer, (low, high) in ranges.items():
+        width = (high - low + 1) // slots
+        if width < 1:
+            raise ValueError(f"Zakres portów warstwy {layer} ({low}-{high}) za mały na {slots} wycinków")
+        split[layer] = (low + slot * width, low + (slot + 1) * width - 1)
+    return split
+
+
+def rewrite_url(url: str, host_ports: Dict[str, int]) -> str:
+    """URL z domyślnym portem warstwy -> URL z portem przydzielonym iteracji"""
+    parts = urlsplit(url)
+    for layer, container_port in CONTAINER_PORTS.items():
+        if parts.port == container_port and layer in host_ports:
+            return urlunsplit(parts._replace(netloc=f"{parts.hostname}:{host_ports[layer]}"))
+    return url
+
+
+class PortAllocator:
+    """Rezerwacje portów hosta per projekt compose, współdzielone między procesami"""
+
+    def __init__(self, state_file: Path = Path(DEFAULT_PORTS_FILE),
+                 ranges: Optional[Dict[str, Tuple[int, int]]] = None,
+                 is_free: Callable[[int], bool] = port_free):
+        self.state_file = Path(state_file)
+        self.ranges = ranges or dict(DEFAULT_PORT_RANGES)
+        self.is_free = is_free
+
+    @contextmanager
+    def _locked(self) -> Iterator[Dict[str, Dict[str, int]]]:
+        """Stan rezerwacji pod wyłączną blokadą; zapisywany przy wyjściu
+
+        Bez ``fcntl`` (system inny niż POSIX) blokada jest pomijana - rezerwacje
+        działają, ale nie są chronione przed równoległymi procesami.
+        """
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.state_file.with_name(self.state_file.name + ".lock"), "w") as lock:
+            try:
+                import fcntl
+            except ImportError:
+                fcntl = None
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            state = self._read()
+            before = json.dumps(state, sort_keys=True)
+            yield state
+            if json.dumps(state, sort_keys=True) != before:
+                tmp_file = self.state_file.with_name(self.state_file.name + ".tmp")
+                tmp_file.write_text(json.dumps(state, indent=2, sort_keys=True))
+                tmp_file.replace(self.state_file)
+
+    def _read(self) -> Dict[str, Dict[str, int]]:
+        try:
+            state = json.loads(self.state_file.read_text())
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return state if isinstance(state, dict) else {}
+
+    def allocate(self, project: str, layers: Iterable[str]) -> Dict[str, int]:
+        """Porty hosta warstw projektu; istniejące rezerwacje są zachowywane"""
+        with self._locked() as state:
+            ports = state.setdefault(project, {})
+            taken = {port for name, other in state.items() if name != project for port in other.values()}
+            for layer in layers:
+                if layer in ports:
+                    continue
+                low, high = self.ranges.get(layer, DEFAULT_PORT_RANGES["frontend"])
+                candidates = (port for port in range(low, high + 1)
+                              if port not in taken and port not in ports.values() and self.is_free(port))
+                port = next(candidates, None)
+                if port is None:
+                    raise RuntimeError(f"Brak wolnego portu dla warstwy {layer} w zakresie {low}-{high}")
+                ports[layer] = port
+            return dict(ports)
+
+    def lookup(self, project: str) -> Dict[str, int]:
+        return dict(self._read().get(project, {}))
+
+    def allocations(self) -> Dict[str, Dict[str, int]]:
+        return self._read()
+
+    def release(self, project: str):
+        with self._locked() as state:
+            state.pop(project, None)
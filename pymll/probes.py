@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Równoległe sondy E2E warstw uruchomionego stosu.
+
+Lista endpointów wynika z wygenerowanego ``docker-compose.yml`` (port hosta
+usługi) i danych frameworka (``FrameworkConfig.probe_paths``) zamiast
+zaszytych URL-i. Wszystkie sondy idą jednocześnie przez jedną sesję HTTP
+z pulą połączeń; warstwa jest rozstrzygnięta przy pierwszej odpowiedzi 200,
+a jej pozostałe sondy z kolejki są anulowane.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from readiness import service_port
+
+# Ścieżki typowe dla warstwy (przed ścieżkami frameworka i "/")
+LAYER_PROBE_PATHS = {
+    "frontend": [],
+    "backend": ["/api/status"],
+    "api": ["/api/v1/info", "/api/v1/products"],
+}
+
+DEFAULT_PROBE_TIMEOUT = 3.0
+
+
+def probe_paths(layer: str, framework_paths: Optional[List[str]] = None) -> List[str]:
+    """Ścieżki do sprawdzenia w kolejności preferencji (bez duplikatów)"""
+    paths = LAYER_PROBE_PATHS.get(layer, []) + list(framework_paths or []) + ["/"]
+    return list(dict.fromkeys(paths))
+
+
+def endpoints_from_compose(compose: Dict, framework_paths: Optional[Dict[str, List[str]]] = None,
+                           host: str = "localhost") -> Dict[str, List[str]]:
+    """Warstwa -> URL-e sond dla usług compose z opublikowanym portem"""
+    framework_paths = framework_paths or {}
+    endpoints = {}
+    for layer, service in compose.get("services", {}).items():
+        port = service_port(service)
+        if port is None:
+            continue
+        endpoints[layer] = [f"http://{host}:{port}{path}"
+                            for path in probe_paths(layer, framework_paths.get(layer))]
+    return endpoints
+
+
+@dataclass
+class ProbeResult:
+    """Wynik sond jednej warstwy"""
+    layer: str
+    ok: bool = False
+    url: Optional[str] = None
+    status: Optional[int] = None
+    seconds: float = 0.0
+
+
+def create_session(pool_size: int):
+    """Sesja requests z pulą połączeń na wszystkie równoległe sondy"""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def probe_layers(endpoints: Dict[str, List[str]], session=None,
+                 timeout: float = DEFAULT_PROBE_TIMEOUT,
+                 max_workers: Optional[int] = None) -> Dict[str, ProbeResult]:
+    """Sonduje wszystkie URL-e równolegle; warstwa kończy się na pierwszym 200"""
+    jobs = [(layer, url) for layer, urls in endpoints.items() for url in urls]
+    results = {layer: ProbeResult(layer) for layer in endpoints}
+    if not jobs:
+        return results
+
+    max_workers = max_workers or min(len(jobs), 16)
+    own_session = session is None
+    session = session or create_session(max_workers)
+    start = time.monotonic()
+
+    def probe(url: str) -> Optional[int]:
+        try:
+            return session.get(url, timeout=timeout).status_code
+        except Exception:
+            return None
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {executor.submit(probe, url): (layer, url) for layer, url in jobs}
+        remaining = {layer: len(urls) for layer, urls in endpoints.items()}
+        for future in as_completed(futures):
+            layer, url = futures[future]
+            result = results[layer]
+            remaining[layer] -= 1
+            if result.ok:
+                continue
+            status = future.result()
+            if status == 200:
+                result.ok, result.url, result.status = True, url, status
+                result.seconds = time.monotonic() - start
+                for other, (other_layer, _) in futures.items():
+                    if other_layer == layer:
+                        other.cancel()
+            else:
+                result.status = result.status or status
+                if remaining[layer] == 0:
+                    result.seconds = time.monotonic() - start
+            if all(r.ok or remaining[name] == 0 for name, r in results.items()):
+                break
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        if own_session:
+            session.close()
+    return results
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Gotowość usług Docker Compose zamiast stałego ``time.sleep`` po ``up``.
+
+Każda usługa dostaje healthcheck dobrany do języka frameworka
+(``FrameworkConfig.language``) - test połączenia TCP wykonywany narzędziem
+dostępnym w obrazie (python, node, busybox ``nc``). Po ``up -d`` stan
+kontenerów i porty usług są odpytywane z wykładniczym backoffem aż do
+gotowości wszystkich wymaganych warstw albo upływu globalnego terminu.
+"""
+
+import logging
+import socket
+import subprocess
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Warstwy, bez których stos nie przejdzie testów E2E
+REQUIRED_LAYERS = ["frontend", "backend"]
+
+DEFAULT_DEADLINE = 180.0
+DEFAULT_INITIAL_DELAY = 0.25
+DEFAULT_MAX_DELAY = 4.0
+
+# Parametry healthchecka w docker-compose
+HEALTHCHECK_TIMING = {
+    "interval": "2s",
+    "timeout": "2s",
+    "retries": 30,
+    "start_period": "5s",
+}
+
+
+def healthcheck_command(language: str, port: int) -> List[str]:
+    """Polecenie testu TCP dostępne w obrazie bazowym danego języka"""
+    if language == "python":
+        return ["CMD", "python", "-c",
+                f"import socket; socket.create_connection(('127.0.0.1', {port}), 2)"]
+    if language in ("javascript", "typescript"):
+        return ["CMD", "node", "-e",
+                f"require('net').connect({port}, '127.0.0.1')"
+                ".on('connect', () => process.exit(0))"
+                ".on('error', () => process.exit(1))"]
+    # Go, Rust itp. - końcowy obraz alpine z busybox
+    return ["CMD-SHELL", f"nc -z 127.0.0.1 {port} || exit 1"]
+
+
+def healthcheck_for(language: Optional[str], port: Optional[int]) -> Optional[Dict]:
+    """Sekcja ``healthcheck`` usługi compose (None dla usług bez portu)"""
+    if not port or not language:
+        return None
+    return {"test": healthcheck_command(language, port), **HEALTHCHECK_TIMING}
+
+
+def service_port(service: Dict) -> Optional[int]:
+    """Port hosta z pierwszego mapowania ``ports`` usługi compose"""
+    for mapping in service.get("ports", []):
+        host = str(mapping).split(":")[0]
+        if host.isdigit():
+            return int(host)
+    return None
+
+
+@dataclass
+class ServiceTarget:
+    """Usługa, na której gotowość czekamy"""
+    layer: str
+    port: Optional[int] = None
+    required: bool = True
+
+
+def targets_from_compose(compose: Dict, required_layers: Optional[List[str]] = None) -> List[ServiceTarget]:
+    """Lista usług do odpytania na podstawie wygenerowanego docker-compose"""
+    required_layers = REQUIRED_LAYERS if required_layers is None else required_layers
+    return [ServiceTarget(layer=name, port=service_port(service), required=name in required_layers)
+            for name, service in compose.get("services", {}).items()]
+
+
+def port_open(port: int, host: str = "127.0.0.1", timeout: float = 0.5) -> bool:
+    """Czy port przyjmuje połączenia TCP"""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def compose_state(compose_cmd: List[str], service: str) -> Tuple[str, str]:
+    """(status, health) kontenera usługi; puste stringi gdy brak kontenera"""
+    try:
+        ids = subprocess.run(compose_cmd + ["ps", "-q", service],
+                             capture_output=True, text=True, timeout=10).stdout.split()
+        if not ids:
+            return "", ""
+        result = subprocess.run(
+            ["docker", "inspect", "--format",
+             "{{.State.Status}} {{if .State.Health}}{{.State.Health.Status}}{{end}}", ids[0]],
+            capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return "", ""
+    parts = result.stdout.split()
+    return (parts[0] if parts else ""), (parts[1] if len(parts) > 1 else "")
+
+
+@dataclass
+class ReadinessReport:
+    """Wynik oczekiwania: czas do gotowości i warstwy niegotowe"""
+    ready: Dict[str, float] = field(default_factory=dict)
+    failed: Dict[str, str] = field(default_factory=dict)
+    pending: List[str] = field(default_factory=list)
+    required: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return all(layer in self.ready for layer in self.required)
+
+    def log(self):
+        for layer, seconds in sorted(self.ready.items(), key=lambda item: item[1]):
+            logger.info(f"  ⏱️ {layer}: gotowy po {seconds:.1f}s")
+        for layer, reason in self.failed.items():
+            logger.error(f"  ❌ {layer}: {reason}")
+        for layer in self.pending:
+            logger.warning(f"  ⌛ {layer}: niegotowy po {self.elapsed:.1f}s")
+
+
+def check_service(target: ServiceTarget, state: Tuple[str, str],
+                  port_check: Callable[[int], bool]) -> Optional[bool]:
+    """True - gotowa, False - definitywnie padła, None - jeszcze czekamy"""
+    status, health = state
+    if status in ("exited", "dead"):
+        return False
+    if status != "running":
+        return None
+    if health == "unhealthy":
+        return False
+    if health == "healthy":
+        return True
+    if health == "starting":
+        return None
+    # Brak healthchecka: wystarczy działający kontener i otwarty port
+    return True if target.port is None else (port_check(target.port) or None)
+
+
+def wait_until_ready(targets: List[ServiceTarget],
+                     compose_cmd: Optional[List[str]] = None,
+                     deadline: float = DEFAULT_DEADLINE,
+                     initial_delay: float = DEFAULT_INITIAL_DELAY,
+                     max_delay: float = DEFAULT_MAX_DELAY,
+                     state_fn: Optional[Callable[[str], Tuple[str, str]]] = None,
+                     port_check: Callable[[int], bool] = port_open,
+                     failures_fn: Optional[Callable[[], Dict[str, str]]] = None,
+                     clock: Callable[[], float] = time.monotonic,
+                     sleep: Callable[[float], None] = time.sleep) -> ReadinessReport:
+    """Odpytuje usługi z wykładniczym backoffem do gotowości wymaganych warstw
+
+    ``failures_fn`` zwraca awarie wykryte poza odpytywaniem (np. w logach);
+    awaria wymaganej warstwy przerywa oczekiwanie od razu.
+    """
+    compose_cmd = compose_cmd or ["docker-compose"]
+    state_fn = state_fn or (lambda service: compose_state(compose_cmd, service))
+
+    report = ReadinessReport(required=[t.layer for t in targets if t.required])
+    start = clock()
+    delay = initial_delay
+    waiting = list(targets)
+
+    while waiting:
+        external = failures_fn() if failures_fn else {}
+        for target in list(waiting):
+            if target.layer in external:
+                waiting.remove(target)
+                report.failed[target.layer] = external[target.layer]
+                continue
+            verdict = check_service(target, state_fn(target.layer), port_check)
+            if verdict is None:
+                continue
+            waiting.remove(target)
+            if verdict:
+                report.ready[target.layer] = clock() - start
+            else:
+                report.failed[target.layer] = "kontener zatrzymany lub unhealthy"
+
+        # Wymagane warstwy gotowe lub jedna z nich padła - nie ma na co czekać
+        required_waiting = [t for t in waiting if t.required]
+        if not required_waiting or any(layer in report.failed for layer in report.required):
+            break
+        remaining = deadline - (clock() - start)
+        if remaining <= 0:
+            break
+        sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+
+    report.pending = [t.layer for t in waiting]
+    report.elapsed = clock() - start
+    return report
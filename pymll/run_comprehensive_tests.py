@@ -4,19 +4,38 @@ YMLL Comprehensive Test Suite - 10 Different Scenarios
 Tests various frameworks, architectures, and complexity levels
 """
 
+import argparse
+import queue
+import re
+import shutil
 import subprocess
+import sys
 import time
 import json
 import requests
+import yaml
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dataclasses import dataclass
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
 
+import coval_path  # noqa: F401 - wspólne moduły z katalogu coval/ (walker plików)
+from walker import walk_files
+from llm_replay import LLM_MODES
+
+from runtime import DEFAULT_LOCAL_STATE_DIR, RUNTIMES, create_runtime
+from ports import (DEFAULT_PORTS_FILE, PortAllocator, compose_projects, port_ranges_from_config, rewrite_url,
+                   split_port_ranges)
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+YMLL_SCRIPT = Path(__file__).resolve().parent / "ymll.py"
+DEFAULT_RUNS_DIR = "test_runs"
+DEFAULT_WORKERS = 3
+
 @dataclass
 class TestScenario:
     """Test scenario definition"""
@@ -38,13 +57,24 @@ class TestResult:
     files_created: int
     endpoints_working: int
     error_message: str = ""
+    workdir: str = ""
 
 class YMLLTestRunner:
     """Comprehensive YMLL test runner"""
     
-    def __init__(self):
+    def __init__(self, runtime: str = "docker", workers: int = DEFAULT_WORKERS,
+                 runs_dir: str = DEFAULT_RUNS_DIR, llm_args: Optional[List[str]] = None):
         self.results: List[TestResult] = []
         self.base_path = Path(".")
+        self.runtime = runtime
+        self.workers = max(1, workers)
+        self.runs_dir = Path(runs_dir).resolve()
+        # Extra ymll.py arguments, e.g. LLM replay from a cassette
+        self.llm_args = list(llm_args or [])
+        # Wycinki zakresów portów - każdy równoległy scenariusz ma własny
+        self.port_slots: "queue.Queue[int]" = queue.Queue()
+        for slot in range(self.workers):
+            self.port_slots.put(slot)
         
     def setup_test_scenarios(self) -> List[TestScenario]:
         """Define all 10 test scenarios"""
@@ -143,52 +173,75 @@ class YMLLTestRunner:
         
         return scenarios
     
-    def cleanup_system(self):
-        """Clean up before each test"""
-        logger.info("🧹 Cleaning up system...")
-        
-        # Stop containers
-        subprocess.run(["docker-compose", "down"], capture_output=True)
-        subprocess.run(["docker", "stop"] + 
-                      subprocess.run(["docker", "ps", "-aq"], capture_output=True, text=True).stdout.split(),
-                      capture_output=True)
-        
-        # Remove old iterations
-        iterations_dir = Path("iterations")
-        if iterations_dir.exists():
-            import shutil
-            shutil.rmtree(iterations_dir)
-        
-        # Remove docker-compose.yml
-        compose_file = Path("docker-compose.yml")
-        if compose_file.exists():
-            compose_file.unlink()
-            
-        time.sleep(2)
-    
-    def run_single_test(self, scenario: TestScenario) -> TestResult:
-        """Run a single test scenario"""
+    def project_prefix(self, scenario: TestScenario) -> str:
+        """Compose project prefix unique to the scenario"""
+        return "ymll-" + re.sub(r"[^a-z0-9_-]", "", scenario.name.lower())
+
+    def ymll(self, *args: str) -> List[str]:
+        return [sys.executable, str(YMLL_SCRIPT), *args, "--runtime", self.runtime, *self.llm_args]
+
+    def stop_projects(self, workdir: Path, prefix: str):
+        """Stop containers / local processes of the scenario's compose projects only"""
+        runtime = create_runtime(self.runtime, state_dir=workdir / DEFAULT_LOCAL_STATE_DIR)
+        for project, compose_file in compose_projects(workdir / "iterations", prefix).items():
+            try:
+                runtime.for_project(project, compose_file).down()
+            except (OSError, subprocess.TimeoutExpired) as e:
+                logger.warning(f"⚠️ Could not stop {project}: {e}")
+
+    def cleanup_system(self, workdir: Path, prefix: str):
+        """Clean up the scenario's working directory before the test"""
+        logger.info(f"🧹 Cleaning up {workdir.name}...")
+        if workdir.exists():
+            self.stop_projects(workdir, prefix)
+            shutil.rmtree(workdir)
+        workdir.mkdir(parents=True)
+
+    def prepare_workdir(self, workdir: Path, prefix: str, slot: int):
+        """Initialize an isolated project with its own compose prefix and port ranges"""
+        subprocess.run(self.ymll("init"), cwd=workdir, capture_output=True, text=True, timeout=60)
+        config_file = workdir / "ymll.config.yaml"
+        config = (yaml.safe_load(config_file.read_text()) or {}) if config_file.exists() else {}
+        config.setdefault("project", {})["compose_prefix"] = prefix
+        ranges = split_port_ranges(port_ranges_from_config(config), slot, self.workers)
+        for layer, (low, high) in ranges.items():
+            config.setdefault("layers", {}).setdefault(layer, {})["port_range"] = [low, high]
+        config_file.write_text(yaml.dump(config, default_flow_style=False))
+
+    def run_scenario(self, scenario: TestScenario) -> TestResult:
+        """Run a scenario on a free port-range slot"""
+        slot = self.port_slots.get()
+        try:
+            result = self.run_single_test(scenario, slot)
+        finally:
+            self.port_slots.put(slot)
+        status = "✅ PASSED" if result.success else "❌ FAILED"
+        logger.info(f"Result {scenario.name}: {status} (Duration: {result.duration:.1f}s)")
+        return result
+
+    def run_single_test(self, scenario: TestScenario, slot: int = 0) -> TestResult:
+        """Run a single test scenario in its own working directory"""
         
         logger.info(f"🧪 Starting test: {scenario.name}")
         logger.info(f"📝 Description: {scenario.description}")
         
         start_time = time.time()
+        workdir = self.runs_dir / scenario.name
+        prefix = self.project_prefix(scenario)
         
         try:
             # Clean up before test
-            self.cleanup_system()
+            self.cleanup_system(workdir, prefix)
+            self.prepare_workdir(workdir, prefix, slot)
             
             # Generate frameworks string
             frameworks_str = ",".join([f"{k}:{v}" for k, v in scenario.frameworks.items()])
             
             # Generate iteration
-            logger.info(f"🚀 Generating iteration with frameworks: {frameworks_str}")
-            generate_cmd = [
-                "./ymll.py", "generate", scenario.description,
-                "--frameworks", frameworks_str
-            ]
+            logger.info(f"🚀 [{scenario.name}] Generating iteration with frameworks: {frameworks_str}")
+            generate_cmd = self.ymll("generate", scenario.description, "--frameworks", frameworks_str)
             
-            result = subprocess.run(generate_cmd, capture_output=True, text=True, timeout=60)
+            result = subprocess.run(generate_cmd, cwd=workdir, capture_output=True, text=True, timeout=60)
             
             if result.returncode != 0:
                 return TestResult(
@@ -198,15 +251,17 @@ class YMLLTestRunner:
                     components_created=0,
                     files_created=0,
                     endpoints_working=0,
-                    error_message=f"Generation failed: {result.stderr}"
+                    error_message=f"Generation failed: {result.stderr}",
+                    workdir=str(workdir)
                 )
             
             # Count generated components and files
-            components_created, files_created = self.count_generated_artifacts()
+            components_created, files_created = self.count_generated_artifacts(workdir)
             
             # Run the system
-            logger.info("🚀 Running system...")
-            run_result = subprocess.run(["./ymll.py", "run"], capture_output=True, text=True, timeout=scenario.timeout)
+            logger.info(f"🚀 [{scenario.name}] Running system...")
+            run_result = subprocess.run(self.ymll("run"), cwd=workdir,
+                                        capture_output=True, text=True, timeout=scenario.timeout)
             
             if run_result.returncode != 0:
                 return TestResult(
@@ -216,11 +271,12 @@ class YMLLTestRunner:
                     components_created=components_created,
                     files_created=files_created,
                     endpoints_working=0,
-                    error_message=f"System run failed: {run_result.stderr}"
+                    error_message=f"System run failed: {run_result.stderr}",
+                    workdir=str(workdir)
                 )
             
-            # Test endpoints
-            working_endpoints = self.test_endpoints(scenario.test_endpoints)
+            # Test endpoints (default layer ports -> ports allocated to the iteration)
+            working_endpoints = self.test_endpoints(self.resolve_endpoints(scenario.test_endpoints, workdir, prefix))
             
             # Determine success
             success = (
@@ -237,7 +293,8 @@ class YMLLTestRunner:
                 duration=duration,
                 components_created=components_created,
                 files_created=files_created,
-                endpoints_working=working_endpoints
+                endpoints_working=working_endpoints,
+                workdir=str(workdir)
             )
             
         except subprocess.TimeoutExpired:
@@ -248,7 +305,8 @@ class YMLLTestRunner:
                 components_created=0,
                 files_created=0,
                 endpoints_working=0,
-                error_message="Test timeout"
+                error_message="Test timeout",
+                workdir=str(workdir)
             )
         except Exception as e:
             return TestResult(
@@ -258,15 +316,19 @@ class YMLLTestRunner:
                 components_created=0,
                 files_created=0,
                 endpoints_working=0,
-                error_message=str(e)
+                error_message=str(e),
+                workdir=str(workdir)
             )
+        finally:
+            # Stack is no longer needed - free ports and resources for the next scenario
+            self.stop_projects(workdir, prefix)
     
-    def count_generated_artifacts(self) -> tuple:
+    def count_generated_artifacts(self, workdir: Path = Path(".")) -> tuple:
         """Count generated components and files"""
         components_created = 0
         files_created = 0
         
-        iterations_dir = Path("iterations")
+        iterations_dir = workdir / "iterations"
         if iterations_dir.exists():
             # Count component directories
             for iteration_dir in iterations_dir.iterdir():
@@ -274,13 +336,21 @@ class YMLLTestRunner:
                     for component_dir in iteration_dir.iterdir():
                         if component_dir.is_dir() and component_dir.name in ["frontend", "backend", "api", "workers"]:
                             components_created += 1
-                            # Count files in component
-                            for file_path in component_dir.rglob("*"):
-                                if file_path.is_file():
-                                    files_created += 1
+                            # Count files in component (skip node_modules, caches etc.)
+                            files_created += sum(1 for _ in walk_files(
+                                component_dir, use_gitignore=False, skip_binary=False, max_file_size=None))
         
         return components_created, files_created
     
+    def resolve_endpoints(self, endpoints: List[str], workdir: Path, prefix: str) -> List[str]:
+        """Rewrite scenario URLs to the host ports of the generated iteration"""
+        allocator = PortAllocator(workdir / DEFAULT_PORTS_FILE)
+        projects = compose_projects(workdir / "iterations", prefix)
+        if not projects:
+            return endpoints
+        host_ports = allocator.lookup(list(projects)[-1])
+        return [rewrite_url(endpoint, host_ports) for endpoint in endpoints]
+
     def test_endpoints(self, endpoints: List[str]) -> int:
         """Test HTTP endpoints"""
         working_count = 0
@@ -361,7 +431,8 @@ class YMLLTestRunner:
                     "components_created": r.components_created,
                     "files_created": r.files_created,
                     "endpoints_working": r.endpoints_working,
-                    "error_message": r.error_message
+                    "error_message": r.error_message,
+                    "workdir": r.workdir
                 }
                 for r in self.results
             ]
@@ -379,21 +450,34 @@ class YMLLTestRunner:
         logger.info("=" * 60)
         
         scenarios = self.setup_test_scenarios()
+        logger.info(f"⚡ {len(scenarios)} scenarios, {self.workers} in parallel (workdirs: {self.runs_dir})")
         
-        for i, scenario in enumerate(scenarios, 1):
-            logger.info(f"\n🧪 Test {i}/{len(scenarios)}: {scenario.name}")
-            result = self.run_single_test(scenario)
-            self.results.append(result)
-            
-            status = "✅ PASSED" if result.success else "❌ FAILED"
-            logger.info(f"Result: {status} (Duration: {result.duration:.1f}s)")
+        # Results keep scenario order regardless of completion order
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            self.results.extend(executor.map(self.run_scenario, scenarios))
         
         # Generate final report
         self.generate_report()
 
 def main():
     """Main entry point"""
-    runner = YMLLTestRunner()
+    parser = argparse.ArgumentParser(description="YMLL Comprehensive Test Suite")
+    parser.add_argument('--runtime', choices=RUNTIMES, default='docker',
+                        help='Runtime: docker (docker-compose) or local (subprocesses, no Docker)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Scenarios run in parallel (each in its own workdir, project and port range)')
+    parser.add_argument('--runs-dir', default=DEFAULT_RUNS_DIR,
+                        help='Directory for per-scenario working directories')
+    parser.add_argument('--llm', choices=LLM_MODES, default='live',
+                        help='LLM mode passed to ymll.py (replay: offline, deterministic)')
+    parser.add_argument('--cassette', type=str, help='Cassette file for --llm record/replay')
+    args = parser.parse_args()
+
+    llm_args = ["--llm", args.llm]
+    if args.cassette:
+        llm_args += ["--cassette", str(Path(args.cassette).resolve())]
+    runner = YMLLTestRunner(runtime=args.runtime, workers=args.workers, runs_dir=args.runs_dir,
+                            llm_args=llm_args)
     runner.run_all_tests()
 
 if __name__ == "__main__":
@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Wymienne środowisko uruchomieniowe stosu (build, up, down, logs, exec, health).
+
+``DockerRuntime`` opakowuje ``docker-compose``. ``LocalRuntime`` uruchamia
+każdą warstwę z ``docker-compose.yml`` jako podproces na porcie hosta z
+mapowania ``ports``: katalog roboczy warstwy to farma hardlinków kontekstu
+builda, zależności Pythona trafiają do virtualenv, a Node do katalogu
+``node_modules`` - oba współdzielone per hash plików zależności. Komenda
+startowa pochodzi z ``CMD`` Dockerfile warstwy. Dzięki temu pętlę
+generate → run → heal można uruchomić i mierzyć bez Dockera.
+"""
+
+import json
+import logging
+import os
+import shlex
+import shutil
+import signal
+import subprocess
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
+from validation import VenvCache, dependency_hash, detect_stack
+from workspace import link_tree
+
+from readiness import compose_state
+
+logger = logging.getLogger(__name__)
+
+RUNTIMES = ["docker", "local"]
+
+DEFAULT_COMPOSE_TIMEOUT = 120
+DEFAULT_INSTALL_TIMEOUT = 600
+DEFAULT_LOCAL_STATE_DIR = ".ymll_local"
+
+# Kroki RUN z Dockerfile wykonywane także lokalnie (reszta to instalacja obrazu)
+LOCAL_BUILD_STEPS = ("npm run build",)
+
+
+def _result(args, returncode: int = 0, stdout: str = "", stderr: str = "") -> subprocess.CompletedProcess:
+    return subprocess.CompletedProcess(args, returncode, stdout, stderr)
+
+
+def _replace_with_symlink(link: Path, target: Path):
+    """Dowiązanie ``link`` -> ``target``; istniejący wpis (np. node_modules z kontekstu builda) jest usuwany"""
+    if link.is_symlink() or link.is_file():
+        link.unlink()
+    elif link.is_dir():
+        shutil.rmtree(link)
+    link.symlink_to(target)
+
+
+class Runtime(ABC):
+    """Wspólny interfejs backendów uruchamiających usługi stosu"""
+
+    name = ""
+
+    @abstractmethod
+    def build(self, services: List[str]) -> subprocess.CompletedProcess:
+        ...
+
+    @abstractmethod
+    def up(self, services: Optional[List[str]] = None, build: bool = False,
+           recreate: Optional[bool] = None, remove_orphans: bool = False,
+           no_deps: bool = False) -> subprocess.CompletedProcess:
+        """Start usług; recreate: True - zawsze od nowa, False - nie ruszaj działających"""
+
+    @abstractmethod
+    def down(self) -> subprocess.CompletedProcess:
+        ...
+
+    @abstractmethod
+    def logs(self, services: Optional[List[str]] = None, tail: int = 50) -> str:
+        ...
+
+    @abstractmethod
+    def log_command(self, services: List[str]) -> List[str]:
+        """Polecenie strumieniujące logi w formacie ``usługa | linia``"""
+
+    @abstractmethod
+    def exec(self, service: str, command: List[str], timeout: int = 60) -> subprocess.CompletedProcess:
+        ...
+
+    @abstractmethod
+    def health(self, service: str) -> Tuple[str, str]:
+        """(status, health) jak w ``docker inspect``; puste gdy usługa nie istnieje"""
+
+    @abstractmethod
+    def running_services(self) -> List[str]:
+        ...
+
+    @abstractmethod
+    def for_project(self, project: str, compose_file: Path) -> 'Runtime':
+        """Ten sam backend związany z projektem compose iteracji"""
+
+
+class DockerRuntime(Runtime):
+    """Backend docker-compose"""
+
+    name = "docker"
+
+    def __init__(self, compose_cmd: Optional[List[str]] = None, timeout: int = DEFAULT_COMPOSE_TIMEOUT):
+        self.compose_cmd = compose_cmd or ["docker-compose"]
+        self.timeout = timeout
+        self._base_cmd = self.compose_cmd
+
+    def _run(self, args: List[str], timeout: Optional[int] = None) -> subprocess.CompletedProcess:
+        return subprocess.run(self.compose_cmd + args, capture_output=True, text=True,
+                              timeout=timeout or self.timeout)
+
+    def build(self, services):
+        return self._run(["build", "--parallel"] + list(services))
+
+    def up(self, services=None, build=False, recreate=None, remove_orphans=False, no_deps=False):
+        args = ["up", "-d", "--build" if build else "--no-build"]
+        if recreate is True:
+            args.append("--force-recreate")
+        elif recreate is False:
+            args.append("--no-recreate")
+        if no_deps:
+            args.append("--no-deps")
+        if remove_orphans:
+            args.append("--remove-orphans")
+        return self._run(args + list(services or []))
+
+    def down(self):
+        return self._run(["down"])
+
+    def logs(self, services=None, tail=50):
+        try:
+            return self._run(["logs", f"--tail={tail}"] + list(services or []), timeout=30).stdout
+        except (OSError, subprocess.TimeoutExpired):
+            return "Unable to collect logs"
+
+    def log_command(self, services):
+        return self.compose_cmd + ["logs", "-f", "--no-color"] + list(services)
+
+    def exec(self, service, command, timeout=60):
+        return self._run(["exec", "-T", service] + list(command), timeout=timeout)
+
+    def health(self, service):
+        return compose_state(self.compose_cmd, service)
+
+    def running_services(self):
+        try:
+            result = self._run(["ps", "--services", "--filter", "status=running"], timeout=30)
+        except (OSError, subprocess.TimeoutExpired):
+            return []
+        return result.stdout.split() if result.returncode == 0 else []
+
+    def for_project(self, project, compose_file):
+        runtime = DockerRuntime(self._base_cmd + ["-p", project, "-f", str(compose_file)], self.timeout)
+        runtime._base_cmd = self._base_cmd
+        return runtime
+
+
+def dockerfile_command(dockerfile: str) -> List[str]:
+    """Komenda z ostatniego ``CMD`` Dockerfile (forma exec lub shell)"""
+    command: List[str] = []
+    for line in dockerfile.splitlines():
+        line = line.strip()
+        if not line.upper().startswith("CMD "):
+            continue
+        value = line[4:].strip()
+        try:
+            command = json.loads(value) if value.startswith("[") else ["sh", "-c", value]
+        except json.JSONDecodeError:
+            command = shlex.split(value)
+    return command
+
+
+def dockerfile_runtime(dockerfile: str) -> str:
+    """python / node / go na podstawie obrazów FROM"""
+    images = [line.split()[1] for line in dockerfile.splitlines()
+              if line.strip().upper().startswith("FROM ") and len(line.split()) > 1]
+    for prefix, kind in (("golang", "go"), ("node", "node"), ("python", "python")):
+        if any(image.startswith(prefix) for image in images):
+            return kind
+    return "shell"
+
+
+class LocalRuntime(Runtime):
+    """Backend bez Dockera: warstwy jako podprocesy na portach hosta"""
+
+    name = "local"
+
+    def __init__(self, compose_file: Path = Path("docker-compose.yml"),
+                 state_dir: Path = Path(DEFAULT_LOCAL_STATE_DIR),
+                 install_timeout: int = DEFAULT_INSTALL_TIMEOUT,
+                 cache_dir: Optional[Path] = None):
+        self.compose_file = Path(compose_file)
+        self.state_dir = Path(state_dir)
+        self.install_timeout = install_timeout
+        # venv i node_modules współdzielone przez projekty wszystkich iteracji
+        self.cache_dir = Path(cache_dir) if cache_dir else self.state_dir
+        self.venv_cache = VenvCache(self.cache_dir / "venvs", timeout=install_timeout)
+        self._processes: Dict[str, subprocess.Popen] = {}
+
+    # ---------- stan ----------
+
+    def _services(self) -> Dict[str, Dict]:
+        if not self.compose_file.exists():
+            return {}
+        with open(self.compose_file) as f:
+            return (yaml.safe_load(f) or {}).get("services", {})
+
+    def _state_file(self) -> Path:
+        return self.state_dir / "services.json"
+
+    def _load_state(self) -> Dict[str, Dict]:
+        try:
+            return json.loads(self._state_file().read_text())
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save_state(self, state: Dict[str, Dict]):
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self._state_file().write_text(json.dumps(state, indent=2))
+
+    def _work_dir(self, service: str) -> Path:
+        return self.state_dir / "work" / service
+
+    def _log_file(self, service: str) -> Path:
+        return self.state_dir / "logs" / f"{service}.log"
+
+    def _alive(self, service: str, pid: int) -> bool:
+        process = self._processes.get(service)
+        if process is not None and process.pid == pid:
+            return process.poll() is None
+        try:
+            os.kill(pid, 0)
+            return True
+        except OSError:
+            return False
+
+    # ---------- build ----------
+
+    def _install(self, kind: str, work: Path) -> Tuple[bool, str]:
+        """Zależności warstwy: venv (Python), node_modules (Node), binarka (Go)"""
+        if kind == "python" and (work / "requirements.txt").exists():
+            python = self.venv_cache.ensure(work)
+            if python is None:
+                return False, "virtualenv"
+            _replace_with_symlink(work / ".venv-bin", python.parent.resolve())
+        elif kind == "node" and (work / "package.json").exists():
+            node_dir = (self.cache_dir / "node" / dependency_hash(work, detect_stack(work))[:16]).resolve()
+            if not (node_dir / ".ready").exists():
+                node_dir.mkdir(parents=True, exist_ok=True)
+                for name in ("package.json", "package-lock.json"):
+                    if (work / name).exists():
+                        # Bez bitów trybu - linki warstwy są tylko do odczytu, a npm aktualizuje lockfile
+                        shutil.copyfile(work / name, node_dir / name)
+                ok, output = self._shell(["npm", "install"], node_dir)
+                if not ok:
+                    return False, output
+                (node_dir / ".ready").write_text(time.strftime("%Y-%m-%dT%H:%M:%S"))
+            _replace_with_symlink(work / "node_modules", node_dir / "node_modules")
+        elif kind == "go":
+            return self._shell(["go", "build", "-o", "main", "."], work)
+        return True, ""
+
+    def _shell(self, command: List[str], cwd: Path) -> Tuple[bool, str]:
+        try:
+            result = subprocess.run(command, cwd=cwd, capture_output=True, text=True,
+                                    timeout=self.install_timeout, env=self._env(cwd, {}))
+        except (OSError, subprocess.TimeoutExpired) as e:
+            return False, str(e)
+        return result.returncode == 0, result.stdout + result.stderr
+
+    def _build_one(self, service: str, config: Dict) -> Tuple[bool, str]:
+        context = Path(config.get("build", ""))
+        dockerfile_path = context / "Dockerfile"
+        if not dockerfile_path.exists():
+            return False, f"{service}: brak Dockerfile w {context}"
+
+        work = self._work_dir(service)
+        shutil.rmtree(work, ignore_errors=True)
+        # Linki tylko do odczytu - build w miejscu (np. npm run build) nie zmienia plików iteracji
+        link_tree(context, work, read_only=True)
+        dockerfile = dockerfile_path.read_text()
+
+        ok, output = self._install(dockerfile_runtime(dockerfile), work)
+        if not ok:
+            return False, f"{service}: instalacja zależności nie powiodła się\n{output[-2000:]}"
+        for line in dockerfile.splitlines():
+            step = line.strip()[4:].strip() if line.strip().upper().startswith("RUN ") else ""
+            if step.startswith(LOCAL_BUILD_STEPS):
+                self._shell(["sh", "-c", step], work)
+        return True, f"{service}: zbudowano lokalnie"
+
+    def build(self, services):
+        config = self._services()
+        services = [s for s in services if s in config]
+        with ThreadPoolExecutor(max_workers=max(1, len(services))) as executor:
+            outcomes = list(executor.map(lambda s: self._build_one(s, config[s]), services))
+        failed = [message for ok, message in outcomes if not ok]
+        return _result(["build"] + services, 1 if failed else 0,
+                       "\n".join(m for ok, m in outcomes if ok), "\n".join(failed))
+
+    # ---------- procesy ----------
+
+    @staticmethod
+    def _env(work: Path, config: Dict, port: Optional[int] = None) -> Dict[str, str]:
+        env = dict(os.environ)
+        env.update({str(k): str(v) for k, v in (config.get("environment") or {}).items()})
+        extra_path = [str(work / ".venv-bin"), str(work / "node_modules" / ".bin")]
+        env["PATH"] = os.pathsep.join(extra_path + [env.get("PATH", "")])
+        if port:
+            env["PORT"] = str(port)
+        return env
+
+    @staticmethod
+    def _ports(config: Dict) -> Tuple[Optional[int], Optional[str]]:
+        """(port hosta, port kontenera) z pierwszego mapowania"""
+        for mapping in config.get("ports", []):
+            parts = str(mapping).split(":")
+            if parts[0].isdigit():
+                return int(parts[0]), parts[-1]
+        return None, None
+
+    def _start(self, service: str, config: Dict) -> Dict:
+        work = self._work_dir(service)
+        host_port, container_port = self._ports(config)
+        command = dockerfile_command((work / "Dockerfile").read_text())
+        if host_port and container_port:
+            command = [str(host_port) if arg == container_port else arg for arg in command]
+
+        log_file = self._log_file(service)
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(log_file, "w") as log:
+            process = subprocess.Popen(command, cwd=work, env=self._env(work, config, host_port),
+                                       stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                                       start_new_session=True)
+        self._processes[service] = process
+        return {"pid": process.pid, "port": host_port}
+
+    def _stop(self, service: str, pid: int):
+        try:
+            os.killpg(pid, signal.SIGTERM)
+        except OSError:
+            return
+        deadline = time.monotonic() + 5
+        while self._alive(service, pid) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        if self._alive(service, pid):
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except OSError:
+                pass
+        process = self._processes.pop(service, None)
+        if process is not None:
+            process.wait()
+
+    def up(self, services=None, build=False, recreate=None, remove_orphans=False, no_deps=False):
+        config = self._services()
+        services = list(services) if services else list(config)
+        state = self._load_state()
+
+        if remove_orphans:
+            for orphan in [s for s in state if s not in config]:
+                self._stop(orphan, state.pop(orphan)["pid"])
+
+        to_build = [s for s in services if build or not self._work_dir(s).exists()]
+        if to_build:
+            result = self.build(to_build)
+            if result.returncode != 0:
+                self._save_state(state)
+                return result
+
+        for service in services:
+            current = state.get(service)
+            if current and self._alive(service, current["pid"]):
+                if recreate is not True:
+                    continue
+                self._stop(service, current["pid"])
+            try:
+                state[service] = self._start(service, config[service])
+            except (OSError, KeyError) as e:
+                self._save_state(state)
+                return _result(["up", service], 1, "", f"{service}: {e}")
+        self._save_state(state)
+        return _result(["up"] + services)
+
+    def down(self):
+        state = self._load_state()
+        for service, info in state.items():
+            self._stop(service, info["pid"])
+        self._save_state({})
+        return _result(["down"])
+
+    def logs(self, services=None, tail=50):
+        services = list(services) if services else list(self._load_state())
+        lines = []
+        for service in services:
+            log_file = self._log_file(service)
+            if log_file.exists():
+                lines += [f"{service}  | {line}" for line in log_file.read_text(errors="replace").splitlines()[-tail:]]
+        return "\n".join(lines)
+
+    def log_command(self, services):
+        parts = []
+        for service in services:
+            log_file = shlex.quote(str(self._log_file(service)))
+            prefix = json.dumps(f"{service}  | ")
+            parts.append(f"tail -n +1 -F {log_file} 2>/dev/null | awk '{{print {prefix} $0; fflush()}}' &")
+        return ["sh", "-c", " ".join(parts) + " wait"]
+
+    def exec(self, service, command, timeout=60):
+        work = self._work_dir(service)
+        config = self._services().get(service, {})
+        return subprocess.run(list(command), cwd=work, env=self._env(work, config, self._ports(config)[0]),
+                              capture_output=True, text=True, timeout=timeout)
+
+    def health(self, service):
+        info = self._load_state().get(service)
+        if not info:
+            return "", ""
+        return ("running" if self._alive(service, info["pid"]) else "exited"), ""
+
+    def running_services(self):
+        return [s for s, info in self._load_state().items() if self._alive(s, info["pid"])]
+
+    def for_project(self, project, compose_file):
+        return LocalRuntime(compose_file, self.cache_dir / "projects" / project,
+                            self.install_timeout, cache_dir=self.cache_dir)
+
+
+def create_runtime(name: str = "docker", compose_file: Path = Path("docker-compose.yml"),
+                   state_dir: Path = Path(DEFAULT_LOCAL_STATE_DIR)) -> Runtime:
+    """Backend po nazwie (``docker`` lub ``local``)"""
+    if name == "local":
+        return LocalRuntime(compose_file, state_dir)
+    if name == "docker":
+        return DockerRuntime()
+    raise ValueError(f"Nieznany runtime: {name} (dostępne: {', '.join(RUNTIMES)})")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Pomiar etapów potoku: czas ścienny, czas CPU i szczytowe RSS.
+
+Szczyt RSS czytany jest z ``VmHWM`` w ``/proc/self/status`` i zerowany przed
+etapem (``/proc/self/clear_refs``), więc dotyczy samego etapu. Gdy zerowanie
+nie jest możliwe (inny system, brak uprawnień), wartość to szczyt procesu do
+końca etapu - ``StageTimer.rss_reset`` mówi, który przypadek zaszedł.
+Etapy o tej samej nazwie sumują czasy (np. zapis plików kilku komponentów).
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+
+def peak_rss_mb() -> float:
+    """Szczytowe RSS procesu (VmHWM, w razie braku ru_maxrss; 0.0 poza POSIX)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: bajty
+    return maxrss / 2**20 if sys.platform == "darwin" else maxrss / 1024
+
+
+def reset_peak_rss() -> bool:
+    """Zeruje szczyt RSS procesu (Linux); False gdy niemożliwe"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+@dataclass
+class StageStats:
+    """Zsumowane pomiary jednego etapu"""
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    peak_rss_mb: float = 0.0
+    calls: int = 0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"s": round(self.wall_s, 4), "cpu_s": round(self.cpu_s, 4),
+                "peak_rss_mb": round(self.peak_rss_mb, 2), "calls": self.calls}
+
+
+class StageTimer:
+    """Zbiera pomiary etapów wywołanych przez ``with timer.stage(nazwa)``"""
+
+    def __init__(self, measure_rss: bool = True):
+        self.measure_rss = measure_rss
+        self.stages: Dict[str, StageStats] = {}
+        self.rss_reset: Optional[bool] = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if self.measure_rss:
+            reset = reset_peak_rss()
+            self.rss_reset = reset if self.rss_reset is None else self.rss_reset and reset
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            stats = self.stages.setdefault(name, StageStats())
+            stats.wall_s += time.perf_counter() - wall
+            stats.cpu_s += time.process_time() - cpu
+            stats.calls += 1
+            if self.measure_rss:
+                stats.peak_rss_mb = max(stats.peak_rss_mb, peak_rss_mb())
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        return {name: stats.to_dict() for name, stats in self.stages.items()}
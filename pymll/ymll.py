@@ -13,9 +13,25 @@ import time
 import argparse
 import logging
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
+from contextlib import nullcontext
+
+import coval_path  # noqa: F401 - wspólne moduły z katalogu coval/ (walker plików itp.)
+from walker import find_dirs, walk_files
+from workspace import contained_path, link_or_copy, link_tree, write_private
+from llm_replay import LLM_MODES, LLMRecorder, LLMReplay, ReplayMiss, create_llm_stand_in
+
+from readiness import REQUIRED_LAYERS, healthcheck_for, targets_from_compose, wait_until_ready, DEFAULT_DEADLINE
+from log_follower import LogFollower
+from probes import endpoints_from_compose, probe_layers
+from runtime import Runtime, RUNTIMES, create_runtime
+from stage_timer import StageTimer
+from compose_build import (load_build_state, save_build_state, service_hashes, plan_rebuild,
+                           state_file_for, DEFAULT_STATE_FILE)
+from ports import (CONTAINER_PORTS, DEFAULT_PORTS_FILE, DEFAULT_PROJECT_PREFIX, PortAllocator, compose_projects,
+                   iteration_project, port_ranges_from_config)
 
 # Konfiguracja logowania
 logging.basicConfig(
@@ -51,6 +67,7 @@ class FrameworkConfig:
     port: int
     test_command: str
     build_command: Optional[str] = None
+    probe_paths: List[str] = field(default_factory=list)
 
 
 class FrameworkRegistry:
@@ -99,7 +116,8 @@ class FrameworkRegistry:
             dependencies_file="requirements.txt",
             dockerfile_template="python",
             port=8000,
-            test_command="pytest"
+            test_command="pytest",
+            probe_paths=["/docs", "/openapi.json"]
         ),
         "django": FrameworkConfig(
             name="django",
@@ -168,7 +186,8 @@ class FrameworkRegistry:
             dockerfile_template="java",
             port=8080,
             test_command="mvn test",
-            build_command="mvn package"
+            build_command="mvn package",
+            probe_paths=["/actuator/health"]
         ),
 
         # C#
@@ -217,18 +236,53 @@ class FrameworkRegistry:
 class YMLLSystem:
     """Główny system YMLL v3"""
 
+    # Ulepszone wzorce regex dla różnych formatów
+    JSON_PATTERNS = [
+        # Markdown code block z json
+        (r'```json\s*\n(.*?)\n```', "markdown_json_block"),
+        # Markdown code block bez specyfikacji języka
+        (r'```\s*\n(\{.*?\})\s*\n```', "markdown_generic_block"),
+        # JSON z otaczającym tekstem
+        (r'\{[^{}]*"components"[^{}]*\[[^\]]*\][^{}]*\}', "simple_components_pattern"),
+        # Bardziej złożony JSON z zagnieżdżonymi obiektami
+        (r'\{(?:[^{}]|\{[^{}]*\})*"components"(?:[^{}]|\{[^{}]*\})*\}', "complex_components_pattern"),
+        # Najbardziej elastyczny wzorzec - wszystko od { do }
+        (r'(\{.*\})', "full_json_capture"),
+    ]
+
     def __init__(self,
                  project_name: str = "GenerycznyApp",
                  model: LLMModel = LLMModel.QWEN_CODER,
-                 iterations_dir: str = "./iterations"):
+                 iterations_dir: str = "./iterations",
+                 runtime: Optional[Runtime] = None):
 
         self.project_name = project_name
         self.model = model
         self.iterations_dir = Path(iterations_dir)
         self.config_file = Path("ymll.config.yaml")
         self.docker_compose_file = Path("docker-compose.yml")
+        self.runtime = runtime or create_runtime("docker", self.docker_compose_file)
+        # Runtime bazowy - każda iteracja dostaje z niego runtime swojego projektu compose
+        self._base_runtime = self.runtime
+        self.project: Optional[str] = None
+        config = self._load_config()
+        # Prefiks projektów compose - rozdziela uruchomienia z różnych katalogów roboczych
+        self.project_prefix = (config.get("project") or {}).get("compose_prefix", DEFAULT_PROJECT_PREFIX)
+        self.ports = PortAllocator(Path(DEFAULT_PORTS_FILE), port_ranges_from_config(config))
         self.registry_file = Path("registry.yaml")
         self.max_iterations = 5
+        self.readiness_deadline = DEFAULT_DEADLINE
+        self.build_state_file = Path(DEFAULT_STATE_FILE)
+        self.compose_timeout = 120
+        self.patch_context_chars = 60000
+        self._failed_layers: List[str] = []
+        self._started_services: List[str] = []
+        self._log_failures: Dict[str, Any] = {}
+        # Nagrywanie/odtwarzanie wywołań LLM (--llm record/replay)
+        self.llm_recorder: Optional[LLMRecorder] = None
+        self.llm_replay: Optional[LLMReplay] = None
+        # Pomiar etapów generate_iteration (benchmark generate_bench.py)
+        self.stage_timer: Optional[StageTimer] = None
 
         # Utwórz katalogi
         self.iterations_dir.mkdir(exist_ok=True)
@@ -236,6 +290,13 @@ class YMLLSystem:
         Path("templates").mkdir(exist_ok=True)
         Path("logs").mkdir(exist_ok=True)
 
+    def _load_config(self) -> Dict[str, Any]:
+        """ymll.config.yaml (pusty słownik przed init)"""
+        if not self.config_file.exists():
+            return {}
+        with open(self.config_file) as f:
+            return yaml.safe_load(f) or {}
+
     def init_project(self):
         """Inicjalizacja projektu"""
         logger.info("🎯 Inicjalizacja projektu YMLL v3...")
@@ -244,6 +305,7 @@ class YMLLSystem:
         config = {
             "project": {
                 "name": self.project_name,
+                "compose_prefix": self.project_prefix,
                 "version": "3.0",
                 "description": "Multi-framework code generation with self-healing"
             },
@@ -403,23 +465,32 @@ def health_check(url: str, timeout: int = 5) -> bool:
             (iter_path / layer).mkdir(parents=True, exist_ok=True)
 
         # Generuj prompt
-        prompt = self._generate_smart_prompt(description, frameworks)
+        with self._stage("prompt"):
+            prompt = self._generate_smart_prompt(description, frameworks)
 
         # Wywołaj LLM
-        llm_response = self._call_llm(prompt, iter_path)
+        with self._stage("llm"):
+            llm_response = self._call_llm(prompt, iter_path)
 
-        # Parsuj i generuj komponenty
+        # Parsuj i generuj komponenty (etapy parse/files/dockerfile mierzone wewnątrz)
         components = self._parse_and_generate(llm_response, iter_path)
 
         # Walidacja
-        if self._validate_iteration(iter_path):
+        with self._stage("validate"):
+            valid = self._validate_iteration(iter_path)
+        if valid:
             logger.info(f"✅ Iteracja {iter_name} wygenerowana pomyślnie")
-            self._update_docker_compose(iter_path)
+            with self._stage("compose"):
+                self._update_docker_compose(iter_path)
         else:
             logger.error(f"❌ Walidacja iteracji {iter_name} nie powiodła się")
 
         return iter_path
 
+    def _stage(self, name: str):
+        """Pomiar etapu, gdy podpięto StageTimer (inaczej bez kosztu)"""
+        return self.stage_timer.stage(name) if self.stage_timer else nullcontext()
+
     def _generate_smart_prompt(self, description: str, frameworks: Optional[Dict[str, str]] = None) -> str:
         """Generowanie inteligentnego promptu dla LLM"""
 
@@ -478,6 +549,8 @@ IMPORTANT:
 - Use proper dependency versions
 - Include all required files
 - Code must be production-ready
+- Servers MUST listen on the port from the PORT environment variable
+  (defaults: frontend {CONTAINER_PORTS['frontend']}, backend {CONTAINER_PORTS['backend']}, api {CONTAINER_PORTS['api']})
 - Response MUST be valid JSON only
 """
         return prompt
@@ -491,22 +564,31 @@ IMPORTANT:
             # Zapisz prompt
             (iter_path / "prompt.txt").write_text(prompt)
 
-            # Wywołaj Ollama
-            result = subprocess.run(
-                ["ollama", "run", self.model.value],
-                input=prompt,
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-
-            response = result.stdout
+            if self.llm_replay:
+                response = self.llm_replay.complete(prompt)
+            else:
+                # Wywołaj Ollama
+                start = time.perf_counter()
+                result = subprocess.run(
+                    ["ollama", "run", self.model.value],
+                    input=prompt,
+                    capture_output=True,
+                    text=True,
+                    timeout=60
+                )
+
+                response = result.stdout
+                if self.llm_recorder and result.returncode == 0:
+                    self.llm_recorder.record(prompt, response, time.perf_counter() - start, self.model.value)
 
             # Zapisz surową odpowiedź
             (iter_path / "llm_response_raw.txt").write_text(response)
 
             return response
 
+        except ReplayMiss:
+            # Odtwarzanie ma być deterministyczne - bez cichego przejścia na odpowiedź fallback
+            raise
         except subprocess.TimeoutExpired:
             logger.error("❌ Timeout podczas wywołania LLM")
             return self._get_fallback_response()
@@ -514,35 +596,17 @@ IMPORTANT:
             logger.error(f"❌ Błąd wywołania LLM: {e}")
             return self._get_fallback_response()
 
-    def _parse_and_generate(self, llm_response: str, iter_path: Path) -> Dict:
-        """Parsowanie odpowiedzi LLM i generowanie plików"""
+    def _extract_components_json(self, llm_response: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """Wyciąga JSON z komponentami z odpowiedzi LLM: (dane, metoda) lub (None, None)"""
 
-        logger.info("🔍 Rozpoczynam parsowanie odpowiedzi LLM...")
-        logger.debug(f"Długość odpowiedzi LLM: {len(llm_response)} znaków")
-        logger.debug(f"Pierwsze 200 znaków odpowiedzi: {llm_response[:200]}")
-        
         # Próbuj wyciągnąć JSON na różne sposoby
         data = None
         extraction_method = None
 
-        # Ulepszone wzorce regex dla różnych formatów
-        json_patterns = [
-            # Markdown code block z json
-            (r'```json\s*\n(.*?)\n```', "markdown_json_block"),
-            # Markdown code block bez specyfikacji języka
-            (r'```\s*\n(\{.*?\})\s*\n```', "markdown_generic_block"),
-            # JSON z otaczającym tekstem
-            (r'\{[^{}]*"components"[^{}]*\[[^\]]*\][^{}]*\}', "simple_components_pattern"),
-            # Bardziej złożony JSON z zagnieżdżonymi obiektami
-            (r'\{(?:[^{}]|\{[^{}]*\})*"components"(?:[^{}]|\{[^{}]*\})*\}', "complex_components_pattern"),
-            # Najbardziej elastyczny wzorzec - wszystko od { do }
-            (r'(\{.*\})', "full_json_capture"),
-        ]
-
-        logger.info(f"🔍 Testuję {len(json_patterns)} wzorców JSON...")
+        logger.info(f"🔍 Testuję {len(self.JSON_PATTERNS)} wzorców JSON...")
 
-        for i, (pattern, method_name) in enumerate(json_patterns, 1):
-            logger.debug(f"Wzorzec {i}/{len(json_patterns)} ({method_name}): {pattern[:50]}...")
+        for i, (pattern, method_name) in enumerate(self.JSON_PATTERNS, 1):
+            logger.debug(f"Wzorzec {i}/{len(self.JSON_PATTERNS)} ({method_name}): {pattern[:50]}...")
             
             try:
                 matches = re.findall(pattern, llm_response, re.DOTALL | re.MULTILINE)
@@ -613,6 +677,32 @@ IMPORTANT:
                 logger.debug(f"Błąd wzorca {method_name}: {str(e)}")
                 continue
 
+        return data, extraction_method
+
+    def _parse_and_generate(self, llm_response: str, iter_path: Path) -> Dict:
+        """Parsowanie odpowiedzi LLM i generowanie plików"""
+
+        with self._stage("parse"):
+            data = self._parse_components(llm_response, iter_path)
+
+        # Generuj pliki
+        logger.info("🔨 Rozpoczynam generowanie plików komponentów...")
+        for i, component in enumerate(data.get("components", []), 1):
+            logger.info(f"🔨 Generuję komponent {i}/{len(data.get('components', []))}: {component.get('name', 'unnamed')}")
+            self._generate_component_files(component, iter_path)
+
+        logger.info("✅ Parsowanie i generowanie plików zakończone pomyślnie")
+        return data
+
+    def _parse_components(self, llm_response: str, iter_path: Path) -> Dict:
+        """Komponenty z odpowiedzi LLM (lub fallback) zapisane z metadanymi parsowania"""
+
+        logger.info("🔍 Rozpoczynam parsowanie odpowiedzi LLM...")
+        logger.debug(f"Długość odpowiedzi LLM: {len(llm_response)} znaków")
+        logger.debug(f"Pierwsze 200 znaków odpowiedzi: {llm_response[:200]}")
+        
+        data, extraction_method = self._extract_components_json(llm_response)
+
         # Jeśli nie udało się sparsować, użyj fallback
         if not data:
             logger.warning("⚠️ Nie znaleziono prawidłowego JSON w odpowiedzi LLM")
@@ -628,7 +718,7 @@ Długość odpowiedzi: {len(llm_response)}
 
 === TESTOWANE WZORCE ===
 """
-            for i, (pattern, method_name) in enumerate(json_patterns, 1):
+            for i, (pattern, method_name) in enumerate(self.JSON_PATTERNS, 1):
                 debug_content += f"{i}. {method_name}: {pattern}\n"
             
             debug_file.write_text(debug_content)
@@ -656,13 +746,6 @@ Długość odpowiedzi: {len(llm_response)}
         metadata_file.write_text(json.dumps(metadata, indent=2))
         logger.debug(f"💾 Zapisano metadane parsowania do: {metadata_file}")
 
-        # Generuj pliki
-        logger.info("🔨 Rozpoczynam generowanie plików komponentów...")
-        for i, component in enumerate(data.get("components", []), 1):
-            logger.info(f"🔨 Generuję komponent {i}/{len(data.get('components', []))}: {component.get('name', 'unnamed')}")
-            self._generate_component_files(component, iter_path)
-
-        logger.info("✅ Parsowanie i generowanie plików zakończone pomyślnie")
         return data
 
     def _sanitize_json_string(self, json_str: str) -> str:
@@ -738,26 +821,28 @@ Długość odpowiedzi: {len(llm_response)}
         layer_path = iter_path / layer
         layer_path.mkdir(parents=True, exist_ok=True)
 
-        for filename, content in files.items():
-            filepath = layer_path / filename
+        with self._stage("files"):
+            for filename, content in files.items():
+                filepath = layer_path / filename
 
-            # Utwórz podkatalogi jeśli plik jest w podkatalogu (np. pages/index.js)
-            if "/" in filename:
-                filepath.parent.mkdir(parents=True, exist_ok=True)
+                # Utwórz podkatalogi jeśli plik jest w podkatalogu (np. pages/index.js)
+                if "/" in filename:
+                    filepath.parent.mkdir(parents=True, exist_ok=True)
 
-            # Sanityzacja zawartości
-            if filename.endswith(('.json', '.yaml', '.yml')):
-                content = self._sanitize_config_file(content, filename)
+                # Sanityzacja zawartości
+                if filename.endswith(('.json', '.yaml', '.yml')):
+                    content = self._sanitize_config_file(content, filename)
 
-            # Specjalna obsługa Next.js package.json
-            if filename == "package.json" and framework == "nextjs":
-                content = self._fix_nextjs_package_json(content)
+                # Specjalna obsługa Next.js package.json
+                if filename == "package.json" and framework == "nextjs":
+                    content = self._fix_nextjs_package_json(content)
 
-            filepath.write_text(content)
-            logger.info(f"  ✅ Utworzono: {filepath}")
+                filepath.write_text(content)
+                logger.info(f"  ✅ Utworzono: {filepath}")
 
         # Generuj Dockerfile
-        self._generate_dockerfile(layer_path, layer, framework)
+        with self._stage("dockerfile"):
+            self._generate_dockerfile(layer_path, layer, framework)
 
     def _fix_nextjs_package_json(self, content: str) -> str:
         """Naprawia package.json dla Next.js"""
@@ -808,15 +893,8 @@ Długość odpowiedzi: {len(llm_response)}
     def _generate_dockerfile(self, layer_path: Path, layer: str, framework: str):
         """Generowanie Dockerfile dla warstwy"""
 
-        # Mapowanie portów dla warstw
-        port_map = {
-            "frontend": 3003,
-            "backend": 3100,
-            "api": 3200,
-            "workers": None
-        }
-
-        port = port_map.get(layer, 3003)
+        # Port w kontenerze jest stały dla warstwy; port hosta przydziela PortAllocator
+        port = None if layer == "workers" else CONTAINER_PORTS.get(layer, CONTAINER_PORTS["frontend"])
 
         # Znajdź odpowiedni template
         if framework in FrameworkRegistry.FRAMEWORKS:
@@ -961,48 +1039,99 @@ CMD ["sh", "-c", "echo 'No specific runtime detected'"]"""
         return valid
 
     def _update_docker_compose(self, iter_path: Path):
-        """Aktualizacja docker-compose.yml"""
+        """docker-compose.yml iteracji z portami hosta z alokatora"""
 
         compose = {
             "services": {}
         }
 
-        ports = {"frontend": 3003, "backend": 3100, "api": 3200}
+        layers = [layer for layer in ["frontend", "backend", "api", "workers"]
+                  if (iter_path / layer / "Dockerfile").exists()]
+        project = iteration_project(iter_path, self.project_prefix)
+        host_ports = self.ports.allocate(project, [layer for layer in layers if layer in CONTAINER_PORTS])
+        frameworks = self._layer_frameworks(iter_path)
 
-        for layer in ["frontend", "backend", "api", "workers"]:
+        for layer in layers:
             layer_path = iter_path / layer
-            if layer_path.exists() and (layer_path / "Dockerfile").exists():
-                service_config = {
-                    "build": str(layer_path),
-                    "restart": "unless-stopped",
-                    "environment": {
-                        "NODE_ENV": "production",
-                        "PYTHONUNBUFFERED": "1"
-                    }
+            service_config = {
+                # Ścieżka bezwzględna - compose iteracji leży w jej katalogu, nie w katalogu roboczym
+                "build": str(layer_path.resolve()),
+                "restart": "unless-stopped",
+                "environment": {
+                    "NODE_ENV": "production",
+                    "PYTHONUNBUFFERED": "1"
                 }
+            }
 
-                if layer in ports:
-                    service_config["ports"] = [f"{ports[layer]}:{ports[layer]}"]
+            if layer in CONTAINER_PORTS:
+                port = CONTAINER_PORTS[layer]
+                service_config["environment"]["PORT"] = str(port)
+                service_config["ports"] = [f"{host_ports[layer]}:{port}"]
+                fw_config = FrameworkRegistry.FRAMEWORKS.get(frameworks.get(layer, ""))
+                healthcheck = healthcheck_for(self._layer_language(layer_path, fw_config), port)
+                if healthcheck:
+                    service_config["healthcheck"] = healthcheck
 
-                compose["services"][layer] = service_config
+            compose["services"][layer] = service_config
 
-        with open(self.docker_compose_file, 'w') as f:
+        with open(iter_path / "docker-compose.yml", 'w') as f:
             yaml.dump(compose, f, default_flow_style=False)
+        self._use_iteration(iter_path)
 
-        logger.info("✅ Docker Compose zaktualizowany")
+        ports_info = ", ".join(f"{layer}:{port}" for layer, port in sorted(host_ports.items()))
+        logger.info(f"✅ Docker Compose zaktualizowany (projekt: {project}, porty: {ports_info or '-'})")
 
-    def run_self_healing(self, max_attempts: int = 5):
-        """Uruchomienie self-healing workflow"""
+    def _use_iteration(self, iter_path: Path):
+        """Compose, stan builda i runtime wskazują na projekt iteracji"""
+        self.project = iteration_project(iter_path, self.project_prefix)
+        self.docker_compose_file = iter_path / "docker-compose.yml"
+        self.build_state_file = state_file_for(self.project)
+        self.runtime = self._base_runtime.for_project(self.project, self.docker_compose_file)
+
+    def _layer_frameworks(self, iter_path: Path) -> Dict[str, str]:
+        """Warstwa -> framework na podstawie components.json iteracji"""
+        components_file = iter_path / "components.json"
+        if not components_file.exists():
+            return {}
+        try:
+            components = json.loads(components_file.read_text()).get("components", [])
+        except (json.JSONDecodeError, AttributeError):
+            return {}
+        frameworks = {}
+        for component in components:
+            layer = component.get("layer", "")
+            layer = "workers" if layer.lower() == "worker" else layer
+            frameworks.setdefault(layer, component.get("framework", ""))
+        return frameworks
+
+    def _layer_language(self, layer_path: Path, fw_config: Optional[FrameworkConfig]) -> str:
+        """Język runtime warstwy: obraz końcowego etapu Dockerfile, potem FrameworkConfig"""
+        from_lines = [line.split()[1] for line in (layer_path / "Dockerfile").read_text().splitlines()
+                      if line.upper().startswith("FROM ") and len(line.split()) > 1]
+        image = from_lines[-1] if from_lines else ""
+        if image.startswith("python"):
+            return "python"
+        if image.startswith("node"):
+            return "javascript"
+        return fw_config.language if fw_config else "shell"
+
+    def run_self_healing(self, max_attempts: int = 5, iteration: Optional[str] = None):
+        """Uruchomienie self-healing workflow (domyślnie najnowszej iteracji)"""
 
         logger.info("🔄 Uruchamianie self-healing workflow...")
 
-        # Znajdź najnowszą iterację
+        # Znajdź wskazaną lub najnowszą iterację
         iterations = sorted([d for d in self.iterations_dir.iterdir() if d.is_dir()])
+        if iteration:
+            iterations = [d for d in iterations if d.name == iteration]
         if not iterations:
-            logger.error("❌ Brak iteracji do uruchomienia")
+            logger.error(f"❌ Brak iteracji do uruchomienia{f': {iteration}' if iteration else ''}")
             return False
 
         latest_iter = iterations[-1]
+        if not (latest_iter / "docker-compose.yml").exists():
+            self._update_docker_compose(latest_iter)
+        self._use_iteration(latest_iter)
         
         # Skonfiguruj logowanie do pliku w folderze iteracji
         log_file = latest_iter / "logs.txt"
@@ -1014,14 +1143,18 @@ CMD ["sh", "-c", "echo 'No specific runtime detected'"]"""
         # Dodaj handler do loggera
         logger.addHandler(file_handler)
         
-        logger.info(f"🎯 Uruchamianie iteracji: {latest_iter.name}")
+        logger.info(f"🎯 Uruchamianie iteracji: {latest_iter.name} (projekt: {self.project})")
         logger.info(f"📄 Logi zapisywane do: {log_file}")
 
+        patch_rejected = False
         for attempt in range(1, max_attempts + 1):
             logger.info(f"========== Próba {attempt}/{max_attempts} ==========")
 
+            # Odrzucony patch - próba nieudana bez ponownego testowania niezmienionego stosu
+            if patch_rejected:
+                logger.warning(f"❌ Próba {attempt} nieudana: patch odrzucony, kolejny patch dla {latest_iter.name}")
             # Uruchom Docker Compose
-            if self._run_docker_compose():
+            elif self._run_docker_compose():
                 # Testy E2E
                 if self._run_e2e_tests():
                     logger.info("✅ Wszystkie testy przeszły pomyślnie!")
@@ -1038,8 +1171,9 @@ CMD ["sh", "-c", "echo 'No specific runtime detected'"]"""
 
             # Generuj patch jeśli to nie ostatnia próba
             if attempt < max_attempts:
-                self._generate_fix_patch(latest_iter)
-                latest_iter = sorted([d for d in self.iterations_dir.iterdir() if d.is_dir()])[-1]
+                patched = self._generate_fix_patch(latest_iter)
+                patch_rejected = patched is None
+                latest_iter = patched or latest_iter
 
         logger.error(f"⚠️ Self-healing zakończony po {max_attempts} próbach bez sukcesu")
         
@@ -1050,130 +1184,236 @@ CMD ["sh", "-c", "echo 'No specific runtime detected'"]"""
         return False
 
     def _run_docker_compose(self) -> bool:
-        """Uruchomienie Docker Compose"""
+        """Uruchomienie Docker Compose (przebudowa tylko zmienionych usług)"""
 
         try:
-            # Stop existing
-            subprocess.run(["docker-compose", "down"], capture_output=True)
-
-            # Build and run
-            result = subprocess.run(
-                ["docker-compose", "up", "--build", "-d"],
-                capture_output=True,
-                text=True,
-                timeout=120
-            )
-
-            if result.returncode == 0:
-                logger.info("🐳 Docker Compose uruchomiony")
-                time.sleep(10)  # Czekaj na start
-                return True
+            with open(self.docker_compose_file) as f:
+                compose = yaml.safe_load(f) or {}
+
+            self._failed_layers = []
+            self._log_failures = {}
+            hashes = service_hashes(compose)
+            plan = plan_rebuild(hashes, load_build_state(self.build_state_file), self._running_services())
+            self._started_services = plan.rebuild
+
+            runtime = self.runtime
+            if plan.full:
+                # Pierwsze uruchomienie lub stos zatrzymany - pełny build
+                runtime.down()
+                steps = [lambda: runtime.up(build=True, remove_orphans=True)]
+            elif plan.rebuild:
+                logger.info(f"♻️ Przebudowa: {', '.join(plan.rebuild)}; bez zmian: {', '.join(plan.keep) or '-'}")
+                steps = [lambda: runtime.build(plan.rebuild)]
+                if plan.keep:
+                    steps.append(lambda: runtime.up(plan.keep, recreate=False, remove_orphans=True))
+                steps.append(lambda: runtime.up(plan.rebuild, recreate=True, no_deps=True))
             else:
-                logger.error(f"❌ Docker Compose błąd: {result.stderr}")
-                return False
+                logger.info("♻️ Brak zmian w usługach - pomijam przebudowę")
+                steps = []
+
+            for step in steps:
+                result = step()
+                if result.returncode != 0:
+                    logger.error(f"❌ Docker Compose błąd ({runtime.name}): {result.stderr}")
+                    self._failed_layers = [name for name in plan.rebuild if name in result.stderr]
+                    # Nieudane usługi zostaną przebudowane przy następnej próbie
+                    state = {name: value for name, value in hashes.items() if name in plan.keep}
+                    save_build_state(self.build_state_file, state)
+                    return False
+
+            save_build_state(self.build_state_file, hashes)
+            logger.info(f"🐳 Stos uruchomiony (runtime: {self.runtime.name})")
+            return self._wait_for_services()
 
         except Exception as e:
             logger.error(f"❌ Błąd Docker Compose: {e}")
             return False
 
+    def _running_services(self) -> List[str]:
+        """Usługi compose z działającym kontenerem/procesem"""
+        return self.runtime.running_services()
+
+    def _wait_for_services(self) -> bool:
+        """Czeka na gotowość wymaganych warstw (healthcheck/port) z backoffem"""
+
+        with open(self.docker_compose_file) as f:
+            compose = yaml.safe_load(f) or {}
+
+        logger.info("⏳ Oczekiwanie na gotowość usług...")
+        # Logi (re)startowanych usług śledzone na bieżąco - znana awaria przerywa czekanie
+        started = self._started_services
+        follower = LogFollower(services=started, command=self.runtime.log_command(started)).start() \
+            if started else None
+        try:
+            report = wait_until_ready(targets_from_compose(compose), deadline=self.readiness_deadline,
+                                      state_fn=self.runtime.health,
+                                      failures_fn=follower.failed_services if follower else None)
+        finally:
+            if follower:
+                follower.stop()
+        report.log()
+
+        self._log_failures = dict(follower.failures) if follower else {}
+        for service, failure in self._log_failures.items():
+            logger.error(f"  🧾 {service} ({failure.signature}):\n{failure.excerpt}")
+        self._failed_layers = list(report.failed) + [layer for layer in report.pending if layer in report.required]
+
+        if report.ok:
+            logger.info(f"✅ Usługi gotowe po {report.elapsed:.1f}s")
+        else:
+            logger.error(f"❌ Usługi niegotowe po {report.elapsed:.1f}s")
+        return report.ok
+
     def _run_e2e_tests(self) -> bool:
-        """Uruchomienie testów E2E"""
+        """Uruchomienie testów E2E (równoległe sondy wszystkich warstw)"""
+
+        with open(self.docker_compose_file) as f:
+            compose = yaml.safe_load(f) or {}
 
-        import requests
+        framework_paths = {
+            layer: FrameworkRegistry.FRAMEWORKS[framework].probe_paths
+            for layer, framework in self._compose_frameworks(compose).items()
+            if framework in FrameworkRegistry.FRAMEWORKS
+        }
+        results = probe_layers(endpoints_from_compose(compose, framework_paths))
 
         tests_passed = []
+        for layer, result in results.items():
+            required = layer in REQUIRED_LAYERS
+            if result.ok:
+                logger.info(f"  {layer.capitalize()}: ✅ ({result.url}, {result.seconds:.2f}s)")
+            elif required:
+                logger.error(f"  {layer.capitalize()}: ❌ Niedostępny")
+            else:
+                logger.warning(f"  {layer.capitalize()}: ⚠️ Niedostępny (opcjonalne)")
+            if required:
+                tests_passed.append(result.ok)
+
+        missing = [layer for layer in REQUIRED_LAYERS if layer not in results]
+        for layer in missing:
+            logger.error(f"  {layer.capitalize()}: ❌ Brak usługi w docker-compose")
+
+        self._failed_layers = [layer for layer, result in results.items()
+                               if layer in REQUIRED_LAYERS and not result.ok]
+        return bool(tests_passed) and all(tests_passed) and not missing
+
+    def _compose_frameworks(self, compose: Dict) -> Dict[str, str]:
+        """Frameworki warstw z components.json iteracji wskazanej przez compose"""
+        for service in compose.get("services", {}).values():
+            build = service.get("build")
+            if isinstance(build, str):
+                return self._layer_frameworks(Path(build).parent)
+        return {}
 
-        # Test frontend
-        try:
-            resp = requests.get("http://localhost:3003", timeout=5)
-            tests_passed.append(resp.status_code == 200)
-            logger.info(f"  Frontend: {'✅' if resp.status_code == 200 else '❌'}")
-        except:
-            tests_passed.append(False)
-            logger.error("  Frontend: ❌ Niedostępny")
-
-        # Test backend (FastAPI)
-        backend_urls = [
-            "http://localhost:3100/api/status",
-            "http://localhost:3100/docs",  # FastAPI docs
-            "http://localhost:3100/"  # Root endpoint
+    def _generate_fix_patch(self, parent_iter: Path) -> Optional[Path]:
+        """Patch naprawczy: LLM dostaje tylko pliki i logi padającej warstwy; None gdy iteracja nie przeszła walidacji"""
+
+        layers = self._failed_layers or [
+            layer for layer in REQUIRED_LAYERS if (parent_iter / layer / "Dockerfile").exists()
         ]
-        backend_ok = False
-        for url in backend_urls:
-            try:
-                resp = requests.get(url, timeout=5)
-                if resp.status_code == 200:
-                    backend_ok = True
-                    logger.info(f"  Backend: ✅ ({url})")
-                    break
-            except:
-                continue
+        logger.info(f"🔧 Generowanie patcha naprawczego dla: {', '.join(layers)}")
 
-        if not backend_ok:
-            logger.error("  Backend: ❌ Niedostępny")
-        tests_passed.append(backend_ok)
-
-        # Test API (FastAPI) - opcjonalne
-        if Path("docker-compose.yml").exists():
-            with open("docker-compose.yml") as f:
-                compose_content = f.read()
-                if "api:" in compose_content:
-                    api_urls = [
-                        "http://localhost:3200/api/v1/info",
-                        "http://localhost:3200/api/v1/products",
-                        "http://localhost:3200/docs",
-                        "http://localhost:3200/"
-                    ]
-                    api_ok = False
-                    for url in api_urls:
-                        try:
-                            resp = requests.get(url, timeout=5)
-                            if resp.status_code == 200:
-                                api_ok = True
-                                logger.info(f"  API: ✅ ({url})")
-                                break
-                        except:
-                            continue
+        # Nowa iteracja = hardlinki warstw rodzica tylko do odczytu (zapis w miejscu nie trafi do rodzica);
+        # zmieniane pliki są odłączane przy zapisie (write_private)
+        iter_num = len([d for d in self.iterations_dir.iterdir() if d.is_dir()]) + 1
+        iter_path = self.iterations_dir / f"{iter_num:02d}_patch_{'_'.join(layers)}"
+        for layer in ["frontend", "backend", "api", "workers"]:
+            if (parent_iter / layer).is_dir():
+                link_tree(parent_iter / layer, iter_path / layer, read_only=True)
+        if (parent_iter / "components.json").exists():
+            link_or_copy(parent_iter / "components.json", iter_path / "components.json", read_only=True)
 
-                    if not api_ok:
-                        logger.warning("  API: ⚠️ Niedostępny (opcjonalne)")
-                    # API jest opcjonalne, więc nie dodajemy do tests_passed
+        frameworks = self._layer_frameworks(parent_iter)
+        prompt = self._generate_patch_prompt(iter_path, layers, frameworks)
+        llm_response = self._call_llm(prompt, iter_path)
+        data, extraction_method = self._extract_components_json(llm_response)
 
-        return all(tests_passed)
+        changed = []
+        if data:
+            for component in data.get("components", []):
+                changed += self._apply_patch_component(component, iter_path, layers)
+        else:
+            logger.warning("⚠️ Patch bez poprawnego JSON - iteracja bez zmian")
 
-    def _generate_fix_patch(self, parent_iter: Path):
-        """Generowanie patcha naprawczego"""
+        valid = self._validate_iteration(iter_path)
+        patch_info = {
+            "parent": parent_iter.name,
+            "layers": layers,
+            "files": changed,
+            "parsing_method": extraction_method,
+            "valid": valid,
+            "timestamp": time.time()
+        }
+        (iter_path / "patch.json").write_text(json.dumps(patch_info, indent=2))
+        logger.info(f"🩹 Patch {iter_path.name}: {len(changed)} plików zmienionych")
 
-        logger.info("🔧 Generowanie patcha naprawczego...")
+        if not valid:
+            logger.error(f"❌ Patch {iter_path.name} odrzucony - iteracja nie przeszła walidacji")
+            return None
+        self._update_docker_compose(iter_path)
+        return iter_path
 
-        # Zbierz logi błędów
-        error_logs = self._collect_error_logs()
+    def _generate_patch_prompt(self, iter_path: Path, layers: List[str], frameworks: Dict[str, str]) -> str:
+        """Prompt z plikami i logami wyłącznie padających warstw"""
 
-        # Generuj prompt naprawczy
-        prompt = f"""Fix the following errors in the code:
+        sections = []
+        budget = self.patch_context_chars
+        for layer in layers:
+            layer_path = iter_path / layer
+            framework = frameworks.get(layer, "unknown")
+            sections.append(f"=== LAYER {layer} ({framework}) ===")
+            failure = self._log_failures.get(layer)
+            if failure:
+                sections.append(f"DETECTED FAILURE ({failure.signature}):\n{failure.excerpt}")
+            sections.append(f"LOGS:\n{self._collect_error_logs([layer], tail=200)}")
+            for file_path in sorted(walk_files(layer_path, use_gitignore=False)):
+                content = file_path.read_text(errors="replace")
+                if len(content) > budget:
+                    sections.append(f"--- {file_path.relative_to(layer_path).as_posix()} (pominięty, za duży) ---")
+                    continue
+                budget -= len(content)
+                sections.append(f"--- {file_path.relative_to(layer_path).as_posix()} ---\n{content}")
+
+        context = "\n\n".join(sections)
+        return f"""Fix the failing layers of a multi-service application: {', '.join(layers)}.
+
+{context}
+
+Return ONLY JSON in this format:
+{{"components": [{{"name": "<layer>", "layer": "<layer>", "framework": "<framework>", "files": {{"<path>": "<complete new file content>"}}}}]}}
+Include only the files that must change, each with its complete content.
+Focus on fixing the specific errors in the logs.
+"""
 
-ERRORS:
-{error_logs}
+    def _apply_patch_component(self, component: Dict, iter_path: Path, layers: List[str]) -> List[str]:
+        """Zapisuje pliki patcha (copy-on-write) w warstwach objętych patchem"""
 
-Generate ONLY the fixed files in JSON format.
-Focus on fixing the specific errors mentioned.
-"""
+        layer = component.get("layer", "")
+        layer = "workers" if layer.lower() == "worker" else layer
+        if layer not in layers:
+            logger.info(f"  ℹ️ Pomijam warstwę spoza patcha: {layer or 'unknown'}")
+            return []
 
-        # Wygeneruj nową iterację z poprawkami
-        self.generate_iteration(f"fix_patch_for_{parent_iter.name}")
+        layer_path = iter_path / layer
+        changed = []
+        for filename, content in component.get("files", {}).items():
+            target = contained_path(layer_path, filename)
+            if target is None or not isinstance(content, str):
+                logger.warning(f"  ⚠️ Odrzucono plik patcha: {filename}")
+                continue
+            if filename.endswith(('.json', '.yaml', '.yml')):
+                content = self._sanitize_config_file(content, filename)
+            write_private(target, content)
+            changed.append(f"{layer}/{filename}")
+            logger.info(f"  ✅ Zmieniono: {layer}/{filename}")
 
-    def _collect_error_logs(self) -> str:
-        """Zbieranie logów błędów z Docker"""
+        if not (layer_path / "Dockerfile").exists():
+            self._generate_dockerfile(layer_path, layer, component.get("framework", ""))
+        return changed
 
-        try:
-            result = subprocess.run(
-                ["docker-compose", "logs", "--tail=50"],
-                capture_output=True,
-                text=True
-            )
-            return result.stdout
-        except:
-            return "Unable to collect logs"
+    def _collect_error_logs(self, services: Optional[List[str]] = None, tail: int = 50) -> str:
+        """Zbieranie logów błędów z runtime (opcjonalnie tylko wybranych usług)"""
+        return self.runtime.logs(services, tail=tail)
 
     def _get_fallback_response(self) -> str:
         """Fallback response gdy LLM nie działa"""
@@ -1194,7 +1434,8 @@ Focus on fixing the specific errors mentioned.
                         "server.js": """const express = require('express');
 const app = express();
 app.get('/', (req, res) => res.send('<h1>Frontend Running</h1>'));
-app.listen(3003, () => console.log('Frontend on port 3003'));""",
+const port = process.env.PORT || 3003;
+app.listen(port, () => console.log(`Frontend on port ${port}`));""",
                         "package.json": """{
   "name": "frontend",
   "version": "1.0.0",
@@ -1281,6 +1522,17 @@ def main():
                         help='LLM model to use')
     parser.add_argument('--frameworks', type=str,
                         help='Frameworks to use (format: frontend:express,backend:fastapi)')
+    parser.add_argument('--runtime', choices=RUNTIMES, default='docker',
+                        help='Runtime: docker (docker-compose) or local (subprocesses, no Docker)')
+    parser.add_argument('--iteration', type=str,
+                        help='Iteration to run (default: latest); iterations run side by side on own ports')
+    parser.add_argument('--llm', choices=LLM_MODES, default='live',
+                        help='LLM mode: live (Ollama), record (Ollama + cassette) or replay (cassette only)')
+    parser.add_argument('--cassette', type=str, help='Cassette file (JSON Lines) for record/replay')
+    parser.add_argument('--replay-latency', type=float,
+                        help='Replay: simulated first-token latency in seconds (default: recorded timing)')
+    parser.add_argument('--replay-tokens-per-s', type=float,
+                        help='Replay: simulated generation rate (default: recorded timing)')
 
     args = parser.parse_args()
 
@@ -1298,7 +1550,12 @@ def main():
     model = model_map.get(args.model, LLMModel.QWEN_CODER)
 
     # Initialize system
-    system = YMLLSystem(model=model)
+    system = YMLLSystem(model=model, runtime=create_runtime(args.runtime))
+    try:
+        system.llm_recorder, system.llm_replay = create_llm_stand_in(
+            args.llm, args.cassette, args.replay_latency, args.replay_tokens_per_s)
+    except ValueError as e:
+        parser.error(str(e))
 
     # Execute command
     if args.command == 'init':
@@ -1316,10 +1573,18 @@ def main():
                 layer, fw = pair.split(':')
                 frameworks[layer] = fw
 
-        system.generate_iteration(args.description, frameworks)
+        try:
+            system.generate_iteration(args.description, frameworks)
+        except ReplayMiss as e:
+            logger.error(f"❌ {e}")
+            raise SystemExit(1)
 
     elif args.command == 'run':
-        system.run_self_healing()
+        try:
+            system.run_self_healing(iteration=args.iteration)
+        except ReplayMiss as e:
+            logger.error(f"❌ {e}")
+            raise SystemExit(1)
 
     elif args.command == 'test':
         run_tests()
@@ -1331,21 +1596,29 @@ def main():
         if iterations:
             print(f"  Ostatnia: {sorted(iterations)[-1].name}")
 
-        # Docker status
-        result = subprocess.run(["docker-compose", "ps"], capture_output=True)
-        if result.returncode == 0:
-            print("  Docker: ✅ Uruchomiony")
-        else:
-            print("  Docker: ❌ Nie uruchomiony")
+        # Status usług - osobno dla każdego projektu compose
+        projects = compose_projects(system.iterations_dir, system.project_prefix)
+        if not projects:
+            print(f"  Runtime ({system.runtime.name}): ❌ Nie uruchomiony")
+        for project, compose_file in projects.items():
+            running = system.runtime.for_project(project, compose_file).running_services()
+            ports = ", ".join(f"{layer}:{port}" for layer, port in sorted(system.ports.lookup(project).items()))
+            if running:
+                print(f"  {project} ({system.runtime.name}): ✅ Uruchomione: {', '.join(running)} [{ports}]")
+            else:
+                print(f"  {project} ({system.runtime.name}): ❌ Nie uruchomiony [{ports}]")
 
     elif args.command == 'clean':
         logger.info("🧹 Czyszczenie projektu...")
-        subprocess.run(["docker-compose", "down"], capture_output=True)
-        # Clean Python cache
-        for cache_dir in Path(".").rglob("__pycache__"):
-            shutil.rmtree(cache_dir)
-        for cache_dir in Path(".").rglob("node_modules"):
-            shutil.rmtree(cache_dir)
+        for project, compose_file in compose_projects(system.iterations_dir, system.project_prefix).items():
+            system.runtime.for_project(project, compose_file).down()
+            state_file_for(project).unlink(missing_ok=True)
+        for project in system.ports.allocations():
+            system.ports.release(project)
+        system.build_state_file.unlink(missing_ok=True)
+        # Clean Python cache i node_modules (bez schodzenia do usuwanych katalogów)
+        for cache_dir in list(find_dirs(Path("."), ["__pycache__", "node_modules"])):
+            shutil.rmtree(cache_dir, ignore_errors=True)
         logger.info("✅ Wyczyszczono")
 
 
@@ -1,11 +1,27 @@
 """Konfiguracja globalna dla testów."""
 
+import importlib.util
 import pytest
 import sys
 from pathlib import Path
 
 # Dodanie ścieżki do modułów projektu
 sys.path.insert(0, str(Path(__file__).parent.parent / "ymll"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "coval"))
+# pymll na końcu - pymll/ymll.py nie może przesłaniać pakietu ymll/
+sys.path.append(str(Path(__file__).parent.parent / "pymll"))
+
+
+@pytest.fixture(scope="session")
+def pymll_ymll():
+    """Moduł pymll/ymll.py załadowany pod własną nazwą (obok pakietu ymll/)."""
+    if "pymll_ymll" not in sys.modules:
+        path = Path(__file__).parent.parent / "pymll" / "ymll.py"
+        spec = importlib.util.spec_from_file_location("pymll_ymll", path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["pymll_ymll"] = module
+        spec.loader.exec_module(module)
+    return sys.modules["pymll_ymll"]
 
 
 @pytest.fixture(scope="session")
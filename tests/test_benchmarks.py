@@ -0,0 +1,30 @@
+"""Testy benchmarku etapów naprawy (coval)."""
+
+from benchmarks import bench_repair, compare_results, generate_mixed_repo
+
+
+def test_mixed_repo_contents(tmp_path):
+    """Repozytorium zawiera wiele języków, testy, requirements i stacktrace."""
+    repo = generate_mixed_repo(tmp_path / "repo", 200, seed=1)
+    suffixes = {p.suffix for p in repo.rglob("*") if p.is_file()}
+    assert {".py", ".js", ".go", ".java", ".txt"} <= suffixes
+    assert list(repo.rglob("test_*.py"))
+    stacktrace = (tmp_path / "stacktrace.txt").read_text()
+    for line in stacktrace.splitlines():
+        if line.strip().startswith("File"):
+            assert (repo / line.split('"')[1]).exists()
+
+
+def test_bench_repair_is_deterministic():
+    """Etapy przechodzą z atrapą LLM, a wyniki są porównywalne."""
+    first = bench_repair([40], seed=3, workers=1, memory=False)
+    second = bench_repair([40], seed=3, workers=1, memory=True)
+    run = first["runs"][0]
+    assert set(run["stages"]) == {"triage_cold", "triage_warm", "create_mre", "prepare_context", "generate_fix"}
+    assert run["llm_calls"] == 3 and run["proposals"] == 3
+    assert run["technical_debt"] == second["runs"][0]["technical_debt"]
+    assert second["runs"][0]["stages"]["triage_cold"]["peak_mb"] is not None
+
+    rows = compare_results(first, second)
+    assert len(rows) == 5
+    assert all(row["files"] == 40 for row in rows)
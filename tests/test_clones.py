@@ -0,0 +1,66 @@
+"""Testy wykrywania klonów metodą winnowing (coval)."""
+
+from clones import FINGERPRINT_SAMPLE, CloneIndex, fingerprint_source, kgram_hashes, normalize_lines, winnow
+
+
+def _block(prefix, lines=10):
+    return "".join(f"result_{i} = {prefix}_call({i}, data[{i}])\n" for i in range(lines))
+
+
+def test_normalization_ignores_whitespace_and_comments():
+    """Wcięcia, puste linie i komentarze nie wpływają na odciski."""
+    original = _block("load")
+    reformatted = "# komentarz\n\n" + "\n".join("    " + line for line in original.splitlines()) + "\n"
+    assert [h for h, _ in fingerprint_source(original)] == [h for h, _ in fingerprint_source(reformatted)]
+
+
+def test_comment_prefixes_depend_on_language():
+    """Linia zaczynająca się od '*' to kod w Pythonie, a komentarz w JS."""
+    source = "*head, last = values\n* continuation of block comment\n"
+    assert [line for _, line in normalize_lines(source, ".py")] == [
+        "*head, last = values", "* continuation of block comment"]
+    assert normalize_lines(source, ".js") == []
+
+
+def test_sampled_fingerprints_are_consistent_subset():
+    """Próbka to podzbiór pełnych odcisków wybrany tak samo w każdym pliku."""
+    source = _block("load", 60)
+    full = fingerprint_source(source)
+    sampled = fingerprint_source(source, sample=FINGERPRINT_SAMPLE)
+    assert sampled and len(sampled) < len(full)
+    assert all(pair in full and pair[0] % FINGERPRINT_SAMPLE == 0 for pair in sampled)
+
+
+def test_rolling_hash_matches_direct_computation():
+    """Rolling hash daje te same wartości co liczenie każdego k-gramu od zera."""
+    lines = normalize_lines(_block("x", 8))
+    rolled = kgram_hashes(lines, k=3)
+    direct = [kgram_hashes(lines[i:i + 3], k=3)[0] for i in range(len(lines) - 2)]
+    assert rolled == direct
+
+
+def test_winnow_selects_rightmost_minimum():
+    """Winnowing wybiera minimum okna i nie powtarza tego samego odcisku."""
+    hashes = [(77, 1), (74, 2), (42, 3), (17, 4), (98, 5), (50, 6), (17, 7), (98, 8)]
+    assert winnow(hashes, window=4) == [(17, 4), (17, 7)]
+
+
+def test_multiline_clone_detected_across_files():
+    """Wieloliniowy klon w dwóch plikach jest wykryty i zaraportowany."""
+    index = CloneIndex()
+    index.add_source("a.py", "def a():\n    pass\n" + _block("shared"))
+    index.add_source("b.py", _block("shared") + "print('inny koniec')\n")
+    index.add_source("c.py", _block("unique"))
+    assert index.clones
+    assert index.clones[0]["original"].startswith("a.py:")
+    assert index.clones[0]["duplicate"].startswith("b.py:")
+    assert 0 < index.duplication_ratio() < 1
+
+
+def test_index_memory_is_bounded():
+    """Po przekroczeniu limitu indeks przechodzi na próbkowanie."""
+    index = CloneIndex(max_entries=20)
+    for i in range(50):
+        index.add_source(f"f{i}.py", _block(f"mod{i}", 12))
+    assert len(index.occurrences) <= 20
+    assert index.sample_modulus > 1
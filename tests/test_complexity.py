@@ -0,0 +1,65 @@
+"""Testy silnika złożoności opartego na AST (coval)."""
+
+from complexity import analyze_files, analyze_python_source, debt_from_complexity, parallel_map
+
+
+def test_keywords_in_strings_and_comments_are_ignored():
+    """Słowa kluczowe w napisach i komentarzach nie zwiększają złożoności."""
+    source = 's = "if x: for y in z: while True"\n# if for while\n'
+    result = analyze_python_source(source)
+    assert not result["parse_error"]
+    assert result["decision_points"] == 0
+
+
+def test_cyclomatic_and_cognitive_complexity():
+    """Złożoność liczona per funkcja, z karą za zagnieżdżenie."""
+    source = (
+        "def f(x):\n"
+        "    if x and y:\n"
+        "        for i in x:\n"
+        "            if i:\n"
+        "                pass\n"
+        "    else:\n"
+        "        pass\n"
+    )
+    result = analyze_python_source(source)
+    # if + and + for + if
+    assert result["decision_points"] == 4
+    assert result["cyclomatic_max"] == 5
+    # if(1) + and(1) + for(2) + if(3) + else(1)
+    assert result["cognitive_max"] == 8
+    assert result["functions"] == 1
+
+
+def test_syntax_error_falls_back_to_keyword_heuristic():
+    """Plik z błędem składni jest oceniany heurystyką słów kluczowych."""
+    result = analyze_python_source("def broken(:\n    if x:\n        pass\n")
+    assert result["parse_error"]
+    assert result["decision_points"] == 1
+
+
+def test_debt_from_complexity_penalizes_cognitive_excess():
+    """Nadwyżka kognitywna ponad próg zwiększa dług."""
+    base = {"decision_points": 4, "cognitive_excess": 0}
+    assert debt_from_complexity(base) == 2.0
+    assert debt_from_complexity(dict(base, cognitive_excess=4)) == 3.0
+
+
+def test_parallel_map_sequential_for_small_inputs():
+    """Dla małych list parallel_map działa sekwencyjnie i zachowuje kolejność."""
+    assert parallel_map(abs, [-3, 2, -1], workers=4) == [3, 2, 1]
+
+
+def test_deeply_nested_file_is_unanalyzable_not_fatal(tmp_path):
+    """RecursionError w jednym pliku nie przerywa skanu ani nie psuje puli."""
+    deep = tmp_path / "generated.py"
+    deep.write_text("def f(x):\n    return " + "+".join(["x"] * 20000) + "\n")
+    files = [deep]
+    for i in range(70):
+        path = tmp_path / f"m{i}.py"
+        path.write_text("def g(x):\n    if x:\n        return 1\n")
+        files.append(path)
+
+    results = dict(analyze_files(files, workers=2))
+    assert results[str(deep)]["unanalyzable"] and not results[str(deep)]["parse_error"]
+    assert all(results[str(path)]["decision_points"] == 1 for path in files[1:])
@@ -0,0 +1,91 @@
+"""Testy przyrostowej przebudowy usług compose (pymll/compose_build.py)."""
+
+from types import SimpleNamespace
+
+import yaml
+
+from compose_build import directory_hash, plan_rebuild, service_hashes
+
+
+def _layer(root, name, content):
+    path = root / name
+    path.mkdir(parents=True, exist_ok=True)
+    (path / "main.py").write_text(content)
+    (path / "Dockerfile").write_text("FROM python:3.11-slim\n")
+    return path
+
+
+def test_hash_ignores_location_but_tracks_content(tmp_path):
+    first = _layer(tmp_path / "iter_1", "backend", "print(1)\n")
+    second = _layer(tmp_path / "iter_2", "backend", "print(1)\n")
+    assert directory_hash(first) == directory_hash(second)
+
+    (second / "main.py").write_text("print(2)\n")
+    assert directory_hash(first) != directory_hash(second)
+
+
+def test_service_hashes_track_build_context_and_config(tmp_path):
+    first = _layer(tmp_path / "iter_1", "backend", "print(1)\n")
+    second = _layer(tmp_path / "iter_2", "backend", "print(1)\n")
+    compose = {"services": {"backend": {"build": {"context": str(first)}, "ports": ["8000:8000"]},
+                            "db": {"image": "postgres:16"}}}
+    hashes = service_hashes(compose)
+    assert set(hashes) == {"backend", "db"}
+
+    compose["services"]["backend"]["build"] = str(second)
+    assert service_hashes(compose) == hashes
+
+    (second / "main.py").write_text("print(2)\n")
+    changed = service_hashes(compose)
+    assert changed["backend"] != hashes["backend"] and changed["db"] == hashes["db"]
+
+    compose["services"]["db"]["environment"] = {"POSTGRES_DB": "app"}
+    assert service_hashes(compose)["db"] != hashes["db"]
+
+
+def test_plan_rebuilds_only_changed_or_stopped():
+    hashes = {"frontend": "a", "backend": "b2", "api": "c"}
+    plan = plan_rebuild(hashes, {"frontend": "a", "backend": "b1", "api": "c"}, ["frontend", "backend"])
+    assert plan.rebuild == ["api", "backend"]
+    assert plan.keep == ["frontend"]
+    assert not plan.full
+
+    assert plan_rebuild(hashes, {}, ["frontend"]).full
+    assert plan_rebuild(hashes, {"frontend": "a"}, []).full
+
+
+def test_self_healing_attempt_rebuilds_only_patched_layer(tmp_path, monkeypatch, pymll_ymll):
+    monkeypatch.chdir(tmp_path)
+    ymll = pymll_ymll
+
+    system = ymll.YMLLSystem()
+    system._wait_for_services = lambda: True
+    commands = []
+
+    def fake_run(command, **kwargs):
+        commands.append(command)
+        stdout = "frontend\nbackend\n" if command[1:3] == ["ps", "--services"] else ""
+        return SimpleNamespace(returncode=0, stdout=stdout, stderr="")
+
+    monkeypatch.setattr(ymll.subprocess, "run", fake_run)
+
+    def write_compose(iter_name, backend_code):
+        services = {}
+        for layer, code in (("frontend", "print('f')\n"), ("backend", backend_code)):
+            services[layer] = {"build": str(_layer(tmp_path / iter_name, layer, code))}
+        (tmp_path / "docker-compose.yml").write_text(yaml.dump({"services": services}))
+
+    write_compose("iter_1", "print('b')\n")
+    assert system._run_docker_compose()
+    assert ["docker-compose", "up", "-d", "--build", "--remove-orphans"] in commands
+
+    commands.clear()
+    write_compose("iter_2", "print('fixed')\n")
+    assert system._run_docker_compose()
+    assert ["docker-compose", "build", "--parallel", "backend"] in commands
+    assert ["docker-compose", "up", "-d", "--no-build", "--force-recreate", "--no-deps", "backend"] in commands
+    assert ["docker-compose", "down"] not in commands
+
+    commands.clear()
+    assert system._run_docker_compose()
+    assert not any("build" in c or "up" in c for c in commands)
@@ -0,0 +1,72 @@
+"""Testy celowanych patchy naprawczych w pętli self-healing (pymll)."""
+
+import json
+
+
+def test_fix_patch_touches_only_failing_layer(tmp_path, monkeypatch, pymll_ymll):
+    monkeypatch.chdir(tmp_path)
+    ymll = pymll_ymll
+
+    system = ymll.YMLLSystem()
+    parent = tmp_path / "iterations" / "01_app"
+    for layer, filename, content in (("frontend", "server.js", "// ok\n"),
+                                     ("backend", "main.py", "import missing_module\n")):
+        (parent / layer).mkdir(parents=True)
+        (parent / layer / filename).write_text(content)
+        (parent / layer / "Dockerfile").write_text("FROM python:3.11-slim\n")
+    (parent / "components.json").write_text(json.dumps({"components": [
+        {"layer": "frontend", "framework": "express"}, {"layer": "backend", "framework": "fastapi"}]}))
+
+    prompts = []
+    response = json.dumps({"components": [
+        {"layer": "backend", "framework": "fastapi", "files": {"main.py": "print('fixed')\n"}},
+        {"layer": "frontend", "framework": "express", "files": {"server.js": "// rewritten\n"}}]})
+
+    def fake_llm(prompt, iter_path):
+        prompts.append(prompt)
+        return response
+
+    monkeypatch.setattr(system, "_call_llm", fake_llm)
+    monkeypatch.setattr(system, "_collect_error_logs",
+                        lambda services=None, tail=50: "ModuleNotFoundError: missing_module")
+    system._failed_layers = ["backend"]
+
+    patched = system._generate_fix_patch(parent)
+
+    assert patched.name == "02_patch_backend"
+    assert "import missing_module" in prompts[0] and "// ok" not in prompts[0]
+    assert (patched / "backend" / "main.py").read_text() == "print('fixed')\n"
+    assert (patched / "frontend" / "server.js").read_text() == "// ok\n"
+    assert (parent / "backend" / "main.py").read_text() == "import missing_module\n"
+    assert (patched / "frontend" / "server.js").stat().st_ino == (parent / "frontend" / "server.js").stat().st_ino
+    assert json.loads((patched / "patch.json").read_text())["files"] == ["backend/main.py"]
+    assert not (patched / "frontend" / "server.js").stat().st_mode & 0o222
+    assert json.loads((patched / "patch.json").read_text())["valid"] is True
+
+
+def test_patch_files_outside_layer_are_rejected(tmp_path, pymll_ymll):
+    system = pymll_ymll.YMLLSystem.__new__(pymll_ymll.YMLLSystem)
+    layer_path = tmp_path / "iter" / "backend"
+    layer_path.mkdir(parents=True)
+    (layer_path / "Dockerfile").write_text("FROM python:3.11-slim\n")
+    component = {"layer": "backend", "files": {"../frontend/x.js": "x", "/tmp/evil.py": "x", "app.py": "ok\n"}}
+
+    assert system._apply_patch_component(component, tmp_path / "iter", ["backend"]) == ["backend/app.py"]
+    assert not (tmp_path / "iter" / "frontend").exists()
+
+
+def test_rejected_patch_fails_attempt_without_retesting_parent(tmp_path, monkeypatch, pymll_ymll):
+    monkeypatch.chdir(tmp_path)
+    system = pymll_ymll.YMLLSystem()
+    parent = system.iterations_dir / "01_app"
+    (parent / "backend").mkdir(parents=True)
+    (parent / "backend" / "main.py").write_text("print(1)\n")
+    compose_runs, patches = [], []
+    monkeypatch.setattr(system, "_update_docker_compose", lambda iter_path: None)
+    monkeypatch.setattr(system, "_use_iteration", lambda iter_path: None)
+    monkeypatch.setattr(system, "_run_docker_compose", lambda: compose_runs.append(1) and False)
+    monkeypatch.setattr(system, "_generate_fix_patch", lambda iter_path: patches.append(iter_path))
+
+    assert system.run_self_healing(max_attempts=3) is False
+    assert len(compose_runs) == 1
+    assert patches == [parent, parent]
@@ -0,0 +1,68 @@
+"""Testy benchmarku etapów generate_iteration (pymll/generate_bench.py)."""
+
+import sys
+
+from generate_bench import STAGES, bench_generate, build_cases, compare_runs
+from stage_timer import StageTimer, peak_rss_mb, reset_peak_rss
+
+
+def test_stage_timer_accumulates_calls():
+    timer = StageTimer()
+    for _ in range(3):
+        with timer.stage("files"):
+            sum(range(1000))
+    stats = timer.to_dict()["files"]
+    assert stats["calls"] == 3
+    assert stats["s"] >= 0 and stats["peak_rss_mb"] > 0
+
+
+
+def test_peak_rss_without_proc_or_resource(monkeypatch):
+    # Systemy bez /proc i modułu resource (Windows): pomiar RSS degraduje do 0
+    import builtins
+    real_open = builtins.open
+
+    def no_proc_open(path, *args, **kwargs):
+        if str(path).startswith("/proc/"):
+            raise OSError(path)
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", no_proc_open)
+    monkeypatch.setitem(sys.modules, "resource", None)
+    assert peak_rss_mb() == 0.0 and reset_peak_rss() is False
+
+
+def test_bench_generate_measures_all_stages(tmp_path, pymll_ymll, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cases = build_cases(["Simple API"], ["frontend:express,backend:fastapi", "frontend:nextjs,backend:fastapi"])
+    results = bench_generate(lambda: pymll_ymll.YMLLSystem(), cases, repeats=2)
+
+    assert [run["case"] for run in results["runs"]] == ["1x1", "1x2"]
+    for run in results["runs"]:
+        assert list(run["stages"]) == STAGES
+        assert run["llm_misses"] == 0
+        # Pliki i Dockerfile mierzone per komponent odpowiedzi
+        assert run["stages"]["files"]["calls"] == run["stages"]["dockerfile"]["calls"] > 1
+    # Katalogi robocze przypadków nie trafiają do bieżącego katalogu
+    assert not (tmp_path / "iterations").exists()
+
+    rows = compare_runs(results, results)
+    assert len(rows) == 2 * len(STAGES) and not any(row["regression"] for row in rows)
+
+    slower = {"runs": [dict(run, stages={name: dict(stage, s=stage["s"] + 1.0)
+                                         for name, stage in run["stages"].items()})
+                       for run in results["runs"]]}
+    assert all(row["regression"] for row in compare_runs(results, slower))
+
+
+def test_bench_generate_flags_cassette_misses(tmp_path, pymll_ymll, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cassette = tmp_path / "empty.jsonl"
+    cassette.write_text("")
+    cases = build_cases(["Simple API"], ["frontend:express,backend:fastapi"])
+    results = bench_generate(lambda: pymll_ymll.YMLLSystem(), cases, cassette=cassette, repeats=2)
+
+    run = results["runs"][0]
+    # Pierwszy brak w kasecie przerywa przypadek - ścieżka zapasowa nie jest mierzona
+    assert run["llm_misses"] == 1 and run["total_s"] is None and run["stages"] == {}
+    assert compare_runs(results, results) == []
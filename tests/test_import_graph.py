@@ -0,0 +1,78 @@
+"""Testy statycznego grafu importów i wycinania MRE (coval)."""
+
+from benchmarks import StubRepairSystem
+from import_graph import (build_import_graph, import_closure, imported_modules, module_names,
+                          resolve_frame, reverse_closure)
+
+
+def _project(root):
+    files = {
+        "app/__init__.py": "",
+        "app/core.py": "from .helpers import clean\n\ndef run(x):\n    return clean(x) * 2\n",
+        "app/helpers.py": "import app.constants as constants\n\ndef clean(x):\n    return x or constants.DEFAULT\n",
+        "app/constants.py": "DEFAULT = 1\n",
+        "app/unrelated.py": "import json\n",
+        "tests/test_core.py": "from app.core import run\n\ndef test_run():\n    assert run(None) == 2\n",
+        "tests/test_unrelated.py": "from app import unrelated\n",
+        "other/tests/test_core.py": "def test_other():\n    pass\n",
+    }
+    for rel, content in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    return root
+
+
+def test_module_names_and_relative_imports():
+    """Nazwy modułów i rozwijanie importów względnych."""
+    assert module_names("src/pkg/mod.py") == ["src.pkg.mod", "pkg.mod", "mod"]
+    assert module_names("pkg/__init__.py") == ["pkg"]
+    assert imported_modules("from . import a\nfrom ..b import c\n", "pkg/sub/m.py") == {
+        "pkg.sub", "pkg.sub.a", "pkg.b", "pkg.b.c"}
+
+
+def test_graph_closures(tmp_path):
+    """Domknięcie importów w przód i wstecz."""
+    graph = build_import_graph(_project(tmp_path))
+    assert graph["app/core.py"] == {"app/helpers.py"}
+    assert import_closure(graph, ["app/core.py"]) == {"app/core.py", "app/helpers.py", "app/constants.py"}
+    assert "tests/test_core.py" in reverse_closure(graph, ["app/constants.py"])
+    assert "tests/test_unrelated.py" not in reverse_closure(graph, ["app/constants.py"])
+
+
+def test_resolve_frame_prefers_longest_match():
+    """Ścieżki absolutne z ramek dopasowywane są do najdłuższego sufiksu."""
+    files = ["tests/test_core.py", "other/tests/test_core.py", "app/core.py"]
+    assert resolve_frame("/srv/project/app/core.py", files) == "app/core.py"
+    assert resolve_frame("/srv/project/other/tests/test_core.py", files) == "other/tests/test_core.py"
+    assert resolve_frame("/usr/lib/python3.11/json/__init__.py", files) is None
+
+
+def test_mre_is_import_slice(tmp_path):
+    """MRE zawiera domknięcie importów ramek i tylko sięgające do niego testy."""
+    source = _project(tmp_path / "project")
+    error_file = tmp_path / "stacktrace.txt"
+    error_file.write_text('Traceback (most recent call last):\n'
+                          '  File "/srv/project/app/core.py", line 4, in run\n'
+                          '  File "/usr/lib/python3.11/json/__init__.py", line 1, in loads\n')
+    system = StubRepairSystem(repair_dir=str(tmp_path / "repairs"))
+
+    mre = system.create_mre(source, error_file, "T1") / "mre"
+    copied = sorted(p.relative_to(mre).as_posix() for p in mre.rglob("*.py"))
+    assert copied == ["src/app/__init__.py", "src/app/constants.py", "src/app/core.py", "src/app/helpers.py",
+                      "tests/tests/test_core.py"]
+
+
+def test_mre_skips_frames_outside_source(tmp_path):
+    """Pliki spoza grafu kopiowane są tylko z wnętrza katalogu źródeł."""
+    source = _project(tmp_path / "project")
+    (source / "web").mkdir()
+    (source / "web" / "app.js").write_text("throw new Error()\n")
+    (tmp_path / "secret.js").write_text("token\n")
+    error_file = tmp_path / "stacktrace.txt"
+    error_file.write_text('  File "web/app.js", line 1\n  File "../secret.js", line 1\n')
+    system = StubRepairSystem(repair_dir=str(tmp_path / "repairs"))
+
+    mre = system.create_mre(source, error_file, "T1") / "mre"
+    assert (mre / "src" / "web" / "app.js").exists()
+    assert not any(p.name == "secret.js" for p in tmp_path.joinpath("repairs").rglob("*"))
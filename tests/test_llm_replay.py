@@ -0,0 +1,101 @@
+"""Testy nagrywania i odtwarzania wywołań LLM (coval/llm_replay.py)."""
+
+import json
+import subprocess
+
+import pytest
+
+from llm_replay import LLMRecorder, LLMReplay, ReplayMiss, create_llm_stand_in, prompt_hash
+from repair import RepairSystem
+
+
+def test_replay_serves_recording_with_simulated_timing(tmp_path):
+    cassette = tmp_path / "llm.jsonl"
+    recorder = LLMRecorder(cassette)
+    recorder.record("logs 2025-09-25 11:20:05,306 boom", "x" * 400, seconds=2.5, model="qwen")
+    recorder.record("other", "old", seconds=1.0)
+    recorder.record("other", "new", seconds=1.0)
+
+    delays = []
+    replay = LLMReplay(cassette, sleep=delays.append)
+    # Znacznik czasu w prompcie nie zmienia hasha
+    assert replay.complete("logs 2026-01-01 00:00:00,001 boom") == "x" * 400
+    assert replay.complete("other") == "new"
+    assert delays == [2.5, 1.0]
+
+    delays.clear()
+    replay = LLMReplay(cassette, latency=0.2, tokens_per_s=50, sleep=delays.append)
+    replay.complete("logs 2025-09-25 11:20:05 boom")
+    assert delays == [pytest.approx(0.2 + 100 / 50)]
+
+    with pytest.raises(ReplayMiss):
+        replay.complete("never recorded")
+    assert replay.stats == {'hits': 1, 'misses': 1}
+
+
+class ReplayRepairSystem(RepairSystem):
+    def __init__(self, repair_dir, cassette):
+        self.cassette = cassette
+        super().__init__(repair_dir=repair_dir)
+
+    def _load_config(self, config_path):
+        config = self._get_default_config()
+        config['global']['llm'] = {'mode': 'replay', 'cassette': str(self.cassette), 'latency': 0}
+        return config
+
+
+def test_repair_system_replays_without_ollama(tmp_path, monkeypatch):
+    cassette = tmp_path / "llm.jsonl"
+    response = json.dumps({"files": {"app.py": "x = 1\n"}, "confidence": 0.9})
+    LLMRecorder(cassette).record("fix it", response, seconds=30.0)
+
+    calls = []
+    monkeypatch.setattr(subprocess, "run", lambda command, **kwargs: calls.append(command))
+    system = ReplayRepairSystem(str(tmp_path / "repairs"), cassette)
+
+    assert system._call_llm("fix it") == response
+    with pytest.raises(ReplayMiss):
+        system._call_llm("unknown prompt")
+    assert calls == []
+    assert prompt_hash("fix it") in system.llm_replay.recordings
+
+
+def test_missing_cassette_is_a_config_error(tmp_path, monkeypatch):
+    """Brak kasety: jeden czytelny ValueError; RepairSystem przechodzi na tryb live."""
+    with pytest.raises(ValueError, match="nie istnieje"):
+        create_llm_stand_in('replay', tmp_path / "missing.jsonl")
+    with pytest.raises(ValueError, match="wymaga"):
+        create_llm_stand_in('record', None)
+
+    monkeypatch.setattr(subprocess, "run", lambda command, **kwargs: None)
+    system = ReplayRepairSystem(str(tmp_path / "repairs"), tmp_path / "missing.jsonl")
+    assert system.llm_replay is None and system.llm_recorder is None
+
+
+def test_generate_iteration_replay_miss_fails_run(tmp_path, monkeypatch, pymll_ymll):
+    """Prompt spoza kasety przerywa generowanie zamiast cicho użyć odpowiedzi fallback."""
+    monkeypatch.chdir(tmp_path)
+    system = pymll_ymll.YMLLSystem()
+    cassette = tmp_path / "llm.jsonl"
+    LLMRecorder(cassette).record("other prompt", "{}", seconds=1.0)
+    system.llm_replay = LLMReplay(cassette, latency=0)
+
+    with pytest.raises(ReplayMiss):
+        system.generate_iteration("Shop", {"frontend": "express"})
+
+
+def test_generate_iteration_replays_offline(tmp_path, monkeypatch, pymll_ymll):
+    monkeypatch.chdir(tmp_path)
+    system = pymll_ymll.YMLLSystem()
+    frameworks = {"frontend": "express", "backend": "fastapi"}
+    cassette = tmp_path / "llm.jsonl"
+    LLMRecorder(cassette).record(system._generate_smart_prompt("Shop", frameworks),
+                                 json.dumps(system._get_fallback_data()), seconds=12.0)
+    system.llm_replay = LLMReplay(cassette, latency=0)
+    monkeypatch.setattr(pymll_ymll.subprocess, "run", lambda *a, **k: pytest.fail("ollama called"))
+
+    iter_path = system.generate_iteration("Shop", frameworks)
+
+    assert system.llm_replay.stats == {'hits': 1, 'misses': 0}
+    assert (iter_path / "backend" / "main.py").exists()
+    assert (iter_path / "docker-compose.yml").exists()
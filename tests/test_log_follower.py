@@ -0,0 +1,42 @@
+"""Testy śledzenia logów compose z sygnaturami awarii (pymll/log_follower.py)."""
+
+import time
+
+from log_follower import LogFollower
+from readiness import ServiceTarget, wait_until_ready
+
+
+def test_feed_buffers_per_service_and_matches_signature():
+    follower = LogFollower(services=["backend", "frontend"], buffer_lines=3)
+    for i in range(5):
+        follower.feed(f"frontend-1  | request {i}\n")
+    follower.feed("app_backend_1  | Traceback (most recent call last):\n")
+    follower.feed("app_backend_1  | ModuleNotFoundError: No module named 'fastapi'\n")
+
+    assert follower.tail("frontend") == "request 2\nrequest 3\nrequest 4"
+    assert follower.failed_services() == {"backend": "import_error"}
+    assert "Traceback" in follower.failures["backend"].excerpt
+
+
+def test_port_in_use_and_syntax_error_signatures():
+    follower = LogFollower()
+    follower.feed("api-1  | Error: listen EADDRINUSE: address already in use :::3200\n")
+    follower.feed("frontend-1  |     SyntaxError: Unexpected token '}'\n")
+    assert follower.failed_services() == {"api": "port_in_use", "frontend": "syntax_error"}
+
+
+def test_follower_streams_process_and_aborts_readiness():
+    script = "printf 'backend-1  | SyntaxError: invalid syntax\\n'; sleep 30"
+    follower = LogFollower(compose_cmd=["sh", "-c", script, "sh"], services=["backend"]).start()
+    try:
+        start = time.monotonic()
+        report = wait_until_ready([ServiceTarget("backend", 3100)],
+                                  state_fn=lambda layer: ("restarting", ""),
+                                  failures_fn=follower.failed_services,
+                                  initial_delay=0.05, deadline=10)
+    finally:
+        follower.stop()
+
+    assert not report.ok
+    assert report.failed == {"backend": "syntax_error"}
+    assert time.monotonic() - start < 5
@@ -0,0 +1,84 @@
+"""Testy przydziału portów i projektów compose per iteracja (pymll/ports.py)."""
+
+import json
+import sys
+
+import yaml
+
+from ports import PortAllocator, iteration_project, port_ranges_from_config, rewrite_url, split_port_ranges
+
+
+def test_allocator_skips_busy_and_reserved_ports(tmp_path):
+    busy = {3003}
+    allocator = PortAllocator(tmp_path / "ports.json", is_free=lambda port: port not in busy)
+
+    first = allocator.allocate("ymll-01_a", ["frontend", "backend"])
+    assert first == {"frontend": 3004, "backend": 3100}
+    # Ponowny przydział tego samego projektu zwraca te same porty
+    assert allocator.allocate("ymll-01_a", ["frontend", "backend"]) == first
+
+    second = PortAllocator(tmp_path / "ports.json", is_free=lambda port: True).allocate("ymll-02_b", ["frontend"])
+    assert second == {"frontend": 3003}
+
+    allocator.release("ymll-01_a")
+    assert set(allocator.allocations()) == {"ymll-02_b"}
+
+
+
+def test_allocator_without_fcntl(tmp_path, monkeypatch):
+    # Systemy bez fcntl (Windows): rezerwacje działają bez blokady pliku
+    monkeypatch.setitem(sys.modules, "fcntl", None)
+    allocator = PortAllocator(tmp_path / "ports.json", is_free=lambda port: True)
+    assert allocator.allocate("ymll-01_a", ["backend"]) == {"backend": 3100}
+    assert set(allocator.allocations()) == {"ymll-01_a"}
+
+
+def test_ranges_from_config_and_url_rewrite():
+    ranges = port_ranges_from_config({"layers": {"backend": {"port_range": [4100, 4199]}}})
+    assert ranges["backend"] == (4100, 4199) and ranges["frontend"] == (3003, 3099)
+    assert rewrite_url("http://localhost:3100/docs", {"backend": 4100}) == "http://localhost:4100/docs"
+    assert rewrite_url("http://localhost:9999/", {"backend": 4100}) == "http://localhost:9999/"
+
+
+def test_iterations_get_own_project_and_ports(tmp_path, monkeypatch, pymll_ymll):
+    monkeypatch.chdir(tmp_path)
+    system = pymll_ymll.YMLLSystem()
+    system.ports.is_free = lambda port: True
+
+    def make_iteration(name, patch_parent=None):
+        iter_path = tmp_path / "iterations" / name
+        for layer in ("frontend", "backend"):
+            (iter_path / layer).mkdir(parents=True)
+            (iter_path / layer / "Dockerfile").write_text("FROM python:3.11-slim\n")
+        if patch_parent:
+            (iter_path / "patch.json").write_text(json.dumps({"parent": patch_parent}))
+        system._update_docker_compose(iter_path)
+        return yaml.safe_load((iter_path / "docker-compose.yml").read_text())["services"]
+
+    first = make_iteration("01_a")
+    assert system.project == "ymll-01_a"
+    assert system.runtime.compose_cmd[1:3] == ["-p", "ymll-01_a"]
+    second = make_iteration("02_b")
+    assert first["backend"]["ports"] == ["3100:3100"]
+    assert second["backend"]["ports"] == ["3101:3100"]
+
+    # Patch działa w projekcie iteracji bazowej, na tych samych portach
+    patch = make_iteration("03_patch_backend", patch_parent="01_a")
+    assert iteration_project(tmp_path / "iterations" / "03_patch_backend") == "ymll-01_a"
+    assert patch["backend"]["ports"] == first["backend"]["ports"]
+    assert system.build_state_file.name == ".ymll_build_state.ymll-01_a.json"
+
+
+def test_split_port_ranges_are_disjoint():
+    ranges = {"frontend": (3003, 3099), "backend": (3100, 3199)}
+    slots = [split_port_ranges(ranges, slot, 3) for slot in range(3)]
+    assert slots[0]["frontend"] == (3003, 3034) and slots[1]["frontend"] == (3035, 3066)
+    backend = [set(range(low, high + 1)) for low, high in (s["backend"] for s in slots)]
+    assert not (backend[0] & backend[1] or backend[1] & backend[2])
+
+
+def test_compose_prefix_from_config(tmp_path, monkeypatch, pymll_ymll):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "ymll.config.yaml").write_text(yaml.dump({"project": {"compose_prefix": "ymll-s01"}}))
+    system = pymll_ymll.YMLLSystem()
+    assert iteration_project(tmp_path / "iterations" / "01_a", system.project_prefix) == "ymll-s01-01_a"
@@ -0,0 +1,57 @@
+"""Testy równoległych sond E2E (pymll/probes.py)."""
+
+import threading
+import time
+from types import SimpleNamespace
+
+from probes import endpoints_from_compose, probe_layers
+
+
+class FakeSession:
+    """Sesja zwracająca status wg URL; opcjonalne opóźnienie symuluje timeout"""
+
+    def __init__(self, statuses, delays=None):
+        self.statuses = statuses
+        self.delays = delays or {}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get(self, url, timeout):
+        with self.lock:
+            self.calls.append(url)
+        time.sleep(self.delays.get(url, 0))
+        status = self.statuses.get(url)
+        if status is None:
+            raise ConnectionError(url)
+        return SimpleNamespace(status_code=status)
+
+
+def test_endpoints_from_compose_and_framework_paths():
+    compose = {"services": {"backend": {"ports": ["3100:3100"]}, "workers": {}}}
+    endpoints = endpoints_from_compose(compose, {"backend": ["/docs"]})
+    assert endpoints == {"backend": ["http://localhost:3100/api/status",
+                                     "http://localhost:3100/docs",
+                                     "http://localhost:3100/"]}
+
+
+def test_probes_run_concurrently_and_short_circuit():
+    endpoints = {"frontend": ["http://f/"],
+                 "backend": ["http://b/api/status", "http://b/docs", "http://b/"]}
+    session = FakeSession({"http://f/": 200, "http://b/docs": 200, "http://b/": 200},
+                          delays={"http://f/": 0.3, "http://b/api/status": 0.3, "http://b/docs": 0.3})
+
+    start = time.monotonic()
+    results = probe_layers(endpoints, session=session, max_workers=4)
+    elapsed = time.monotonic() - start
+
+    assert results["frontend"].ok and results["backend"].ok
+    assert results["backend"].url in ("http://b/", "http://b/docs")
+    assert elapsed < 0.6
+
+
+def test_layer_fails_when_no_endpoint_answers_200():
+    session = FakeSession({"http://b/api/status": 500})
+    results = probe_layers({"backend": ["http://b/api/status", "http://b/"]}, session=session)
+    assert not results["backend"].ok
+    assert results["backend"].status == 500
+    assert len(session.calls) == 2
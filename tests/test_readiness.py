@@ -0,0 +1,89 @@
+"""Testy oczekiwania na gotowość usług compose (pymll/readiness.py)."""
+
+import json
+
+import yaml
+
+from readiness import ServiceTarget, healthcheck_for, targets_from_compose, wait_until_ready
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_healthcheck_matches_language():
+    assert healthcheck_for("python", 3100)["test"][1] == "python"
+    assert healthcheck_for("typescript", 3003)["test"][1] == "node"
+    assert "nc -z" in healthcheck_for("go", 3200)["test"][1]
+    assert healthcheck_for("python", None) is None
+
+
+def test_targets_from_compose_reads_ports():
+    compose = {"services": {"frontend": {"ports": ["3003:3003"]}, "workers": {}}}
+    targets = {t.layer: t for t in targets_from_compose(compose)}
+    assert targets["frontend"].port == 3003 and targets["frontend"].required
+    assert targets["workers"].port is None and not targets["workers"].required
+
+
+def test_wait_returns_when_required_ready_with_backoff():
+    clock = FakeClock()
+    states = {"frontend": lambda t: ("running", "healthy" if t >= 1.5 else "starting"),
+              "backend": lambda t: ("running", "")}
+    report = wait_until_ready(
+        [ServiceTarget("frontend", 3003), ServiceTarget("backend", 3100)],
+        state_fn=lambda layer: states[layer](clock.now),
+        port_check=lambda port: clock.now >= 0.5,
+        clock=clock, sleep=clock.sleep)
+
+    assert report.ok
+    assert report.ready["backend"] < report.ready["frontend"]
+    assert clock.sleeps[:3] == [0.25, 0.5, 1.0]
+
+
+def test_wait_fails_fast_on_exited_container():
+    clock = FakeClock()
+    report = wait_until_ready(
+        [ServiceTarget("frontend", 3003), ServiceTarget("backend", 3100)],
+        state_fn=lambda layer: ("exited", "") if layer == "backend" else ("running", "starting"),
+        clock=clock, sleep=clock.sleep, deadline=60)
+
+    assert not report.ok
+    assert "backend" in report.failed
+    assert report.elapsed == 0
+
+
+def test_wait_respects_deadline():
+    clock = FakeClock()
+    report = wait_until_ready([ServiceTarget("frontend", 3003)],
+                              state_fn=lambda layer: ("running", "starting"),
+                              clock=clock, sleep=clock.sleep, deadline=10)
+    assert not report.ok
+    assert report.pending == ["frontend"]
+    assert report.elapsed == 10
+
+
+def test_compose_gets_framework_healthchecks(tmp_path, monkeypatch, pymll_ymll):
+    monkeypatch.chdir(tmp_path)
+    system = pymll_ymll.YMLLSystem()
+    iter_path = tmp_path / "iterations" / "iter_1"
+    for layer, image in (("frontend", "node:20-alpine"), ("backend", "python:3.11-slim"), ("workers", "python:3.11-slim")):
+        (iter_path / layer).mkdir(parents=True)
+        (iter_path / layer / "Dockerfile").write_text(f"FROM {image}\n")
+    (iter_path / "components.json").write_text(json.dumps({"components": [
+        {"layer": "frontend", "framework": "nextjs"}, {"layer": "backend", "framework": "fastapi"}]}))
+
+    system._update_docker_compose(iter_path)
+    services = yaml.safe_load((iter_path / "docker-compose.yml").read_text())["services"]
+
+    assert services["frontend"]["healthcheck"]["test"][1] == "node"
+    assert "3100" in services["backend"]["healthcheck"]["test"][-1]
+    assert "healthcheck" not in services["workers"]
@@ -0,0 +1,161 @@
+"""Testy równoległego uruchamiania narzędzi analizy (ymll/run_analysis.py)."""
+
+import json
+import shlex
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from run_analysis import load_manifest, run_tools
+
+
+def python_tool(code: str, **settings) -> dict:
+    return {"name": sys.executable, "path": f"-c {shlex.quote(code)}", "timeout": 10, **settings}
+
+
+def test_tools_run_concurrently_and_stream_reports(tmp_path):
+    tools = [python_tool(f"import time; print('tool {i}'); time.sleep(0.5)") for i in range(3)]
+    start = time.perf_counter()
+    results = run_tools(tools, workers=3, reports_dir=tmp_path)
+
+    assert time.perf_counter() - start < 1.2
+    assert [r["returncode"] for r in results] == [0, 0, 0]
+    # Powtórzone narzędzie dostaje własny plik raportu, kolejność jak w manifeście
+    names = [Path(r["report"]).name for r in results]
+    assert len(set(names)) == 3
+    # Narzędzie podane ścieżką - raport i tak w katalogu raportów
+    assert all(Path(r["report"]).parent == tmp_path for r in results)
+    assert [r["output"].strip() for r in results] == ["tool 0", "tool 1", "tool 2"]
+
+
+def test_exclusive_tool_and_limits(tmp_path):
+    tools = [
+        python_tool("import time; time.sleep(0.3)"),
+        python_tool("import time; time.sleep(0.3)", parallel=False),
+        python_tool("import time; time.sleep(5)", timeout=0.5),
+        python_tool("x = bytearray(1024 * 2**20)", memory_mb=256),
+    ]
+    start = time.perf_counter()
+    results = run_tools(tools, workers=4, reports_dir=tmp_path)
+
+    # Narzędzie w wyłączności nie nakłada się na pozostałe
+    assert time.perf_counter() - start >= 0.6
+    assert results[2]["returncode"] == -1 and "TIMEOUT" in results[2]["output"]
+    assert results[3]["returncode"] != 0 and "MemoryError" in results[3]["output"]
+
+
+def test_memory_limit_without_preexec_fn(tmp_path, monkeypatch):
+    """Limit pamięci ustawia wrapper przed exec - Popen z puli wątków nie dostaje preexec_fn."""
+    import subprocess
+    popen = subprocess.Popen
+
+    def checked(*args, **kwargs):
+        assert kwargs.get("preexec_fn") is None
+        return popen(*args, **kwargs)
+
+    monkeypatch.setattr(subprocess, "Popen", checked)
+    probe = "import resource; print(resource.getrlimit(resource.RLIMIT_AS)[0])"
+    results = run_tools([python_tool(probe, memory_mb=300), {"name": "no-such-tool-xyz", "path": "",
+                                                              "timeout": 5, "memory_mb": 300}],
+                        workers=2, reports_dir=tmp_path)
+    assert results[0]["output"].strip() == str(300 * 2**20)
+    assert results[1]["returncode"] == -1 and "not found" in results[1]["output"]
+
+
+def test_manifest_tools_match_schema():
+    jsonschema = pytest.importorskip("jsonschema")
+    schema = json.loads(Path("manifest_schema.json").read_text())
+    tools = load_manifest().get("analysis_tools", [])
+    assert tools
+    jsonschema.validate(tools, schema["properties"]["analysis_tools"])
+
+
+FAKE_LINTER = """#!{python}
+import sys
+from pathlib import Path
+with open({log!r}, "a") as log:
+    log.write(" ".join(a for a in sys.argv[1:] if not a.startswith("-")) + "\\n")
+paths = [Path(a) for a in sys.argv[1:] if not a.startswith("-")]
+files = [f for p in paths for f in (sorted(p.rglob("*.py")) if p.is_dir() else [p])]
+bad = [f for f in files if "BAD" in f.read_text()]
+for f in bad:
+    print(f"{{f.as_posix()}}:1:1: E999 bad line")
+sys.exit(1 if bad else 0)
+"""
+
+
+def make_project(root: Path):
+    (root / "src").mkdir()
+    (root / "tests").mkdir()
+    (root / "src" / "mod.py").write_text("def value():\n    return 1\n")
+    (root / "src" / "other.py").write_text("def other():\n    return 2\n")
+    (root / "tests" / "test_mod.py").write_text(
+        "import sys\nsys.path.insert(0, 'src')\nfrom mod import value\n\ndef test_value():\n    assert value() == 1\n")
+    (root / "tests" / "test_other.py").write_text(
+        "import sys\nsys.path.insert(0, 'src')\nfrom other import other\n\ndef test_other():\n    assert other() == 2\n")
+
+
+def test_incremental_analysis_reuses_cached_results(tmp_path, monkeypatch):
+    from analysis_cache import AnalysisCache
+
+    project = tmp_path / "project"
+    project.mkdir()
+    make_project(project)
+    monkeypatch.chdir(project)
+    tools = []
+    for name in ("flake8", "mypy"):
+        linter = tmp_path / "bin" / name
+        linter.parent.mkdir(exist_ok=True)
+        linter.write_text(FAKE_LINTER.format(python=sys.executable, log=str(tmp_path / f"{name}.log")))
+        linter.chmod(0o755)
+        tools.append({"name": str(linter), "path": "src/"})
+    tools.append({"name": "pytest", "path": "-p no:cacheprovider tests/"})
+
+    def analyse(full=False):
+        cache = AnalysisCache(tmp_path / "cache.json", project)
+        results = run_tools(tools, workers=3, reports_dir=tmp_path / "reports", cache=cache, full=full)
+        cache.save()
+        return {Path(r["tool"]).name: r for r in results}
+
+    first = analyse()
+    assert all(r["returncode"] == 0 for r in first.values())
+    assert "2 passed" in first["pytest"]["output"]
+
+    # Zmiana jednego modułu: flake8 tylko na nim, mypy na całym zakresie, test tylko dotknięty
+    (project / "src" / "mod.py").write_text("def value():\n    return 1  # BAD\n")
+    second = analyse()
+    flake8_runs = (tmp_path / "flake8.log").read_text().splitlines()
+    assert flake8_runs[-1] == "src/mod.py"
+    assert (tmp_path / "mypy.log").read_text().splitlines()[-1] == "src/"
+    assert second["flake8"]["returncode"] == 1 and "src/mod.py:1:1: E999" in second["flake8"]["output"]
+    assert "1 passed" in second["pytest"]["output"]
+    assert "uruchomiono 1 z 2" in second["pytest"]["output"]
+
+    # Bez zmian: linters nie są uruchamiane, błąd pozostaje w wyniku z cache
+    third = analyse()
+    assert len((tmp_path / "flake8.log").read_text().splitlines()) == len(flake8_runs)
+    assert len((tmp_path / "mypy.log").read_text().splitlines()) == 2
+    assert third["flake8"]["returncode"] == 1 and "src/mod.py:1:1: E999" in third["flake8"]["output"]
+    assert third["mypy"]["returncode"] == 1
+    assert "brak testów" in third["pytest"]["output"]
+
+    full = analyse(full=True)
+    assert (tmp_path / "flake8.log").read_text().splitlines()[-1] == "src/mod.py src/other.py"
+    assert "2 passed" in full["pytest"]["output"]
+
+    # Zmiana konfiguracji narzędzia lub danych testów wymusza pełne uruchomienie
+    (project / "tests" / "data.json").write_text("{}\n")
+    analyse()
+    runs = len((tmp_path / "flake8.log").read_text().splitlines())
+    (project / "setup.cfg").write_text("[flake8]\nmax-line-length = 100\n")
+    config_changed = analyse()
+    flake8_log = (tmp_path / "flake8.log").read_text().splitlines()
+    assert len(flake8_log) == runs + 1 and flake8_log[-1] == "src/mod.py src/other.py"
+    assert "2 passed" in config_changed["pytest"]["output"]
+
+    (project / "tests" / "data.json").write_text('{"value": 1}\n')
+    data_changed = analyse()
+    assert "uruchomiono 2 z 2" in data_changed["pytest"]["output"]
+    assert len((tmp_path / "flake8.log").read_text().splitlines()) == runs + 1
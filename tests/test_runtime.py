@@ -0,0 +1,107 @@
+"""Testy wymiennego runtime (pymll/runtime.py) - backend lokalny bez Dockera."""
+
+import socket
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+from runtime import DockerRuntime, LocalRuntime, Runtime, dockerfile_command, dockerfile_runtime
+from validation import dependency_hash, detect_stack
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _write_stack(root, marker):
+    services = {}
+    for layer, container_port in (("frontend", 3003), ("backend", 3100)):
+        path = root / "iterations" / "01_app" / layer
+        path.mkdir(parents=True, exist_ok=True)
+        (path / "index.html").write_text(f"{layer} {marker}\n")
+        (path / "Dockerfile").write_text(
+            f'FROM python:3.11-slim\nCOPY . .\nCMD ["python", "-m", "http.server", "{container_port}"]\n')
+        services[layer] = {"build": str(path), "ports": [f"{_free_port()}:{container_port}"]}
+    (root / "docker-compose.yml").write_text(yaml.dump({"services": services}))
+    return services
+
+
+def test_dockerfile_parsing():
+    dockerfile = 'FROM golang:1.21-alpine AS builder\nRUN go build -o main .\nFROM alpine\nCMD ["./main"]\n'
+    assert dockerfile_command(dockerfile) == ["./main"]
+    assert dockerfile_runtime(dockerfile) == "go"
+    assert dockerfile_command("CMD npm start") == ["sh", "-c", "npm start"]
+
+
+def test_docker_runtime_maps_to_compose_flags():
+    runtime = DockerRuntime(compose_cmd=["docker-compose", "-p", "x"])
+    assert runtime.log_command(["api"]) == ["docker-compose", "-p", "x", "logs", "-f", "--no-color", "api"]
+
+
+def test_incomplete_runtime_fails_on_creation():
+    class PartialRuntime(Runtime):
+        def build(self, services):
+            return None
+
+    with pytest.raises(TypeError):
+        PartialRuntime()
+
+
+def test_local_build_replaces_shipped_dependency_dirs(tmp_path, monkeypatch):
+    """node_modules i .venv-bin skopiowane z kontekstu builda zastępowane są dowiązaniami."""
+    services = {}
+    for layer, image, manifest in (("frontend", "node:20", "package.json"), ("backend", "python:3.11", "requirements.txt")):
+        path = tmp_path / layer
+        (path / "node_modules" / "left-pad").mkdir(parents=True)
+        (path / "node_modules" / "left-pad" / "index.js").write_text("module.exports = 1\n")
+        (path / ".venv-bin").mkdir()
+        (path / manifest).write_text("{}\n" if manifest == "package.json" else "pytest\n")
+        (path / "Dockerfile").write_text(f'FROM {image}\nCMD ["true"]\n')
+        services[layer] = {"build": str(path)}
+    (tmp_path / "docker-compose.yml").write_text(yaml.dump({"services": services}))
+    runtime = LocalRuntime(tmp_path / "docker-compose.yml", state_dir=tmp_path / "state", cache_dir=tmp_path / "cache")
+    node_dir = tmp_path / "cache" / "node" / dependency_hash(tmp_path / "frontend", detect_stack(tmp_path / "frontend"))[:16]
+    (node_dir / "node_modules").mkdir(parents=True)
+    (node_dir / ".ready").write_text("ok")
+    monkeypatch.setattr(runtime.venv_cache, "ensure", lambda path: Path(sys.executable))
+
+    assert runtime.build(["frontend", "backend"]).returncode == 0
+    frontend, backend = runtime._work_dir("frontend"), runtime._work_dir("backend")
+    assert (frontend / "node_modules").resolve() == (node_dir / "node_modules").resolve()
+    assert (backend / ".venv-bin").resolve() == Path(sys.executable).parent.resolve()
+    assert (tmp_path / "frontend" / "node_modules" / "left-pad" / "index.js").exists()
+
+
+def test_self_healing_loop_runs_on_local_runtime(tmp_path, monkeypatch, pymll_ymll):
+    monkeypatch.chdir(tmp_path)
+    services = _write_stack(tmp_path, "v1")
+    runtime = LocalRuntime(tmp_path / "docker-compose.yml", state_dir=tmp_path / ".ymll_local")
+    system = pymll_ymll.YMLLSystem(runtime=runtime)
+    system.readiness_deadline = 20
+
+    try:
+        assert system._run_docker_compose()
+        assert sorted(runtime.running_services()) == ["backend", "frontend"]
+        backend_port = int(services["backend"]["ports"][0].split(":")[0])
+        with socket.create_connection(("127.0.0.1", backend_port), timeout=2):
+            pass
+
+        result = runtime.exec("backend", ["cat", "index.html"])
+        assert result.stdout == "backend v1\n"
+
+        pids = {name: info["pid"] for name, info in runtime._load_state().items()}
+        (tmp_path / "iterations" / "01_app" / "backend" / "index.html").write_text("backend v2\n")
+        assert system._run_docker_compose()
+        new_pids = {name: info["pid"] for name, info in runtime._load_state().items()}
+        assert new_pids["frontend"] == pids["frontend"]
+        assert new_pids["backend"] != pids["backend"]
+        assert runtime.exec("backend", ["cat", "index.html"]).stdout == "backend v2\n"
+        assert f"port {backend_port}" in runtime.logs(["backend"])
+    finally:
+        runtime.down()
+
+    assert runtime.running_services() == []
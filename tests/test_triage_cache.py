@@ -0,0 +1,97 @@
+"""Testy inkrementalnego cache metryk triage (coval)."""
+
+import os
+
+from triage_cache import TriageCache, build_clone_index
+
+
+def _make_source(root):
+    (root / "pkg").mkdir(parents=True)
+    (root / "pkg" / "app.py").write_text('"""Moduł"""\nif x:\n    pass\n')
+    (root / "pkg" / "util.py").write_text("for i in range(3):\n    pass\n")
+    (root / "tests").mkdir()
+    (root / "tests" / "test_app.py").write_text("def test_ok():\n    assert True\n")
+    (root / "README.md").write_text("docs")
+
+
+def test_second_scan_uses_cache(tmp_path):
+    """Drugi scan bez zmian nie przelicza żadnego pliku."""
+    source = tmp_path / "src"
+    _make_source(source)
+    cache_dir = tmp_path / "cache"
+
+    first = TriageCache(cache_dir, source)
+    metrics = first.scan()
+    assert first.stats["computed"] == 3
+    assert set(metrics) == {"pkg/app.py", "pkg/util.py", "tests/test_app.py"}
+    assert metrics["tests/test_app.py"]["is_test"]
+
+    second = TriageCache(cache_dir, source)
+    assert second.scan() == metrics
+    assert second.stats["computed"] == 0
+    assert second.stats["hits"] == 3
+
+
+
+def test_workspace_outputs_skipped_only_at_workspace_root(tmp_path):
+    """repairs/ w katalogu roboczym pomijane, pakiet projektu archive/ zostaje."""
+    _make_source(tmp_path)
+    (tmp_path / "pkg" / "archive").mkdir()
+    (tmp_path / "pkg" / "archive" / "store.py").write_text("x = 1\n")
+    (tmp_path / "repairs" / "repair-1" / "src").mkdir(parents=True)
+    (tmp_path / "repairs" / "repair-1" / "src" / "copy.py").write_text("x = 1\n")
+
+    metrics = TriageCache(tmp_path / "repairs" / "triage_cache", tmp_path, workspace_root=tmp_path).scan()
+    assert set(metrics) == {"pkg/app.py", "pkg/util.py", "pkg/archive/store.py", "tests/test_app.py"}
+
+
+def test_changed_and_removed_files(tmp_path):
+    """Zmieniony plik jest przeliczany, usunięty znika z cache."""
+    source = tmp_path / "src"
+    _make_source(source)
+    cache_dir = tmp_path / "cache"
+    TriageCache(cache_dir, source).scan()
+
+    (source / "pkg" / "util.py").write_text("while True:\n    break\nif a:\n    pass\n")
+    (source / "tests" / "test_app.py").unlink()
+
+    cache = TriageCache(cache_dir, source)
+    metrics = cache.scan()
+    assert cache.stats["computed"] == 1
+    assert cache.stats["removed"] == 1
+    assert metrics["pkg/util.py"]["complexity"]["decision_points"] == 2
+    assert "tests/test_app.py" not in metrics
+
+
+def test_touched_file_is_rehashed_not_recomputed(tmp_path):
+    """Zmiana samego mtime nie powoduje przeliczenia metryk."""
+    source = tmp_path / "src"
+    _make_source(source)
+    cache_dir = tmp_path / "cache"
+    TriageCache(cache_dir, source).scan()
+
+    target = source / "pkg" / "app.py"
+    stat = target.stat()
+    os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+
+    cache = TriageCache(cache_dir, source)
+    cache.scan()
+    assert cache.stats["rehashed"] == 1
+    assert cache.stats["computed"] == 0
+
+
+def test_clone_index_from_cached_fingerprints(tmp_path):
+    """Indeks klonów budowany z odcisków zapisanych w cache."""
+    source = tmp_path / "src"
+    source.mkdir()
+    body = "".join(f"    value_{i} = compute({i}) + offset\n" for i in range(12))
+    (source / "a.py").write_text("def a(offset):\n" + body)
+    (source / "b.py").write_text("def b(offset):\n" + body)
+    (source / "c.js").write_text("var x = 1;\n")
+
+    metrics = TriageCache(tmp_path / "cache", source).scan()
+    assert "fingerprints" not in metrics["c.js"]
+
+    index = build_clone_index(metrics)
+    assert index.clones
+    assert index.duplication_ratio() > 0.4
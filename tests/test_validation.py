@@ -0,0 +1,346 @@
+"""Testy walidacji propozycji w Dockerze (coval)."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import validation
+from benchmarks import StubRepairSystem
+from validation import DependencyImageCache, dependency_hash, detect_stack, resource_limit_args, build_test_ladder
+from workspace import write_private
+
+
+class FakeDocker:
+    """Rejestruje wywołania docker zamiast uruchamiać kontenery."""
+
+    def __init__(self, images=(), passing=lambda command: True):
+        self.images = set(images)
+        self.passing = passing
+        self.calls = []
+
+    def __call__(self, command, **kwargs):
+        self.calls.append(command)
+        if command[:3] == ["docker", "image", "inspect"]:
+            code = 0 if command[3] in self.images else 1
+        elif command[:2] == ["docker", "build"]:
+            self.images.add(command[command.index("-t") + 1])
+            code = 0
+        elif command[:2] == ["docker", "run"] and "-d" not in command:
+            code = 0 if self.passing(command) else 1
+        elif command[:2] == ["docker", "exec"]:
+            code = 0 if self.passing(command) else 1
+        else:
+            code = 0
+        return subprocess.CompletedProcess(command, code, stdout="", stderr="")
+
+    def builds(self):
+        return [c for c in self.calls if c[:2] == ["docker", "build"]]
+
+
+def test_mre_dockerfile_unchanged_for_python(tmp_path):
+    """Samodzielny Dockerfile MRE zachowuje dotychczasową postać."""
+    (tmp_path / "requirements.txt").write_text("requests\n")
+    assert detect_stack(tmp_path).dockerfile() == (
+        "FROM python:3.11-slim\nWORKDIR /app\nCOPY requirements.txt .\n"
+        "RUN pip install -r requirements.txt\nCOPY . .\nCMD [\"python\", \"-m\", \"pytest\", \"-v\"]\n"
+    )
+
+
+def test_dependency_hash_ignores_sources(tmp_path):
+    """Hash zależy tylko od plików zależności."""
+    (tmp_path / "requirements.txt").write_text("requests\n")
+    (tmp_path / "app.py").write_text("x = 1\n")
+    before = dependency_hash(tmp_path)
+    (tmp_path / "app.py").write_text("x = 2\n")
+    assert dependency_hash(tmp_path) == before
+    (tmp_path / "requirements.txt").write_text("requests==2.0\n")
+    assert dependency_hash(tmp_path) != before
+
+
+def test_base_image_built_once(tmp_path, monkeypatch):
+    """Kolejne propozycje z tymi samymi zależnościami nie budują obrazu bazowego."""
+    docker = FakeDocker()
+    monkeypatch.setattr(validation.subprocess, "run", docker)
+    (tmp_path / "requirements.txt").write_text("requests\n")
+
+    cache = DependencyImageCache()
+    tag = cache.ensure(tmp_path)
+    assert tag and tag.startswith("coval-deps-python:")
+    assert cache.ensure(tmp_path) == tag
+    assert len(docker.builds()) == 1
+
+    # Nowa instancja (kolejna naprawa) korzysta z istniejącego obrazu
+    second = DependencyImageCache()
+    assert second.ensure(tmp_path) == tag
+    assert second.stats == {'hits': 1, 'builds': 0, 'failures': 0}
+
+    dockerfile = cache.write_source_dockerfile(tmp_path, tag)
+    assert dockerfile.read_text().startswith(f"FROM {tag}\n")
+    assert "pip install" not in dockerfile.read_text()
+
+
+def _repair_with_mre(tmp_path):
+    system = StubRepairSystem(repair_dir=str(tmp_path / "repairs"))
+    repair_path = tmp_path / "repairs" / "repair-T1"
+    (repair_path / "mre").mkdir(parents=True)
+    (repair_path / "mre" / "requirements.txt").write_text("pytest\n")
+    (repair_path / "mre" / "app.py").write_text("x = 1\n")
+    (repair_path / "mre" / "tests").mkdir()
+    (repair_path / "mre" / "tests" / "test_smoke.py").write_text("def test_smoke():\n    assert True\n")
+    return system, repair_path
+
+
+def test_parallel_validation_is_isolated(tmp_path, monkeypatch):
+    """Propozycje mają osobne obrazy i katalogi, wygrywa pierwsza poprawna."""
+    docker = FakeDocker(passing=lambda command: "-1-" not in command[command.index("--name") + 1])
+    monkeypatch.setattr(subprocess, "run", docker)
+    system, repair_path = _repair_with_mre(tmp_path)
+    system.validation_config = {'parallel': 3, 'memory': '512m', 'container_pool': False}
+
+    proposals = [{"files": {"app.py": f"x = {i}\n"}} for i in range(3)]
+    assert system.validate_proposals(repair_path, proposals) == 1
+
+    source_builds = [c for c in docker.builds() if "-f" in c]
+    tags = {c[c.index("-t") + 1] for c in source_builds}
+    assert len(tags) == 3 and all(tag.startswith("repair-test-repair-t1-") for tag in tags)
+    removed = {c[3] for c in docker.calls if c[:2] == ["docker", "rmi"]}
+    assert removed == tags
+    for i in range(3):
+        assert (repair_path / "validation" / f"proposal-{i + 1}" / "test" / "app.py").read_text() == f"x = {i}\n"
+
+
+def test_resource_limits_configurable():
+    """Limity zasobów można nadpisać lub wyłączyć."""
+    assert resource_limit_args({'cpus': 2, 'memory': None, 'pids_limit': False}) == ["--cpus", "2"]
+    assert "--memory" in resource_limit_args()
+
+
+def test_sandbox_limits_applied_without_preexec_fn(tmp_path, monkeypatch):
+    """Limity ustawia wrapper przed exec - subprocess nie dostaje preexec_fn."""
+    run = subprocess.run
+    monkeypatch.setattr(subprocess, "run", lambda command, **kwargs: (
+        kwargs.get("preexec_fn") is None or pytest.fail("preexec_fn")) and run(command, **kwargs))
+    config = {'sandbox_memory_mb': 256, 'sandbox_cpu_seconds': 30}
+    probe = "import resource; print(resource.getrlimit(resource.RLIMIT_AS)[0], resource.getrlimit(resource.RLIMIT_CPU)[0])"
+
+    result = validation.run_sandboxed(Path(sys.executable), tmp_path, ["-c", probe], 30, config)
+    assert result.stdout.split() == [str(256 * 1024 * 1024), "30"]
+    result = validation.run_sandboxed(Path(sys.executable), tmp_path, ["-c", "bytearray(512 * 2**20)"], 30, config)
+    assert result.returncode != 0 and "MemoryError" in result.stderr
+
+
+def test_compile_tier_skips_docker(tmp_path, monkeypatch):
+    """Propozycja z błędem składni odpada przed budową obrazu."""
+    docker = FakeDocker()
+    monkeypatch.setattr(subprocess, "run", docker)
+    system, repair_path = _repair_with_mre(tmp_path)
+
+    assert system.validate_fix(repair_path, {"files": {"app.py": "def broken(:\n"}}) is False
+    assert docker.calls == []
+    tiers = json.loads((repair_path / "validation" / "proposal-1" / "tiers.json").read_text())
+    assert [(t["tier"], t["status"]) for t in tiers] == [("compile", "failed")]
+
+
+def test_venv_tier_runs_targeted_test(tmp_path, monkeypatch):
+    """Test ze stacktrace uruchamiany jest w venv; porażka nie dochodzi do Dockera."""
+    system, repair_path = _repair_with_mre(tmp_path)
+    mre = repair_path / "mre"
+    (mre / "tests" / "test_app.py").write_text("import app\n\ndef test_x():\n    assert app.x == 2\n")
+    (mre / "tests" / "test_other.py").write_text("def test_never():\n    raise AssertionError\n")
+    (mre / "stacktrace.txt").write_text('  File "project/tests/test_app.py", line 4, in test_x\n')
+    monkeypatch.setattr(system.venv_cache, "ensure", lambda path: Path(sys.executable))
+    system.validation_tiers = ['compile', 'venv']
+
+    assert system.validate_fix(repair_path, {"files": {"app.py": "x = 1\n"}}) is False
+    assert system.validate_fix(repair_path, {"files": {"app.py": "x = 2\n"}}, 2) is True
+    tiers = json.loads((repair_path / "validation" / "proposal-2" / "tiers.json").read_text())
+    assert [(t["tier"], t["status"]) for t in tiers] == [("compile", "passed"), ("venv", "passed")]
+
+
+def test_local_runtime_runs_ladder_without_docker(tmp_path, monkeypatch):
+    """Runtime 'local': drabina testów w venv, bez żadnego wywołania docker."""
+    system, repair_path = _repair_with_mre(tmp_path)
+    (repair_path / "mre" / "tests" / "test_smoke.py").write_text(
+        "import app\n\ndef test_smoke():\n    assert app.x == 2\n")
+    monkeypatch.setattr(system.venv_cache, "ensure", lambda path: Path(sys.executable))
+    system.validation_tiers = ['compile', 'docker']
+    system.validation_runtime = 'local'
+    docker_calls = []
+    run = subprocess.run
+    monkeypatch.setattr(subprocess, "run", lambda command, **kwargs: (
+        docker_calls.append(command) if command[0] == "docker" else None) or run(command, **kwargs))
+
+    assert system.validate_fix(repair_path, {"files": {"app.py": "x = 1\n"}}) is False
+    assert system.validate_fix(repair_path, {"files": {"app.py": "x = 2\n"}}, 2) is True
+    assert docker_calls == []
+    tiers = json.loads((repair_path / "validation" / "proposal-2" / "tiers.json").read_text())
+    assert [(t["tier"], t["status"]) for t in tiers] == [("compile", "passed"), ("local:impacted", "passed")]
+
+
+def _ladder_mre(root):
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "src" / "pkg" / "__init__.py").write_text("")
+    (root / "src" / "pkg" / "core.py").write_text("VALUE = 1\n")
+    (root / "src" / "pkg" / "helpers.py").write_text("from .core import VALUE\n")
+    (root / "tests").mkdir(exist_ok=True)
+    (root / "tests" / "test_bug.py").write_text("def test_bug():\n    pass\n")
+    (root / "tests" / "test_helpers.py").write_text("from pkg.helpers import VALUE\n")
+    (root / "tests" / "test_unrelated.py").write_text("import json\n")
+    (root / "stacktrace.txt").write_text('  File "tests/test_bug.py", line 2, in test_bug\n')
+
+
+def test_ladder_levels_and_acceptance(tmp_path):
+    """Drabina: odtworzenie błędu, testy dotknięte importami, reszta."""
+    _ladder_mre(tmp_path)
+    changed = ["src/pkg/core.py"]
+    assert build_test_ladder(tmp_path, changed) == [
+        ("reproduce", ["tests/test_bug.py"]),
+        ("impacted", ["tests/test_helpers.py"]),
+        ("full", ["tests/test_unrelated.py"]),
+    ]
+    assert [level for level, _ in build_test_ladder(tmp_path, changed, "impacted")] == ["reproduce", "impacted"]
+
+    # Pusty szczebel akceptacji - drabina sięga dalej, aż coś uruchomi
+    (tmp_path / "stacktrace.txt").write_text("")
+    assert build_test_ladder(tmp_path, ["src/pkg/other.py"], "reproduce") == [
+        ("full", ["tests/test_bug.py", "tests/test_helpers.py", "tests/test_unrelated.py"])
+    ]
+
+
+def test_docker_ladder_stops_at_first_failure(tmp_path, monkeypatch):
+    """Porażka szczebla 'impacted' kończy walidację bez pełnego zestawu."""
+    docker = FakeDocker(passing=lambda command: "tests/test_helpers.py" not in command)
+    monkeypatch.setattr(subprocess, "run", docker)
+    system, repair_path = _repair_with_mre(tmp_path)
+    _ladder_mre(repair_path / "mre")
+    system.validation_tiers = ['docker']
+
+    assert system.validate_fix(repair_path, {"files": {"src/pkg/core.py": "VALUE = 2\n"}}) is False
+    runs = [c for c in docker.calls if c[:2] == ["docker", "run"]]
+    assert [c[-1] for c in runs] == ["tests/test_bug.py", "tests/test_helpers.py"]
+    tiers = json.loads((repair_path / "validation" / "proposal-1" / "tiers.json").read_text())
+    assert [(t["tier"], t["status"]) for t in tiers] == [
+        ("docker:build", "passed"), ("docker:reproduce", "passed"), ("docker:impacted", "failed")]
+
+
+def test_warm_pool_uses_exec(tmp_path, monkeypatch):
+    """Z pulą: bez budowy obrazów propozycji, testy przez docker exec, kontenery usuwane."""
+    docker = FakeDocker(passing=lambda command: "proposal-1/" not in command[-1])
+    monkeypatch.setattr(subprocess, "run", docker)
+    system, repair_path = _repair_with_mre(tmp_path)
+    system.validation_config = {'parallel': 2}
+
+    proposals = [{"files": {"app.py": f"x = {i}\n"}} for i in range(3)]
+    assert system.validate_proposals(repair_path, proposals) == 1
+
+    assert [c for c in docker.builds() if "-f" in c] == []
+    started = [c for c in docker.calls if c[:3] == ["docker", "run", "-d"]]
+    assert 1 <= len(started) <= 2
+    execs = [c for c in docker.calls if c[:2] == ["docker", "exec"]]
+    assert any("proposal-2/test" in c[-1] and "pytest" in c[-1] for c in execs)
+    removed = {c[3] for c in docker.calls if c[:3] == ["docker", "rm", "-f"]}
+    assert removed == {c[c.index("--name") + 1] for c in started}
+    assert system._pools is None
+
+
+def test_warm_pool_quotes_workspace_path(tmp_path, monkeypatch):
+    """Ścieżka katalogu propozycji trafia do ``sh -c`` jako jeden, zacytowany argument."""
+    docker = FakeDocker()
+    monkeypatch.setattr(subprocess, "run", docker)
+    workspace = tmp_path / "validation" / "proposal 1; touch pwned"
+    workspace.mkdir(parents=True)
+    pool = validation.ContainerPool("base:tag", tmp_path / "validation")
+
+    pool.run(workspace, ["python", "-m", "pytest"], 10)
+    script = docker.calls[-1][-1]
+    assert "cp -a /workspaces/'proposal 1; touch pwned' " in script
+
+
+def test_result_cache_and_invalidation(tmp_path, monkeypatch):
+    """Powtórzona walidacja wraca z cache; zmiana zależności ją unieważnia."""
+    docker = FakeDocker(passing=lambda command: False)
+    monkeypatch.setattr(subprocess, "run", docker)
+    system, repair_path = _repair_with_mre(tmp_path)
+    system.validation_config = {'container_pool': False}
+    proposal = {"files": {"app.py": "x = 5\n"}, "explanation": "pierwsza"}
+
+    assert system.validate_fix(repair_path, proposal) is False
+    calls = len(docker.calls)
+    same_files = {"files": {"app.py": "x = 5\n"}, "explanation": "inne wyjaśnienie"}
+    assert system.validate_fix(repair_path, same_files, 2) is False
+    assert len(docker.calls) == calls
+    workspace = repair_path / "validation" / "proposal-2"
+    assert json.loads((workspace / "tiers.json").read_text())[-1]["cached"] is True
+    assert (workspace / "test_errors.txt").exists()
+
+    # Pliki MRE po walidacji są tylko do odczytu (wspólne i-węzły) - zmiana przez write_private
+    write_private(repair_path / "mre" / "requirements.txt", "pytest\nrequests\n")
+    assert system.validate_fix(repair_path, proposal, 3) is False
+    assert len(docker.calls) > calls
+    assert system.validation_cache.stats['hits'] == 1
+
+
+def test_mre_hashed_once_per_repair(tmp_path, monkeypatch):
+    """Hash MRE liczony raz dla wszystkich propozycji; __pycache__ go nie zmienia."""
+    import repair
+    monkeypatch.setattr(subprocess, "run", FakeDocker(passing=lambda command: False))
+    system, repair_path = _repair_with_mre(tmp_path)
+    system.validation_config = {'container_pool': False, 'parallel': 2}
+    hashes = []
+    monkeypatch.setattr(repair, "tree_hash", lambda path: hashes.append(path) or validation.tree_hash(path))
+
+    proposals = [{"files": {"app.py": f"x = {i}\n"}} for i in range(3)]
+    assert system.validate_proposals(repair_path, proposals) is None
+    assert hashes == [repair_path / "mre"]
+
+    digest = validation.tree_hash(repair_path / "mre")
+    (repair_path / "mre" / "__pycache__").mkdir()
+    (repair_path / "mre" / "__pycache__" / "app.cpython-311.pyc").write_bytes(b"\0")
+    assert validation.tree_hash(repair_path / "mre") == digest
+
+
+def test_validation_workspace_does_not_touch_source(tmp_path, monkeypatch):
+    """MRE to kopia źródła - zapis w miejscu przez katalog walidacji nie zmienia repozytorium."""
+    monkeypatch.setattr(subprocess, "run", FakeDocker())
+    source = tmp_path / "project"
+    (source / "app").mkdir(parents=True)
+    (source / "app" / "__init__.py").write_text("")
+    (source / "app" / "core.py").write_text("x = 1\n")
+    (source / "requirements.txt").write_text("pytest\n")
+    error_file = tmp_path / "stacktrace.txt"
+    error_file.write_text('  File "/srv/project/app/core.py", line 1, in <module>\n')
+    system = StubRepairSystem(repair_dir=str(tmp_path / "repairs"))
+    system.validation_config = {'container_pool': False}
+
+    repair_path = system.create_mre(source, error_file, "T1")
+    mre = repair_path / "mre"
+    assert (mre / "src" / "app" / "core.py").stat().st_ino != (source / "app" / "core.py").stat().st_ino
+    system.validate_fix(repair_path, {"files": {"README.md": "zmiana\n"}})
+    test_path = repair_path / "validation" / "proposal-1" / "test"
+    for rel in ("src/app/core.py", "requirements.txt"):
+        try:
+            with open(test_path / rel, "a") as f:
+                f.write("# zapis w miejscu\n")
+        except PermissionError:
+            pass
+
+    assert (source / "app" / "core.py").read_text() == "x = 1\n"
+    assert (source / "requirements.txt").read_text() == "pytest\n"
+
+
+def test_validation_workspace_does_not_touch_mre(tmp_path, monkeypatch):
+    """Propozycja zmienia tylko swój katalog walidacji (reszta to hardlinki)."""
+    monkeypatch.setattr(subprocess, "run", FakeDocker())
+    system, repair_path = _repair_with_mre(tmp_path)
+    system.validation_config = {'container_pool': False}
+
+    system.validate_fix(repair_path, {"files": {"app.py": "x = 9\n"}})
+    mre = repair_path / "mre"
+    test_path = repair_path / "validation" / "proposal-1" / "test"
+    assert (mre / "app.py").read_text() == "x = 1\n"
+    assert (test_path / "app.py").read_text() == "x = 9\n"
+    assert (test_path / "requirements.txt").stat().st_ino == (mre / "requirements.txt").stat().st_ino
+    assert not (mre / "Dockerfile.validate").exists()
@@ -0,0 +1,129 @@
+"""Testy walkera plików z przycinaniem katalogów (coval)."""
+
+from walker import FileWalker, GitIgnore, find_dirs, walk_files
+
+
+def _tree(root):
+    files = {
+        "src/app.py": "print('app')\n",
+        "src/gen/out.py": "x = 1\n",
+        "src/keep.log": "log\n",
+        "src/debug.log": "log\n",
+        "node_modules/lib/index.js": "module.exports = 1;\n",
+        ".venv/lib/site.py": "x = 1\n",
+        "iterations/01_x/main.py": "x = 1\n",
+        "pkg/nested/.gitignore": "*.tmp\n",
+        "pkg/nested/a.tmp": "tmp\n",
+        "pkg/nested/a.py": "x = 1\n",
+        "pkg/other.tmp": "tmp\n",
+        ".gitignore": "src/gen/\n*.log\n!keep.log\n",
+    }
+    for rel, content in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    (root / "src" / "blob.dat").write_bytes(b"\x00\x01binary")
+    (root / "src" / "big.txt").write_text("x" * 2048)
+
+
+def _rel(root, paths):
+    return sorted(p.relative_to(root).as_posix() for p in paths)
+
+
+def test_gitignore_and_default_excludes(tmp_path):
+    """Katalogi domyślne i wpisy .gitignore (także zagnieżdżone) są pomijane."""
+    _tree(tmp_path)
+    found = _rel(tmp_path, walk_files(tmp_path, max_file_size=1024, workspace_root=tmp_path))
+    assert found == [
+        ".gitignore",
+        "pkg/nested/.gitignore",
+        "pkg/nested/a.py",
+        "pkg/other.tmp",
+        "src/app.py",
+        "src/keep.log",
+    ]
+
+
+def test_filters_by_suffix_and_pattern(tmp_path):
+    """Filtry rozszerzeń i wzorców nazw."""
+    _tree(tmp_path)
+    assert _rel(tmp_path, walk_files(tmp_path, suffixes={".py"}, workspace_root=tmp_path)) == [
+        "pkg/nested/a.py", "src/app.py"]
+    assert _rel(tmp_path, walk_files(tmp_path, patterns=["a.*"])) == ["pkg/nested/a.py"]
+
+
+def test_binary_and_size_limits_can_be_disabled(tmp_path):
+    """Pliki binarne i duże są pomijane tylko gdy filtry są włączone."""
+    _tree(tmp_path)
+    found = _rel(tmp_path, walk_files(tmp_path, use_gitignore=False, skip_binary=False, max_file_size=None))
+    assert "src/blob.dat" in found
+    assert "src/big.txt" in found
+    assert "src/gen/out.py" in found
+    assert "node_modules/lib/index.js" not in found
+
+
+def test_workspace_excludes_only_at_workspace_root(tmp_path):
+    """iterations/, archive/, repairs/ pomijane tylko w katalogu roboczym narzędzia."""
+    _tree(tmp_path)
+    for rel in ["src/archive/models.py", "src/repairs/__init__.py", "archive/old/x.py"]:
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_text("x = 1\n")
+
+    in_workspace = _rel(tmp_path, walk_files(tmp_path, suffixes={".py"}, workspace_root=tmp_path))
+    assert in_workspace == ["pkg/nested/a.py", "src/app.py", "src/archive/models.py", "src/repairs/__init__.py"]
+    # Drzewo źródeł użytkownika (bez workspace_root) - pakiety o tych nazwach zostają
+    in_project = _rel(tmp_path, walk_files(tmp_path, suffixes={".py"}))
+    assert "iterations/01_x/main.py" in in_project and "archive/old/x.py" in in_project
+
+
+def test_gitignore_from_parent_directories(tmp_path):
+    """Reguły .gitignore nad katalogiem startowym są ładowane do korzenia repozytorium."""
+    (tmp_path / ".gitignore").write_text("outside.py\n")
+    repo = tmp_path / "repo"
+    files = {
+        ".git/HEAD": "ref: refs/heads/main\n",
+        ".gitignore": "*.gen.py\nservice/build/\n",
+        "service/.gitignore": "!keep.gen.py\n",
+        "service/app.py": "x = 1\n",
+        "service/outside.py": "x = 1\n",
+        "service/a.gen.py": "x = 1\n",
+        "service/keep.gen.py": "x = 1\n",
+        "service/build/out.py": "x = 1\n",
+    }
+    for rel, content in files.items():
+        (repo / rel).parent.mkdir(parents=True, exist_ok=True)
+        (repo / rel).write_text(content)
+
+    found = _rel(repo / "service", walk_files(repo / "service", suffixes={".py"}))
+    # Reguły spoza repozytorium (nad .git) nie obowiązują
+    assert found == ["app.py", "keep.gen.py", "outside.py"]
+    assert "service/app.py" in _rel(repo, walk_files(repo, suffixes={".py"}))
+
+
+def test_threaded_walk_matches_sequential(tmp_path):
+    """Skanowanie wielowątkowe daje ten sam wynik."""
+    _tree(tmp_path)
+    sequential = _rel(tmp_path, FileWalker(tmp_path).files())
+    threaded = _rel(tmp_path, FileWalker(tmp_path, threads=4).files())
+    assert sequential == threaded
+
+
+def test_find_dirs_does_not_descend(tmp_path):
+    """find_dirs zwraca katalogi bez wchodzenia do ich wnętrza."""
+    _tree(tmp_path)
+    (tmp_path / "node_modules" / "dep" / "node_modules").mkdir(parents=True)
+    (tmp_path / "iterations" / "01_x" / "node_modules").mkdir()
+    found = _rel(tmp_path, find_dirs(tmp_path, ["node_modules"]))
+    assert found == ["iterations/01_x/node_modules", "node_modules"]
+
+
+def test_gitignore_rules():
+    """Semantyka wzorców: kotwiczenie, katalogi, negacja, **."""
+    rules = GitIgnore(["/build", "docs/**/*.md", "cache/", "*.pyc", "!important.pyc"])
+    assert rules.match("build", True)
+    assert rules.match("src/build", True) is None
+    assert rules.match("docs/a/b/x.md", False)
+    assert rules.match("cache", False) is None
+    assert rules.match("deep/cache", True)
+    assert rules.match("x/y.pyc", False)
+    assert rules.match("important.pyc", False) is False
@@ -0,0 +1,49 @@
+"""Testy katalogów roboczych z hardlinkami (coval)."""
+
+from workspace import contained_path, link_tree, write_private
+
+
+def test_link_tree_is_copy_on_write(tmp_path):
+    """Pliki są linkowane, a zapis przez write_private nie zmienia oryginału."""
+    source = tmp_path / "mre"
+    (source / "src").mkdir(parents=True)
+    (source / "src" / "app.py").write_text("x = 1\n")
+    (source / "requirements.txt").write_text("pytest\n")
+
+    dest = tmp_path / "work"
+    stats = link_tree(source, dest)
+    assert stats == {'linked': 2, 'copied': 0}
+    assert (dest / "src" / "app.py").stat().st_ino == (source / "src" / "app.py").stat().st_ino
+
+    write_private(dest / "src" / "app.py", "x = 2\n")
+    assert (source / "src" / "app.py").read_text() == "x = 1\n"
+    assert (dest / "src" / "app.py").read_text() == "x = 2\n"
+    assert (dest / "requirements.txt").stat().st_ino == (source / "requirements.txt").stat().st_ino
+
+
+def test_link_tree_can_copy(tmp_path):
+    """Bez hardlinków drzewo jest zwykłą kopią."""
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "f.txt").write_text("x")
+    assert link_tree(tmp_path / "a", tmp_path / "b", hardlink=False) == {'linked': 0, 'copied': 1}
+    assert (tmp_path / "b" / "f.txt").stat().st_ino != (tmp_path / "a" / "f.txt").stat().st_ino
+
+
+def test_link_tree_read_only(tmp_path):
+    """Linki tylko do odczytu; write_private nadal podmienia plik."""
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "f.txt").write_text("x")
+    link_tree(tmp_path / "a", tmp_path / "b", read_only=True)
+    assert not (tmp_path / "b" / "f.txt").stat().st_mode & 0o222
+    write_private(tmp_path / "b" / "f.txt", "y")
+    assert (tmp_path / "a" / "f.txt").read_text() == "x"
+
+
+def test_contained_path_rejects_escapes(tmp_path):
+    """Ścieżki z LLM nie mogą wyjść poza katalog bazowy."""
+    base = tmp_path / "fix-1"
+    base.mkdir()
+    assert contained_path(base, "src/app.py") == (base / "src" / "app.py").resolve()
+    assert contained_path(base, "../../x") is None
+    assert contained_path(base, str(tmp_path / "other.py")) is None
+    assert contained_path(base, ".") is None
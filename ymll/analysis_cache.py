@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""analysis_cache.py
+
+Cache przyrostowej analizy między iteracjami (``.ymll_analysis_cache.json``).
+
+Każde narzędzie pamięta hashe treści plików ze swojego zakresu:
+
+* flake8 - komunikaty per plik; ponownie sprawdzane są tylko zmienione pliki,
+  reszta jest doklejana z cache,
+* mypy - komunikaty per plik; gdy w zakresie nic się nie zmieniło, wynik
+  pochodzi z cache. Po zmianie mypy sprawdza cały zakres (typy zależą od
+  innych modułów), korzystając z własnego cache przyrostowego ``.mypy_cache``,
+* pytest - wynik per plik testowy; uruchamiane są tylko testy importujące
+  (pośrednio) zmienione pliki oraz te, które poprzednio nie przeszły.
+
+Stan narzędzia obejmuje też hashe jego plików konfiguracji (``setup.cfg``,
+``.flake8``, ``mypy.ini``, ``pyproject.toml``, ``pytest.ini`` itp. oraz pliki
+podane w opcjach), a dla pytest - plików innych niż ``.py`` w katalogach
+testów (dane, fixtures). Zmiana któregokolwiek z nich wymusza pełne
+uruchomienie narzędzia.
+"""
+
+import fnmatch
+import hashlib
+import json
+import re
+import shlex
+import threading
+from pathlib import Path
+from typing import Optional
+
+from import_graph import TEST_PATTERNS, build_import_graph, reverse_closure
+from walker import walk_files
+
+ROOT = Path(__file__).resolve().parents[1]
+
+CACHE_FILE = ROOT / ".ymll_analysis_cache.json"
+MYPY_CACHE_DIR = ROOT / ".mypy_cache"
+CACHE_VERSION = 2
+
+# Narzędzia z trybem przyrostowym
+INCREMENTAL_TOOLS = ("flake8", "mypy", "pytest")
+
+# Pliki konfiguracji czytane przez narzędzia (względem katalogu projektu)
+CONFIG_FILES = {
+    "flake8": (".flake8", "setup.cfg", "tox.ini"),
+    "mypy": ("mypy.ini", ".mypy.ini", "setup.cfg", "pyproject.toml"),
+    "pytest": ("pytest.ini", ".pytest.ini", "pyproject.toml", "tox.ini", "setup.cfg"),
+}
+
+# "src/mod.py:12:5: E501 ..." (flake8), "src/mod.py:12: error: ..." (mypy)
+_MESSAGE = re.compile(r"^(?P<path>[^:\s][^:]*\.pyi?):\d+")
+# "FAILED tests/test_x.py::test_y - ...", "ERROR tests/test_x.py" (podsumowanie pytest)
+_PYTEST_FAILURE = re.compile(r"^(?:FAILED|ERROR) (?P<path>[^\s:]+\.py)")
+
+def file_hash(path: Path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+def split_args(path: str, root: Path) -> tuple[list[str], list[str]]:
+    """``path`` z manifestu -> (opcje z wartościami, istniejące ścieżki)"""
+    options, targets = [], []
+    for arg in shlex.split(path or ""):
+        (targets if not arg.startswith("-") and (root / arg).exists() else options).append(arg)
+    return options, targets
+
+def scan_files(targets: list[str], root: Path) -> dict[str, str]:
+    """Pliki .py w ścieżkach (względem root) -> hash treści"""
+    files = {}
+    for target in targets or ["."]:
+        path = root / target
+        if path.is_file():
+            candidates = [path] if path.suffix == ".py" else []
+        elif path.is_dir():
+            candidates = walk_files(path, suffixes={".py"}, workspace_root=root)
+        else:
+            candidates = []
+        for candidate in candidates:
+            files[candidate.relative_to(root).as_posix()] = file_hash(candidate)
+    return files
+
+def config_files(kind: str, args: list[str], root: Path) -> dict[str, str]:
+    """Pliki konfiguracji narzędzia (domyślne i podane w argumentach, np. ``--config-file=x.ini``) -> hash"""
+    names = list(CONFIG_FILES.get(kind, ()))
+    for arg in args:
+        value = arg.split("=", 1)[1] if arg.startswith("-") and "=" in arg else arg
+        if not value.startswith("-") and Path(value).suffix != ".py":
+            names.append(value)
+    files = {}
+    for name in names:
+        path = root / name
+        if path.is_file():
+            files[Path(name).as_posix()] = file_hash(path)
+    return files
+
+def data_files(tests: list[str], root: Path) -> dict[str, str]:
+    """Pliki inne niż .py w katalogach plików testowych (dane, fixtures) -> hash
+
+    Katalog główny projektu jest pomijany - trafiają tam raporty i prompt z analizy.
+    """
+    dirs = {Path(t).parent for t in tests} - {Path(".")}
+    files = {}
+    for directory in sorted(d for d in dirs if not any(p in dirs for p in d.parents)):
+        for path in walk_files(root / directory, max_file_size=None, skip_binary=False):
+            if path.suffix not in (".py", ".pyc"):
+                files[path.relative_to(root).as_posix()] = file_hash(path)
+    return files
+
+def messages_by_file(output: str, files: list[str], root: Path) -> dict[str, list[str]]:
+    """Komunikaty narzędzia przypisane do plików (pliki bez komunikatów - puste listy)"""
+    result: dict[str, list[str]] = {f: [] for f in files}
+    for line in output.splitlines():
+        match = _MESSAGE.match(line)
+        if match:
+            path = Path(match["path"])
+            if path.is_absolute():
+                try:
+                    path = path.relative_to(root.resolve())
+                except ValueError:
+                    pass
+            result.setdefault(path.as_posix().removeprefix("./"), []).append(line)
+    return result
+
+def failed_test_files(output: str) -> set[str]:
+    return {Path(m["path"]).as_posix() for m in map(_PYTEST_FAILURE.match, output.splitlines()) if m}
+
+def is_test_file(path: str) -> bool:
+    return any(fnmatch.fnmatch(Path(path).name, pattern) for pattern in TEST_PATTERNS)
+
+def affected_tests(files: dict[str, str], changed: set[str], tests: list[str], root: Path) -> set[str]:
+    """Pliki testowe zmienione lub importujące (pośrednio) zmienione pliki"""
+    graph = build_import_graph(root, files)
+    affected = reverse_closure(graph, changed) | changed
+    return {t for t in tests if t in affected}
+
+class AnalysisCache:
+    """Stan narzędzi z poprzedniego uruchomienia; zapis po zakończeniu analizy"""
+
+    def __init__(self, path: Path = CACHE_FILE, root: Optional[Path] = None):
+        self.path = Path(path)
+        self.root = Path(root) if root else Path.cwd()
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            data = {}
+        self.tools: dict[str, dict] = data.get("tools", {}) if data.get("version") == CACHE_VERSION else {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> dict:
+        with self._lock:
+            return self.tools.get(key, {})
+
+    def put(self, key: str, state: dict):
+        with self._lock:
+            self.tools[key] = state
+
+    @staticmethod
+    def changed(previous: dict[str, str], current: dict[str, str]) -> set[str]:
+        """Pliki nowe, zmienione i usunięte"""
+        return {f for f in current if previous.get(f) != current[f]} | (set(previous) - set(current))
+
+    def save(self):
+        with self._lock:
+            data = {"version": CACHE_VERSION, "tools": self.tools}
+        tmp_file = self.path.with_name(self.path.name + ".tmp")
+        tmp_file.write_text(json.dumps(data, indent=1, sort_keys=True), encoding="utf-8")
+        tmp_file.replace(self.path)
@@ -6,6 +6,18 @@ zdefiniowane w sekcji ``analysis_tools``. Wyniki (stdout+stderr oraz kod
 zwrócenia) są zapisywane w pliku ``prompt_for_chatai.txt`` razem z
 informacjami o projekcie i iteracji.
 
+Narzędzia działają równolegle na puli wielkości liczby CPU. Wyjście każdego
+narzędzia trafia strumieniowo do ``reports/<narzędzie>.txt`` (stamtąd czyta
+je ``collect_reports.py``). Ustawienia narzędzia w manifeście:
+
+* ``parallel`` (domyślnie ``true``) - ``false`` uruchamia narzędzie w
+  wyłączności, gdy żadne inne nie działa,
+* ``cpu`` (domyślnie 1) - liczba slotów puli zajmowanych przez narzędzie,
+* ``memory_mb`` - limit pamięci procesu (RLIMIT_AS),
+* ``incremental`` (domyślnie ``true``) - flake8, mypy i pytest korzystają
+  z cache wyników między iteracjami (``analysis_cache.py``); ``--full``
+  uruchamia wszystko od nowa i odświeża cache.
+
 Skrypt jest prosty, nie wymaga dodatkowych zależności poza standardową
 biblioteką Pythona.
 """
@@ -13,42 +25,235 @@ biblioteką Pythona.
 import yaml
 import subprocess
 import shlex
+import shutil
 from pathlib import Path
-import json
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional
+
+# Punkt wejścia: wspólne moduły z katalogu coval/ (analysis_cache, limity zasobów)
+_COVAL_DIR = str(Path(__file__).resolve().parents[1] / "coval")
+if _COVAL_DIR not in sys.path:
+    sys.path.insert(0, _COVAL_DIR)
+
+from analysis_cache import (  # noqa: E402
+    INCREMENTAL_TOOLS, MYPY_CACHE_DIR, AnalysisCache, affected_tests, config_files, data_files, failed_test_files,
+    is_test_file, messages_by_file, scan_files, split_args)
+from rlimits import limited_command  # noqa: E402
 
 MANIFEST_FILE = Path(__file__).resolve().parents[1] / "manifest.yaml"
 PROMPT_FILE = Path(__file__).resolve().parents[1] / "prompt_for_chatai.txt"
+REPORTS_DIR = Path(__file__).resolve().parents[1] / "reports"
 
-def load_manifest() -> dict:
-    with MANIFEST_FILE.open("r", encoding="utf-8") as f:
+def load_manifest(path: Path = MANIFEST_FILE) -> dict:
+    with Path(path).open("r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
-def run_tool(name: str, path: str, timeout: int) -> dict:
-    cmd = f"{name} {path}"
-    try:
-        completed = subprocess.run(
-            shlex.split(cmd),
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-        )
-        return {
-            "tool": name,
-            "returncode": completed.returncode,
-            "output": completed.stdout + "\n" + completed.stderr,
-        }
-    except subprocess.TimeoutExpired:
-        return {
-            "tool": name,
-            "returncode": -1,
-            "output": "TIMEOUT",
-        }
-    except FileNotFoundError:
-        return {
-            "tool": name,
-            "returncode": -1,
-            "output": f"Tool '{name}' not found on PATH",
-        }
+class CpuSlots:
+    """Sloty puli - narzędzie zajmuje ``cpu`` slotów na czas działania"""
+
+    def __init__(self, total: int):
+        self.total = max(1, total)
+        self.free = self.total
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def take(self, count: int):
+        count = max(1, min(count, self.total))
+        with self._cond:
+            self._cond.wait_for(lambda: self.free >= count)
+            self.free -= count
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.free += count
+                self._cond.notify_all()
+
+def run_tool(name: str, path: str, timeout: int, report: Optional[Path] = None,
+             memory_mb: Optional[int] = None) -> dict:
+    cmd = shlex.split(f"{name} {path}")
+    report = Path(report) if report else REPORTS_DIR / f"{Path(name).name}.txt"
+    report.parent.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    with report.open("w", encoding="utf-8") as out:
+        try:
+            if memory_mb:
+                # Limit ustawia wrapper przed exec (preexec_fn nie jest bezpieczne przy wątkach puli)
+                executable = shutil.which(cmd[0])
+                if executable is None:
+                    raise FileNotFoundError(cmd[0])
+                cmd = limited_command([executable, *cmd[1:]], memory_mb)
+            process = subprocess.Popen(
+                cmd,
+                stdout=out,
+                stderr=subprocess.STDOUT,
+                text=True,
+                start_new_session=True,
+            )
+        except FileNotFoundError:
+            out.write(f"Tool '{name}' not found on PATH")
+            returncode = -1
+        else:
+            try:
+                returncode = process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                # Cała grupa procesów - np. pytest z podprocesami
+                os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
+                out.write("\nTIMEOUT\n")
+                returncode = -1
+    return {
+        "tool": name,
+        "returncode": returncode,
+        "output": report.read_text(encoding="utf-8", errors="replace"),
+        "report": str(report),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+def report_names(tools: list[dict]) -> list[str]:
+    """Nazwy plików raportów (nazwa pliku narzędzia, także gdy podano ścieżkę); powtórzone dostaje sufiks"""
+    names, seen = [], {}
+    for tool in tools:
+        name = Path(tool.get("name")).name
+        seen[name] = seen.get(name, 0) + 1
+        names.append(f"{name}.txt" if seen[name] == 1 else f"{name}_{seen[name]}.txt")
+    return names
+
+def _args(options: list[str], paths: list[str]) -> str:
+    return " ".join(shlex.quote(a) for a in options + paths)
+
+def _cached_result(name: str, report: Path, output: str, returncode: int, note: str, start: float) -> dict:
+    """Wynik złożony z cache i świeżego uruchomienia, zapisany do raportu"""
+    output = (output.rstrip("\n") + "\n" if output.strip() else "") + f"[incremental] {note}\n"
+    report.parent.mkdir(parents=True, exist_ok=True)
+    report.write_text(output, encoding="utf-8")
+    return {
+        "tool": name,
+        "returncode": returncode,
+        "output": output,
+        "report": str(report),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+def run_linter_incremental(tool: dict, report: Path, cache: AnalysisCache, full: bool = False) -> dict:
+    """flake8: tylko zmienione pliki; mypy: cały zakres tylko po zmianie (z .mypy_cache)"""
+    name, key, start = tool.get("name"), f"{report.name}:{tool.get('name')} {tool.get('path', '')}", time.perf_counter()
+    options, targets = split_args(tool.get("path", ""), cache.root)
+    files = scan_files(targets, cache.root)
+    config = config_files(Path(name).name, options + targets, cache.root)
+    state = {} if full else cache.get(key)
+    if state.get("config") != config:
+        # Zmiana konfiguracji narzędzia - pełne uruchomienie
+        state = {}
+    changed = AnalysisCache.changed(state.get("files", {}), files)
+    is_mypy = Path(name).name == "mypy"
+    # mypy zgłasza też moduły importowane spoza zakresu - zostają w cache
+    messages = {f: lines for f, lines in state.get("messages", {}).items() if f in files or is_mypy}
+    summary = state.get("summary", "")
+    returncode = state.get("returncode")
+
+    if is_mypy:
+        if changed or not state:
+            if not any(o.startswith("--cache-dir") for o in options):
+                options = options + [f"--cache-dir={MYPY_CACHE_DIR}"]
+            result = run_tool(name, _args(options, targets), tool.get("timeout", 30), report, tool.get("memory_mb"))
+            if result["returncode"] not in (0, 1):
+                return result
+            messages = messages_by_file(result["output"], list(files), cache.root)
+            lines = [line for line in result["output"].splitlines() if line.strip()]
+            summary = lines[-1] if lines and not any(lines[-1] in m for m in messages.values()) else ""
+            returncode = result["returncode"]
+            checked = len(files)
+        else:
+            checked = 0
+    else:
+        run_files = sorted(f for f in changed if f in files)
+        if run_files:
+            result = run_tool(name, _args(options, run_files), tool.get("timeout", 30), report, tool.get("memory_mb"))
+            if result["returncode"] not in (0, 1):
+                return result
+            messages.update(messages_by_file(result["output"], run_files, cache.root))
+        checked = len(run_files)
+
+    lines = [line for f in sorted(messages) for line in messages[f]]
+    if not is_mypy:
+        returncode = 1 if lines else 0
+    cache.put(key, {"files": files, "config": config, "messages": messages, "summary": summary,
+                    "returncode": returncode})
+    return _cached_result(name, report, "\n".join(lines + ([summary] if summary else [])), returncode,
+                          f"sprawdzono {checked} z {len(files)} plików, reszta z cache", start)
+
+def run_pytest_incremental(tool: dict, report: Path, cache: AnalysisCache, full: bool = False) -> dict:
+    """Tylko testy dotknięte zmianą i te, które poprzednio nie przeszły"""
+    name, key, start = tool.get("name"), f"{report.name}:{tool.get('name')} {tool.get('path', '')}", time.perf_counter()
+    options, targets = split_args(tool.get("path", ""), cache.root)
+    # Cały projekt - testy importują moduły także spoza ścieżek manifestu
+    files = scan_files(["."], cache.root)
+    prefixes = [Path(t).as_posix().rstrip("/") for t in targets or ["."]]
+    tests = sorted(f for f in files if is_test_file(f)
+                   and any(p == "." or f == p or f.startswith(p + "/") for p in prefixes))
+    config = config_files("pytest", options + targets, cache.root)
+    data = data_files(tests, cache.root)
+    state = {} if full else cache.get(key)
+    if state.get("config") != config or state.get("data") != data:
+        # Zmiana konfiguracji lub danych testów (poza .py) - pełne uruchomienie
+        state = {}
+    changed = AnalysisCache.changed(state.get("files", {}), files)
+    passed = {t: ok for t, ok in state.get("tests", {}).items() if t in tests}
+
+    # conftest.py i usunięte pliki mogą wpływać na dowolny test
+    run_all = not state or any(Path(f).name == "conftest.py" or f not in files for f in changed)
+    if run_all:
+        selected = set(tests)
+    else:
+        selected = affected_tests(files, changed & set(files), tests, cache.root)
+        selected |= {t for t in tests if not passed.get(t)}
+
+    if not selected:
+        cache.put(key, {"files": files, "config": config, "data": data, "tests": passed})
+        return _cached_result(name, report, "", 0, f"brak testów dotkniętych zmianą ({len(tests)} z cache)", start)
+
+    result = run_tool(name, _args(options, targets if run_all else sorted(selected)),
+                      tool.get("timeout", 30), report, tool.get("memory_mb"))
+    if result["returncode"] not in (0, 1, 5):
+        return result
+    failed = failed_test_files(result["output"])
+    for test in selected:
+        # Kod 1 bez rozpoznanych plików - nie wiadomo które, wszystkie do ponownego uruchomienia
+        passed[test] = result["returncode"] != 1 or (bool(failed) and test not in failed)
+    cache.put(key, {"files": files, "config": config, "data": data, "tests": passed})
+    return _cached_result(name, report, result["output"], 1 if result["returncode"] == 1 else 0,
+                          f"uruchomiono {len(selected)} z {len(tests)} plików testowych, reszta z cache", start)
+
+def run_tools(tools: list[dict], workers: Optional[int] = None,
+              reports_dir: Path = REPORTS_DIR, cache: Optional[AnalysisCache] = None,
+              full: bool = False) -> list[dict]:
+    """Narzędzia równolegle wg slotów CPU; wyniki w kolejności manifestu"""
+    slots = CpuSlots(workers or os.cpu_count() or 1)
+
+    def run(tool: dict, report_name: str) -> dict:
+        cpu = int(tool.get("cpu", 1)) if tool.get("parallel", True) else slots.total
+        report = Path(reports_dir) / report_name
+        kind = Path(tool.get("name", "")).name
+        with slots.take(cpu):
+            if cache is not None and kind in INCREMENTAL_TOOLS and tool.get("incremental", True):
+                if kind == "pytest":
+                    return run_pytest_incremental(tool, report, cache, full)
+                return run_linter_incremental(tool, report, cache, full)
+            return run_tool(tool.get("name"), tool.get("path", ""), tool.get("timeout", 30),
+                            report, tool.get("memory_mb"))
+
+    if not tools:
+        return []
+    with ThreadPoolExecutor(max_workers=len(tools)) as executor:
+        return list(executor.map(run, tools, report_names(tools)))
 
 def generate_prompt(manifest: dict, results: list[dict]) -> str:
     lines = []
@@ -67,14 +272,21 @@ def generate_prompt(manifest: dict, results: list[dict]) -> str:
     return "\n".join(lines)
 
 def main():
+    parser = argparse.ArgumentParser(description="Uruchamia narzędzia analizy z manifest.yaml")
+    parser.add_argument("--workers", type=int, help="Rozmiar puli (domyślnie liczba CPU)")
+    parser.add_argument("--full", action="store_true",
+                        help="Pełna analiza bez cache wyników (cache zostaje odświeżony)")
+    args = parser.parse_args()
+
     manifest = load_manifest()
     tools = manifest.get("analysis_tools", [])
-    results = []
-    for tool in tools:
-        name = tool.get("name")
-        path = tool.get("path", "")
-        timeout = tool.get("timeout", 30)
-        results.append(run_tool(name, path, timeout))
+    start = time.perf_counter()
+    cache = AnalysisCache()
+    results = run_tools(tools, args.workers, cache=cache, full=args.full)
+    cache.save()
+    for r in results:
+        print(f"{r['tool']}: kod {r['returncode']}, {r['seconds']}s -> {r['report']}")
+    print(f"Analiza zakończona w {time.perf_counter() - start:.1f}s")
     prompt = generate_prompt(manifest, results)
     PROMPT_FILE.write_text(prompt, encoding="utf-8")
     print(f"Prompt zapisany w {PROMPT_FILE}")